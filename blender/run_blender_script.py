@@ -3,18 +3,19 @@ Called from osm_to_obj8.py script"""
 # import sys
 import logging
 import datetime
-import ast
+import array
+import bisect
 from logging import raiseExceptions
 from pathlib import Path
 import os
 import importlib.util
 # import math
 import copy
+import json
 import sys
-import xml
-import xml.etree.ElementTree as ET
 import random
 import sqlite3
+import struct
 from sqlite3 import Error
 import bpy
 import bmesh
@@ -40,6 +41,22 @@ G_OBJ8_DATA_TABLE = 'obj8_data'
 K_FILE_NAME_OBJ8 = 'file_name_obj8'
 K_WAY_ID = 'way_id'
 CONFIG_BLENDER_VERSION = 'blender_version'  # number
+K_WAVEFRONT_INFO = 'wavefront_info'  # dictionary with the "# key value" header lines of the imported WaveFront file
+K_LEVELS_IN_SPAN = 'levels_in_span'  # number of building levels a single wall face represents
+K_BOTTOM_FACE = 'bottom_face'  # 0 if the WaveFront file was written without a bottom face
+K_WINDING = 'winding'  # "ccw" if all faces of the WaveFront file were written facing outward
+K_ROOF = 'roof'  # "1" if the WaveFront file already has its roof faces, no roof extrusion or bevel is needed
+K_CAPS_TRIANGULATED = 'caps_triangulated'  # "1" if the top and bottom faces were written as triangles
+K_UV = 'uv'  # "1" if the WaveFront file already has the texture coordinates (vt) of every face
+K_ROOF_ZONE = 'roof_zone'  # "x,y,w,h" texture zone picked for the roof, when the WaveFront file has texture coordinates
+K_BATCH = 'batch'  # "1" if the WaveFront file holds several buildings, one "way_{way_id}" object each, see read_batch_index()
+K_WAY_META = 'way_meta'  # the osm tags of the building, from its job manifest entry
+K_TEXTURE_INDEX = 'texture_index'  # the texture set osm_to_xplane.py picked for the building, "" lets find_node_bucket_based_on_metadata_or_dimension() pick it
+K_MESH = 'mesh'  # the file Blender imports for a job manifest entry, the building file or its batch file
+K_TEXTURE_RULES = 'texture_rules'  # the compiled "uv_xml_config.xml" rules in the run config
+K_TEXTURE_ZONES = 'texture_zones'  # the roof/wall/door/window zones osm_to_xplane.py picked for the building, seeded with its way_id
+BINARY_MESH_MAGIC = b"OXPM"  # "{}_osm.mesh" binary mesh container, written by pack_binary_mesh_file() in osm_to_xplane.py
+BINARY_MESH_VERSION = 1
 
 
 class FaceInfo:
@@ -104,187 +121,96 @@ def print(in_message=""):
     logger.info(f'{datetime.datetime.now()} %s', in_message)
 
 
-def eval_from_text(in_text):
-    """ eval_from_text() function, returns None if ast.literal_eval() fails """
-    try:
-        return ast.literal_eval(in_text)
-    except Exception as ve:
-        print(f'Error:\n{ve}\nFor: {in_text}')
-        return None
-
-
-def expand_ranges(input_list):
-    expanded_list = []
-
-    for item in input_list:
-        if '--' in item:  # Check if it's a range
-            start, end = item.split('--')
-            start, end = int(start), int(end)
-            expanded_list.extend(str(i) for i in range(start, end + 1))
-        else:
-            expanded_list.append(item)
-
-    return expanded_list
-
-
-def xml_search_tag_with_attrib_value(in_parent=xml.etree.ElementTree.Element, tag="", attrib="", value="") -> xml.etree.ElementTree.Element:
-    """Search for an XML node based on tag name, its attribute and value"""
-    # Texture Mappings from XML file
-    for child in in_parent:
-        if child.tag == tag and child.get(attrib) == value:
-            return child
+def compile_texture_rules(in_dc_rules: dict) -> dict:
+    """ The "uv_xml_config.xml" rules compiled by osm_to_xplane.py (TextureRules.as_json()), from the run config:
+    the "index_meta" values as sets and the zones as tuples, built once per process. """
+    return {"bucket_lengths": tuple(in_dc_rules["bucket_lengths"]),
+            "bucket_sets": tuple(in_dc_rules["bucket_sets"]),
+            "index_meta": tuple((set_index, first_key, tuple((key, frozenset(values)) for key, values in dc_grades.items()))
+                                for set_index, first_key, dc_grades in in_dc_rules["index_meta"]),
+            "uv_rotation_fix": in_dc_rules.get("uv_rotation_fix", {}),
+            "sets": {set_index: {zone_type: (tuple(tuple(zone) for zone in zones), tuple(cum_weights))
+                                 for zone_type, (zones, cum_weights) in dc_zones.items()}
+                     for set_index, dc_zones in in_dc_rules["sets"].items()}}
 
 
-def xml_read_attrib(in_node: xml.etree.ElementTree.Element, attrib="", in_default=""):
-    """Get the value of an attribute, return default if attribute was not found."""
-    return in_node.get(key=attrib, default=in_default)
-
-
-def xml_read_text_and_weights_as_list(in_parent: xml.etree.ElementTree.Element, tag: str = "") -> []:
-    """Read the text and the weight attribute from all tags with same name"""
-    ls_zones = []
-    ls_weights = []
-    for child in in_parent.iter(tag):
-        ls_text = child.text.split(',')
-
-        if len(ls_text) < 4:
-            print(f'Error reading {tag}, does not have at least four values: {ls_text!r}. Skipping tag.')
-            continue
-
-        s_default_weight = "1"
-        ls_zones.append(ls_text)
-        s_weight = child.get("weight", s_default_weight)
-
-        if s_weight.isnumeric():
-            ls_weights.append(int(s_weight))
-        else:
-            ls_weights.append(int(s_default_weight))
-
-    return ls_zones, ls_weights
+def pick_zone(in_dc_rules_set: dict, in_zone_type: str) -> list:
+    """ Randomly pick one zone [x, y, width, height] of a texture set, based on the weights. """
+    ls_zones, ls_cum_weights = in_dc_rules_set[in_zone_type]
+    return list(random.choices(ls_zones, cum_weights=ls_cum_weights if ls_cum_weights and ls_cum_weights[-1] > 0 else None)[0])
 
 
-def find_node_bucket_based_on_metadata_or_dimension(in_dc_config: dict, in_dc_indx_by_metadata: dict = None, in_dc_indx_by_length: dict = None, in_vertex_max_length: float = 0.0):
+def find_node_bucket_based_on_metadata_or_dimension(in_dc_config: dict, in_dc_rules: dict, in_vertex_max_length: float = 0.0):
     """ The function find_node_bucket_based_on_metadata_or_dimension() will evaluate the:
     "metadata information" first, to see if we can pick an index from it.
     If it fails, then it will fall back to: "index based max_length" logic.
     """
 
     """ 
-        1. Loop over all "way_meta" keys (received from "dc_config{}")
-        1.1 sub loop over all 'in_dc_indx_by_metadata' key/values.                
+        1. Loop over all "index_meta" sets of the compiled rules (see compile_texture_rules())
+        1.1 sub loop over their keys, and look up the "way_meta" value (received from "dc_config{}") in the key values set.
         Pick the index based on the highest ranking, while the first key equals to "5" points and any sub key to "1".
     """
-    # v1.2 Added support of level key list
-    # list_of_level_keys = in_dc_config.get('level_keys_list', [])
-    # if not isinstance(list_of_level_keys, list):
-    #     list_of_level_keys = []
-
     picked_index = ""
     highest_grade = 0
 
-    # v1.2 Expand custom ranges "--"
-    for k_dc_indx, v_dc_grade in in_dc_indx_by_metadata.items():
-        for k, v in v_dc_grade.items():
-            in_dc_indx_by_metadata[k_dc_indx][k] = expand_ranges(v)
+    dc_way_meta = in_dc_config.get(K_WAY_META, {})
+    print(f'{dc_way_meta=}')  # debug
 
-    print(f'{in_dc_config.get("way_meta")=}')  # debug
+    for k_dc_indx, first_key, grades in in_dc_rules["index_meta"]:  # loop over uv_config.index_meta grading
+        cumulative_grade = 0
+        for km, values in grades:
+            # check if the "key_value" is in the "values set"
+            if km in dc_way_meta and dc_way_meta[km] in values:
+                grade = 5 if km == first_key else 1
+                cumulative_grade += grade
+                print(f'\tway_key: "{km}" received grade:"{grade}". cumulative_grade: {cumulative_grade!r}')  # debug
 
-    if in_dc_indx_by_metadata is not None:
-        highest_grade = 0
-        for k_dc_indx, v_dc_grade in in_dc_indx_by_metadata.items():  # loop over uv_config.index_meta grading dict
-            # Validate we have dictionary type
-            if not isinstance(v_dc_grade, dict):
-                continue
+        # v1.2 moved the grading test after finishing the attribute evaluation loop.
+        if cumulative_grade > highest_grade:
+            highest_grade = cumulative_grade
+            picked_index = k_dc_indx
 
-            cumulative_grade = 0
-            # loop over the way_id metadata we received.
-            for enum_meta, (km, vm) in enumerate(in_dc_config.get("way_meta", {}).items()):
-                grade = 0
-                # Check if the way_key is present in the v_dc_grade[1] dictionary.
-                if v_dc_grade.get(km, None) is not None:
-                    tab = '\t' if enum_meta > 0 else ''
-                    print(f'{tab}way_key: "{km}" found for index_meta: "{k_dc_indx}"')  # debug
-
-                    # check if the "key_value" is in the "values list"
-                    if vm in v_dc_grade.get(km):  # returns the list
-                        # check if it is the first one:
-                        if km == list(v_dc_grade.keys())[0]:
-                            grade = 5
-                        else:
-                            grade = 1
-
-                        cumulative_grade += grade
-
-                        # debug
-                        print(
-                            f'\tway_key: "{km}" received grade:"{grade}". cumulative_grade: {cumulative_grade!r}')  # Found: "{vm}" in: ({km}:{v_dc_grade.get(km)})')
-
-            # v1.2 moved the grading test after finishing the attribute evaluation loop.
-            if cumulative_grade > highest_grade:
-                highest_grade = cumulative_grade
-                picked_index = k_dc_indx
-
-    if picked_index is not None and picked_index != "":
+    if picked_index != "":
         print(
             f'\nFound index based on metadata information. Index {picked_index!r} with grade of: {highest_grade!r}')
         return picked_index, ""
 
-    # Read uv_xml_config.xml index tag and find the correct bucket our mesh belongs to based on its max wal length.
-    if in_dc_indx_by_length is None:
-        in_dc_indx_by_length = {}
-
-    print ("Did not found texture tile based on osm metadata, fallback to 'wall based length' indexing.")  # v1.2 info
-    picked_index = "1"  # initialize with the first "set"
-    for indx, bucket in in_dc_indx_by_length.items():
-        if in_vertex_max_length <= bucket:
-            return indx, ""
-
-        picked_index = indx
+    # The "index" buckets are sorted by their max wall length, find the first bucket our mesh fits in.
+    print("Did not found texture tile based on osm metadata, fallback to 'wall based length' indexing.")  # v1.2 info
+    ls_lengths = in_dc_rules["bucket_lengths"]
+    if not ls_lengths:
+        return "1", "Could not find matching bucket, returned the last one."
 
-    return picked_index, "Could not find matching bucket, returned the last one."
+    i_bucket = bisect.bisect_left(ls_lengths, in_vertex_max_length)
+    if i_bucket < len(ls_lengths):
+        return in_dc_rules["bucket_sets"][i_bucket], ""
 
+    return in_dc_rules["bucket_sets"][-1], "Could not find matching bucket, returned the last one."
 
-# # END utility functions ####
-# # END utility functions ####
-# # END utility functions ####
 
-########################
-# Manipulate UV MAP
-########################
 def uv_mapping_based_xml(conn, in_obj, in_dc_config, in_mesh_dimension):
     """Read XML Config File "blend_uv_xml_config_file" """
     try:
         me = bpy.context.edit_object.data
         bm = bmesh.from_edit_mesh(me)
 
-        tree = ET.parse(in_dc_config["blend_uv_xml_config_file"])
-        root = tree.getroot()
-        n_index = root.find('index')
-        n_index_meta = root.find('index_meta')  # v1.1
-        n_uv_fix = root.find('uv_rotation_fix')
-        if n_index is None:
-            print("No <index> element was found. Aborting !!")
-            sys.exit(1)
-
-        dc_uv_fix = {}
-        dc_index_node = eval_from_text(n_index.text.strip())
-        dc_index_meta_node = eval_from_text(n_index_meta.text.strip())  # v1.1 The strip() function is important to remove malformed spaces and chars that will fail the evaluation
-
-        if n_uv_fix is None:
-            dc_uv_fix = {}
-        else:
-            dc_uv_fix = eval_from_text(n_uv_fix.text.strip())
+        # "uv_xml_config.xml", compiled once per process
+        dc_rules = G_TEXTURE_RULES
+        dc_uv_fix = dc_rules["uv_rotation_fix"]
 
-        # Force dictionary types
-        if not isinstance(dc_uv_fix, dict):
-            dc_uv_fix = {}
-        if not isinstance(dc_index_node, dict):
-            dc_index_node = {}
-        if not isinstance(dc_index_meta_node, dict):
-            dc_index_meta_node = {}
+        # Compact WaveFront files have one wall span for all levels, and might not have a bottom face
+        dc_wavefront_info = in_dc_config.get(K_WAVEFRONT_INFO, {})
+        levels_in_span = int(dc_wavefront_info.get(K_LEVELS_IN_SPAN, 1))
+        b_has_bottom_face = int(dc_wavefront_info.get(K_BOTTOM_FACE, 1)) == 1
+        b_has_roof = dc_wavefront_info.get(K_ROOF, '0') == '1'
+        # Roof and triangulated caps have several faces, they are recognized by their normal
+        b_multi_face_caps = b_has_roof or dc_wavefront_info.get(K_CAPS_TRIANGULATED, '0') == '1'
+        # Imported faces already have their UVs, we only map the faces we create (roof)
+        b_has_uv = dc_wavefront_info.get(K_UV, '0') == '1' and dc_wavefront_info.get(K_ROOF_ZONE) is not None
 
         # Gather Mesh faces information
-        last_index_before_roof_creation, top_bottom_faces_list, dc_face_info = gather_faces_info_and_top_bottom(bm)
+        last_index_before_roof_creation, top_bottom_faces_list, dc_face_info = gather_faces_info_and_top_bottom(bm, b_has_bottom_face)
         # longest_edge_in_mesh = find_longest_edge(bm)
 
         # Calculate top most face area
@@ -301,33 +227,27 @@ def uv_mapping_based_xml(conn, in_obj, in_dc_config, in_mesh_dimension):
             f"top_bottom_faces_list: {top_bottom_faces_list}, mesh_faces_no: {mesh_faces_no}, top_face_area: {top_face_area}")
         print(f"mesh_max_length: {mesh_max_length}, last_index_before_roof_creation: {last_index_before_roof_creation}")
 
-        # Get the XML Set based on max edge length
-        texture_index, msg = find_node_bucket_based_on_metadata_or_dimension(in_dc_config, dc_index_meta_node, dc_index_node, mesh_max_length)
+        # Get the XML Set based on max edge length, unless osm_to_xplane.py already picked it
+        if in_dc_config.get(K_TEXTURE_INDEX, "") != "":
+            texture_index, msg = in_dc_config[K_TEXTURE_INDEX], ""
+        else:
+            texture_index, msg = find_node_bucket_based_on_metadata_or_dimension(in_dc_config, dc_rules, mesh_max_length)
         if msg != '':
             print(msg)
         else:
             print(f"Got {texture_index=}")
 
         # Get the set and randomly pick one type from each texture for roof and walls
-        n_set = xml_search_tag_with_attrib_value(root, "set", "index", str(texture_index))
-        print(f"n_set: {n_set}")
+        print(f"set: {texture_index}")
 
-        ls_roofs, ls_weights = xml_read_text_and_weights_as_list(n_set, 'roof')
-        rnd_roof = random.choices(ls_roofs, ls_weights)[0]
-        # print (f'Roof:\n{ls_roofs}\n{ls_weights}')
+        # The zones osm_to_xplane.py picked for the building, a random pick for the ones it did not send
+        dc_zones = in_dc_config.get(K_TEXTURE_ZONES) or {}
+        rnd_roof, rnd_wall, rns_wall_door, rnd_wall_win = [
+            list(dc_zones[zone_type]) if zone_type in dc_zones else pick_zone(dc_rules["sets"][str(texture_index)], zone_type)
+            for zone_type in ('roof', 'wall', 'wall_w_door', 'wall_w_win')]
 
-        ls_weights.clear()
-        ls_wall, ls_weights = xml_read_text_and_weights_as_list(n_set, 'wall')
-        rnd_wall = random.choices(ls_wall, ls_weights)[0]
-        # print (f'Wall:\n{ls_wall}\n{ls_weights}')
-
-        ls_wall_door, ls_weights = xml_read_text_and_weights_as_list(n_set, 'wall_w_door')
-        rns_wall_door = random.choices(ls_wall_door, ls_weights)[0]
-        # print (f'WallDoor:\n{ls_wall_door}\n{ls_weights}')
-
-        ls_wall_win, ls_weights = xml_read_text_and_weights_as_list(n_set, 'wall_w_win')
-        rnd_wall_win = random.choices(ls_wall_win, ls_weights)[0]
-        # print (f'WallWin:\n{ls_wall_win}\n{ls_weights}')
+        if b_has_uv:
+            rnd_roof = dc_wavefront_info.get(K_ROOF_ZONE).split(',')
 
         print(f'Random rnd_roof: {rnd_roof}')
         print(f'Random rnd_wall: {rnd_wall}')
@@ -363,6 +283,10 @@ def uv_mapping_based_xml(conn, in_obj, in_dc_config, in_mesh_dimension):
 
                 print(f'{edges_len=}, {real_edges_len=}')  # debug
 
+                if b_has_roof:
+                    print('Roof faces were written in the WaveFront file, skipping roof extrusion.')
+                    break
+
                 if len(face.edges) == 4:
                     # logger.info(f'{datetime.datetime.now()} face: {face}, type: {type(face)}, face.edges: {face.edges}, len: {len(face.edges)}')
                     logger.info('%s Trying roof for 4 edges face. ', datetime.datetime.now())
@@ -388,7 +312,7 @@ def uv_mapping_based_xml(conn, in_obj, in_dc_config, in_mesh_dimension):
                     break
 
         dc_face_info.clear()  # Clear before refresh
-        dummy_last_index_before_roof_creation, dummy_top_bottom_faces_list, dc_face_info = gather_faces_info_and_top_bottom(bm)
+        dummy_last_index_before_roof_creation, dummy_top_bottom_faces_list, dc_face_info = gather_faces_info_and_top_bottom(bm, b_has_bottom_face)
         # we Won't use dummy_last_index_before_roof_creation
 
         print('\tafter roof.')
@@ -430,13 +354,13 @@ def uv_mapping_based_xml(conn, in_obj, in_dc_config, in_mesh_dimension):
             # Pick uv texture zone
             s_zone_type = ""
             rnd_zone = []
-            if face.index in top_bottom_faces_list or face.index > last_index_before_roof_creation:
+            if face.index in top_bottom_faces_list or face.index > last_index_before_roof_creation or (b_multi_face_caps and abs(face.normal.z) > 0.1):
                 rnd_zone = copy.deepcopy(rnd_roof)
                 s_zone_type = "roof"
                 print(f'\tRoof face: {face.index}, face_info: {face_info}')
 
                 # Handle top faces that have more than 4 edges
-                if face.index == top_face_index:  # top_bottom_faces_list[0]
+                if face.index == top_face_index and not b_has_roof:  # top_bottom_faces_list[0]
                     top_face_info = dc_face_info[face.index]
                     top_face_info.face = face
 
@@ -453,7 +377,9 @@ def uv_mapping_based_xml(conn, in_obj, in_dc_config, in_mesh_dimension):
                             # print (f'\t Corner.co:{corner.vert.co} uv.co: {corner[uv_layer].uv} uv type: {uv_vert}') # vert is BMVert, the vertices holds the 3D View port coordinates.
 
                         print(f'uv_layer: {uv_layer}, len(mesh.polygons): {len(mesh.polygons)}')
-                        if uv_layer is not None:  # uv_layer:
+                        if uv_layer is not None and b_has_uv:
+                            print('Top face already has its UVs.')
+                        elif uv_layer is not None:  # uv_layer:
                             bpy.ops.object.mode_set(mode='EDIT')
                             bpy.ops.mesh.select_all(action='DESELECT')
                             mesh.polygons[top_face.index].select = True
@@ -495,9 +421,22 @@ def uv_mapping_based_xml(conn, in_obj, in_dc_config, in_mesh_dimension):
 
                             continue  # Do not continue with unwrapping the face for top face with more than 4 edges
 
+                        if b_has_uv:
+                            if in_dc_config.get("add_bevel", False):
+                                bpy.ops.mesh.select_all(action='DESELECT')
+                                top_face.select = True
+                                bpy.ops.mesh.bevel(offset_type='OFFSET', offset=0.4, affect='EDGES', offset_pct=0,
+                                                   segments=3, miter_outer='PATCH')
+                                bmesh.update_edit_mesh(me)
+                                print('After Beveling roof')
+                            continue
+
                         # No uv_layer found
                         print("No uv_layer found for Top Face ???")
 
+            elif b_has_uv and face.index <= last_index_before_roof_creation:
+                continue  # Wall UVs were written in the WaveFront file
+
             else:
 
                 if b_used_uv_door is False and face_info.max_edge_length <= 12.0:
@@ -515,6 +454,9 @@ def uv_mapping_based_xml(conn, in_obj, in_dc_config, in_mesh_dimension):
                     i_wall_counter += 1
                     s_zone_type = "wall"
 
+            if b_has_uv and face.index <= last_index_before_roof_creation:
+                continue  # Top and bottom faces UVs were written in the WaveFront file
+
             # print (f'\tPicked zone: {s_zone_type}, rnd_zone: {rnd_zone!r}') ## debug
             tmp_zone = []
             for s in rnd_zone:
@@ -563,6 +505,10 @@ def uv_mapping_based_xml(conn, in_obj, in_dc_config, in_mesh_dimension):
                 # top face edge
                 indx += 1
                 y = rnd_zone[1] + rnd_zone[3]
+                # A compact wall spans several levels. We can only repeat a zone that covers the full texture height,
+                # otherwise we would sample the neighbouring zones, so other zones are stretched over the wall.
+                if s_zone_type.startswith("wall") and levels_in_span > 1 and rnd_zone[1] == 0.0 and rnd_zone[3] >= 1.0:
+                    y = rnd_zone[1] + rnd_zone[3] * levels_in_span
                 uv_list_verts[indx].uv = Vector((x, y))
 
                 for i in range(1, int(half_uv_count)):  # elevation
@@ -600,8 +546,9 @@ def uv_mapping_based_xml(conn, in_obj, in_dc_config, in_mesh_dimension):
         sys.exit(1)
 
 
-def gather_faces_info_and_top_bottom(bm):
-    """Gather faces info into dictionary of FaceInfo class """
+def gather_faces_info_and_top_bottom(bm, in_b_has_bottom_face=True):
+    """Gather faces info into dictionary of FaceInfo class.
+    If the mesh has no bottom face, the bottom index is returned as -1. """
 
     # me = bpy.context.edit_object.data
     # bm = bmesh.from_edit_mesh(me)
@@ -651,6 +598,9 @@ def gather_faces_info_and_top_bottom(bm):
             highest_z_sum = sum_z
             highest_z_indx = indx
 
+    if not in_b_has_bottom_face:
+        lowest_z_indx = -1  # the lowest face is a wall, not a bottom face
+
     print(
         f'\n\nThe bottom face idx: {lowest_z_indx} ({lowest_z_sum})\nThe top face idx: {highest_z_indx} ({highest_z_sum})\n')
     return highest_face_index_before_roof, [highest_z_indx, lowest_z_indx], dc_face_info
@@ -680,6 +630,123 @@ def import_wavefront(file_path):
         bpy.ops.import_scene.obj(filepath=file_path)
 
 
+def import_binary_mesh(file_path) -> dict:
+    """Build the meshes of a binary mesh container ("{}_osm.mesh" or "_batch.mesh") with bulk foreach_set() calls,
+    instead of parsing a WaveFront file. Every record becomes a "way_{way_id}" object in the "Collection" collection.
+    Returns <object name, dict> like read_batch_index(): way_id, building file name, position and header info."""
+    dc_index = {}
+    with open(file_path, 'rb') as in_file:
+        data = in_file.read()
+
+    magic, version, records = struct.unpack_from('<4sII', data, 0)
+    if magic != BINARY_MESH_MAGIC or version != BINARY_MESH_VERSION:
+        raise Error(f'Not a binary mesh file, or an unsupported version: {file_path}')
+
+    offset = struct.calcsize('<4sII')
+    for _ in range(records):
+        meta_length, vertex_count, face_count, loop_count, has_uv = struct.unpack_from('<5I', data, offset)
+        offset += struct.calcsize('<5I')
+        dc_meta = json.loads(data[offset:offset + meta_length].decode('utf8'))
+        offset += meta_length
+
+        ls_buffers = []
+        for type_code, count in (('f', vertex_count * 3), ('i', face_count), ('i', loop_count), ('f', loop_count * 2 if has_uv else 0)):
+            buffer = array.array(type_code)
+            buffer.frombytes(data[offset:offset + count * buffer.itemsize])
+            if sys.byteorder == 'big':
+                buffer.byteswap()
+            offset += count * buffer.itemsize
+            ls_buffers.append(buffer)
+        coords, face_sizes, loops, uvs = ls_buffers
+
+        loop_starts = array.array('i', [0] * face_count)
+        for indx in range(1, face_count):
+            loop_starts[indx] = loop_starts[indx - 1] + face_sizes[indx - 1]
+
+        mesh = bpy.data.meshes.new(dc_meta["object"])
+        mesh.vertices.add(vertex_count)
+        mesh.vertices.foreach_set('co', coords)
+        mesh.loops.add(loop_count)
+        mesh.loops.foreach_set('vertex_index', loops)
+        mesh.polygons.add(face_count)
+        mesh.polygons.foreach_set('loop_start', loop_starts)
+        if bpy.app.version < (4, 0, 0):
+            mesh.polygons.foreach_set('loop_total', face_sizes)  # read only since 4.0, derived from "loop_start"
+        if has_uv:
+            mesh.uv_layers.new(name='UVMap').data.foreach_set('uv', uvs)
+        mesh.update(calc_edges=True)
+        mesh.validate()
+
+        local_obj = bpy.data.objects.new(dc_meta["object"], mesh)
+        bpy.data.collections["Collection"].objects.link(local_obj)
+        dc_index[local_obj.name] = dc_meta
+
+    print(f'Built {len(dc_index)} meshes from: {file_path}')
+    return dc_index
+
+
+def shared_header_info(in_dc_batch_index: dict) -> dict:
+    """The "# key value" header info with the same value in all the objects of a binary mesh container."""
+    ls_headers = [entry["header"] for entry in in_dc_batch_index.values()]
+    if not ls_headers:
+        return {}
+
+    return {key: value for key, value in ls_headers[0].items() if all(header.get(key) == value for header in ls_headers)}
+
+
+def read_wavefront_header_info(file_path) -> dict:
+    """Read the "# key value" comment lines at the top of the "{}_osm.obj" file, until the first non comment line."""
+    dc_info = {}
+    try:
+        with open(file_path, 'r', encoding='utf8') as wavefront_file:
+            for line in wavefront_file:
+                line = line.strip()
+                if line == '':
+                    continue
+                if not line.startswith('#'):
+                    break
+
+                ls_tokens = line[1:].split()
+                if len(ls_tokens) == 2:
+                    dc_info[ls_tokens[0]] = ls_tokens[1]
+    except OSError as os_err:
+        print(f'Failed to read header of: {file_path}\n{os_err}')
+
+    return dc_info
+
+
+def read_batch_index(file_path) -> dict:
+    """Read the sidecar index of a multi-object WaveFront file: "{batch}.idx", one json per line.
+    Returns <object name, dict> with the way_id, the building "{}_osm.obj" file name and its "# key value" header info."""
+    dc_index = {}
+    index_file = f'{remove_file_extension(file_path)}.idx'
+    try:
+        with open(index_file, 'r', encoding='utf8') as in_file:
+            for line in in_file:
+                if line.strip() != '':
+                    entry = json.loads(line)
+                    dc_index[entry["object"]] = entry
+    except OSError as os_err:
+        print(f'Failed to read batch index: {index_file}\n{os_err}')
+
+    return dc_index
+
+
+def move_batch_objects_to_collections(in_dc_batch_index: dict):
+    """Move every building object into its own collection, named after its "{}_osm.obj" file,
+    so the OBJ8 exporter writes one file per building (see set_xplane_addon())."""
+    scene_collection = bpy.data.collections["Collection"]
+    for local_obj in list(scene_collection.objects):
+        entry = in_dc_batch_index.get(local_obj.name)
+        if local_obj.type != 'MESH' or entry is None:
+            continue
+
+        collection = bpy.data.collections.new(os.path.basename(remove_file_extension(entry["file"])))
+        bpy.context.scene.collection.children.link(collection)
+        collection.objects.link(local_obj)
+        scene_collection.objects.unlink(local_obj)
+
+
 def flip_normals():
     """Flip All Objects Normals Outside """  # Use this as a tooltip for menu items and buttons.
 
@@ -705,6 +772,20 @@ def flip_normals():
             print(f"Finish Flipping MESH: {local_obj.name}")
 
 
+def apply_object_transforms():
+    """Apply location, rotation and scale of all mesh objects, without touching the normals.
+    Used instead of flip_normals() when the WaveFront faces are already facing outward."""
+
+    for local_obj in bpy.context.scene.objects:
+        if local_obj.type == 'MESH':
+            bpy.context.view_layer.update()
+            bpy.ops.object.select_all(action='DESELECT')
+            local_obj.select_set(True)
+            bpy.context.view_layer.objects.active = local_obj
+            bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
+            print(f"Applied transforms to MESH: {local_obj.name}")
+
+
 def export_as_obj(file_path):
     """Export the mesh as WaveFront obj file."""
 
@@ -732,115 +813,105 @@ def export_as_obj(file_path):
     print('Finish Exporting all MESH Objects.')
 
 
-def set_material_to_object(in_dc_config):
-    """Set the mesh material. Will use the texture information from config.json file"""
-
-    # Loop over all mesh objects
-    for local_obj in bpy.data.objects:
-        # logger.info(f'{datetime.datetime.now()} 1. obj: {obj}')
-        if local_obj.type == "MESH":
-            # logger.info(f'{datetime.datetime.now()} 2. Found MESH')
-
-            # Create a new material
-            material_name = "texture"
-            material = bpy.data.materials.new(name=material_name)
+def shared_texture_material(in_dc_config):
+    """ Return the material of the texture configuration in "in_dc_config", created once per Blender session with its
+    Principled node setup, image and X-Plane "GLOBAL_specular" attribute. It is kept by a fake user, so
+    reset_blender_scene() does not remove it between the jobs of a "blender_service". """
+    # determine path based on config.json
+    image_name = os.path.basename(in_dc_config["blend_base_texture_name"])
+    image_base_folder = os.path.dirname(in_dc_config["blend_base_texture_name"])
 
-            # Assign the material to the object
-            if local_obj.data.materials:
-                local_obj.data.materials[0] = material
-            else:
-                local_obj.data.materials.append(material)
-
-            # Set the base color as "Image Texture"
-            # logger.info(f'{datetime.datetime.now()} 3.0 Set Base Color')
-            material.use_nodes = True
-            nodes = material.node_tree.nodes
-            node = nodes.get("Principled BSDF")
-            if node:
-                print(f'4.0 Setting Node, current folder is: {os.getcwd()}')  # debug
-                # Debug - use only when there is an error related to node.inputs[]
-                # for nodeObj in node.inputs:  # Debug - important to understand the differences between blender versions.
-                #     print(f'Obj: {nodeObj}')
-                # print('4.01 After Loop Inputs')
-                # End debug nodes
-
-                node.inputs["Base Color"].default_value = (1, 1, 1, 1)  # White color
-
-                # Specular: bpy.data.materials["texture"].node_tree.nodes["Principled BSDF"].inputs[7].default_value = 0.07
-                if in_dc_config.get(CONFIG_BLENDER_VERSION, 3) == 3:
-                    node.inputs["Specular"].default_value = 0.07  # v3.x: "Specular", v4.x: "Specular IOR Level"
-                else:
-                    node.inputs["Specular IOR Level"].default_value = 0.07  # v3.x: "Specular", v4.x: "Specular IOR Level"
-
-                # print('4.01 After Specular settings.')  # debug
+    if Path(in_dc_config["blend_base_texture_name"]).is_absolute():
+        image_filepath = in_dc_config["blend_base_texture_name"]
+    else:
+        image_filepath = os.path.join(in_dc_config.get("work_folder", os.getcwd()), image_base_folder,
+                                      image_name)
+
+    texture_key = (image_filepath, in_dc_config.get("blend_load_texture") is True, in_dc_config.get(CONFIG_BLENDER_VERSION, 3))
+    material = bpy.data.materials.get(G_SHARED_MATERIALS.get(texture_key, ""))
+    if material is not None:
+        return material
+
+    # Create a new material
+    material = bpy.data.materials.new(name="texture")
+    material.use_fake_user = True
+
+    # Set the base color as "Image Texture"
+    # logger.info(f'{datetime.datetime.now()} 3.0 Set Base Color')
+    material.use_nodes = True
+    nodes = material.node_tree.nodes
+    node = nodes.get("Principled BSDF")
+    if not node:
+        print(f"Error: Principled BSDF node not found in material nodes of {material.name!r}.")
+        return material
+
+    print(f'4.0 Setting Node, current folder is: {os.getcwd()}')  # debug
+    # Debug - use only when there is an error related to node.inputs[]
+    # for nodeObj in node.inputs:  # Debug - important to understand the differences between blender versions.
+    #     print(f'Obj: {nodeObj}')
+    # print('4.01 After Loop Inputs')
+    # End debug nodes
+
+    node.inputs["Base Color"].default_value = (1, 1, 1, 1)  # White color
+
+    # Specular: bpy.data.materials["texture"].node_tree.nodes["Principled BSDF"].inputs[7].default_value = 0.07
+    if in_dc_config.get(CONFIG_BLENDER_VERSION, 3) == 3:
+        node.inputs["Specular"].default_value = 0.07  # v3.x: "Specular", v4.x: "Specular IOR Level"
+    else:
+        node.inputs["Specular IOR Level"].default_value = 0.07  # v3.x: "Specular", v4.x: "Specular IOR Level"
 
-                # print('4.01 Setting x-plane GLOBAL_specular') ## GLOBAL_specular replaces ATTR_shiny_rat
-                bpy.ops.object.add_xplane_material_attribute()
-                # logger.info(f'{datetime.datetime.now()} 4.02 material: {material}')
+    # print('4.01 Setting x-plane GLOBAL_specular') ## GLOBAL_specular replaces ATTR_shiny_rat
+    # Same as bpy.ops.object.add_xplane_material_attribute(), without depending on the active object
+    custom_attribute = material.xplane.customAttributes.add()
+    custom_attribute.name = "GLOBAL_specular"
+    custom_attribute.value = "0.07"
 
-                # bpy.data.materials["texture"].xplane.customAttributes[0]
-                material.xplane.customAttributes[0].name = "GLOBAL_specular"
-                material.xplane.customAttributes[0].value = "0.07"
+    logger.info(f'{datetime.datetime.now()} 4.03 custom attrib name: {custom_attribute.name!r}')
 
-                logger.info(f'{datetime.datetime.now()} 4.03 custom attrib name: {material.xplane.customAttributes[0].name!r}')
+    ###########################
+    # Add an Image Texture node
+    image_texture_node = nodes.new(type="ShaderNodeTexImage")
+    image_texture_node.location = (node.location.x, node.location.y)
 
-                ###########################
-                # Add an Image Texture node
-                image_texture_node = nodes.new(type="ShaderNodeTexImage")
-                image_texture_node.location = (node.location.x, node.location.y)
+    if in_dc_config.get("blend_load_texture") is True:
+        image = bpy.data.images.load(filepath=image_filepath, check_existing=True)  # Load the texture, once
+        print(f"4.1 Loaded Texture: {image_filepath}.")
+        logger.info(f'{datetime.datetime.now()} 4.3 Image info: %s.', image)
+    else:
+        logger.info(f'{datetime.datetime.now()} 4.1 Setting Texture: %s, not loading.', image_name)
+        image = bpy.data.images.new(name=image_name, width=1024, height=1024)  # Set the texture name without loading
+    image.use_fake_user = True
+    image_texture_node.image = image
 
-                # determine path based on config.json
-                image_name = os.path.basename(in_dc_config["blend_base_texture_name"])
-                image_base_folder = os.path.dirname(in_dc_config["blend_base_texture_name"])
+    # Connect the nodes
+    material.node_tree.links.new(image_texture_node.outputs["Color"], node.inputs["Base Color"])
 
-                if Path(in_dc_config["blend_base_texture_name"]).is_absolute():
-                    image_filepath = in_dc_config["blend_base_texture_name"]
-                else:
-                    image_filepath = os.path.join(in_dc_config.get("work_folder", os.getcwd()), image_base_folder,
-                                                  image_name)
+    G_SHARED_MATERIALS[texture_key] = material.name
+    print(f"Material {material.name!r} created for texture {image_filepath!r}.")
+    return material
 
-                if in_dc_config.get("blend_load_texture") is True:
-                    image_texture_node.image = bpy.data.images.load(filepath=image_filepath)  # Load the texture
-                    print(f"4.1 Loaded Texture: {image_filepath}.")
 
-                    image = bpy.data.images.get(image_name)
-                    if not image:
-                        logger.info(f'{datetime.datetime.now()} 4.2 Trying to re-load uv_image: %s.', image_name)
-                        bpy.ops.image.open(filepath=image_filepath)
-                        image = bpy.data.images.get(image_name)
+def set_material_to_object(in_dc_config):
+    """Set the mesh material. Will use the texture information from config.json file"""
 
-                    logger.info(f'{datetime.datetime.now()} 4.3 Image info: %s.', image)
-                    logger.info(f'{datetime.datetime.now()} 4.4 Workspace: %s.',
-                                bpy.context.window_manager.windows[0].workspace)
+    material = shared_texture_material(in_dc_config)
 
-                else:
-                    logger.info(f'{datetime.datetime.now()} 4.1 Setting Texture: %s, not loading.', image_name)
-                    image_texture_node.image = bpy.data.images.new(name=image_name, width=1024,
-                                                                   height=1024)  # Set the texture name without loading
-
-                # # Set uv image area
-                # for area in bpy.context.screen.areas:
-                #     logger.info(f'{datetime.datetime.now()} Area Type: { area.type }\t{area}.')
-                #     if area.type in ['IMAGE_EDITOR', 'VIEW_3D']:
-                #         area.type = 'IMAGE_EDITOR'
-                #         area.ui_type = 'UV'  # bpy.context.area.ui_type = 'UV'   # https://blender.stackexchange.com/questions/159358/setting-the-context-window-screen-layout-explicitly-in-bpy
-                #         area.spaces.active.image = image
-                #         logger.info(f'{datetime.datetime.now()} {area.type}: Setting area.spaces.active.image to: {area.spaces.active.image}.')
-                #         area.type = 'VIEW_3D'
-                #         logger.info(f'{datetime.datetime.now()} Set area type back to: {area.type}.')
-
-                # Connect the nodes
-                material.node_tree.links.new(image_texture_node.outputs["Color"], node.inputs["Base Color"])
-
-                print(f"Material {material_name!r} created for object {local_obj.name!r}.")
+    # Loop over all mesh objects
+    for local_obj in bpy.data.objects:
+        if local_obj.type == "MESH":
+            # Assign the material to the object
+            if local_obj.data.materials:
+                local_obj.data.materials[0] = material
             else:
-                print(f"Error: Principled BSDF node not found in material nodes for object {local_obj.name!r}.")
+                local_obj.data.materials.append(material)
         else:
             print(f"kipping non-mesh object {local_obj.name!r}.")
 
 
-def set_xplane_addon(conn, in_wavefront_file: str = "", in_dict: dict = None):
-    """ Set the properties of io_xplane2blender add-on before exporting the mesh to OBJ8 format. """
+def set_xplane_addon(conn, in_wavefront_file: str = "", in_dict: dict = None, in_collection_name: str = "Collection",
+                     in_relative_folder: str = ""):
+    """ Set the properties of io_xplane2blender add-on before exporting the mesh to OBJ8 format.
+    "in_relative_folder" is the folder of the OBJ8 file relative to the exported file, for batches in a sharded work folder. """
 
     if in_dict is None:
         in_dict = {}
@@ -853,14 +924,14 @@ def set_xplane_addon(conn, in_wavefront_file: str = "", in_dict: dict = None):
         if "io_xplane2blender" in (mod_name.lower()):
             print(f'FOUND mod: {mod_name}. Will set collection')
 
-            bpy.data.collections["Collection"].xplane.is_exportable_collection = True
+            bpy.data.collections[in_collection_name].xplane.is_exportable_collection = True
             # we define "layer_name" "lit" and "normal" in prepare_texture_names() function
-            bpy.data.collections["Collection"].xplane.layer.name = f'{layer_name}_obj8'
-            bpy.data.collections["Collection"].xplane.layer.export_type = 'instanced_scenery' # scenery|aircraft|cockpit'
-            print(f'xplane.layer.export_type: {bpy.data.collections["Collection"].xplane.layer.export_type}')  # debug
-            bpy.data.collections["Collection"].xplane.layer.texture = in_dict["blend_base_texture_name"]
-            bpy.data.collections["Collection"].xplane.layer.texture_lit = in_dict["texture_lit"]
-            bpy.data.collections["Collection"].xplane.layer.texture_normal = in_dict["texture_normal"]
+            bpy.data.collections[in_collection_name].xplane.layer.name = '/'.join(part for part in (in_relative_folder, f'{layer_name}_obj8') if part)
+            bpy.data.collections[in_collection_name].xplane.layer.export_type = 'instanced_scenery' # scenery|aircraft|cockpit'
+            print(f'xplane.layer.export_type: {bpy.data.collections[in_collection_name].xplane.layer.export_type}')  # debug
+            bpy.data.collections[in_collection_name].xplane.layer.texture = in_dict["blend_base_texture_name"]
+            bpy.data.collections[in_collection_name].xplane.layer.texture_lit = in_dict["texture_lit"]
+            bpy.data.collections[in_collection_name].xplane.layer.texture_normal = in_dict["texture_normal"]
 
             bpy.data.scenes["Scene"].xplane.debug = True
             bpy.data.scenes["Scene"].xplane.log = True
@@ -896,6 +967,8 @@ def remove_file_extension(file_name):
     """Remove the file string extension. Used when we want to append other string to the file name """
     if file_name.lower().endswith(".obj"):
         return file_name[:-4]  # Remove the last 4 characters (".obj")
+    if file_name.lower().endswith(".mesh"):
+        return file_name[:-5]
 
     return file_name
 
@@ -1043,8 +1116,266 @@ CONFIG_BLEND_SAVE_PROJECT = "blend_save_project"
 CONFIG_BLEND_EXPORT_VN_FILE = "blend_export_vn_file"
 CONFIG_BLEND_EXPORT_XPLANE_OBJ8 = "blend_export_xplane_obj8"
 CONFIG_BLEND_EXPORT_XPLANE_OUTPUT_FOLDER = "blend_export_xplane_output_folder"
+CONFIG_BLEND_SKIP_NORMALS_PASS = "blend_skip_normals_pass"
 CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME = "osm_to_obj_blend_log"  # holds the blender output log file name and path
 CONN = None
+G_TEXTURE_RULES = None  # compile_texture_rules() of the run config, once per process
+G_SHARED_MATERIALS = {}  # (image file, load texture, blender version) => name of its material, see shared_texture_material()
+BLENDER_SERVICE_ARG = "--service"  # first argument after "--": "blender_service" mode, the jobs are read from stdin
+BLENDER_SERVICE_DONE = "OSM_TO_XPLANE_JOB_DONE"  # prefix of the answer line of a job, see run_blender_service()
+
+
+def apply_job_entry(dc_config: dict, in_dc_job_entries: dict, in_way_id):
+    """ Set the way_id, way metadata and texture set of the building Blender works on, from its job manifest entry. """
+    dc_entry = in_dc_job_entries.get(str(in_way_id), {})
+    dc_config[K_WAY_ID] = in_way_id
+    dc_config[K_WAY_META] = dc_entry.get(K_WAY_META, {})
+    dc_config[K_TEXTURE_INDEX] = dc_entry.get(K_TEXTURE_INDEX, "")
+    dc_config[K_TEXTURE_ZONES] = dc_entry.get(K_TEXTURE_ZONES, {})
+
+
+def process_building_file(dc_config: dict, env: str, in_dc_job_entries: dict):
+    """ Import one "{}_osm.obj" WaveFront file, "{}_osm.mesh" binary mesh or batch file, shape it and export its OBJ8 file(s).
+    "in_dc_job_entries": <way_id, job manifest entry> of the buildings in the file. """
+    # wavefront_file: str = ""
+    if env.endswith(".mesh"):
+        print(f'Working on: {env}')
+        # Binary meshes are handled like a batch, every record has its own header info
+        dc_batch_index = import_binary_mesh(env)
+        dc_batch_info = shared_header_info(dc_batch_index)
+        dc_config[K_WAVEFRONT_INFO] = dc_batch_info
+    elif env.endswith(".obj"):
+        print(f'Working on: {env}')
+        # wavefront_file = env
+        import_wavefront(env)
+        print(f'File Imported: {env}')
+        dc_config[K_WAVEFRONT_INFO] = read_wavefront_header_info(env)
+        dc_batch_info = dc_config[K_WAVEFRONT_INFO]
+        # Multi-object file: the header only has the keys shared by all its buildings
+        dc_batch_index = read_batch_index(env) if dc_batch_info.get(K_BATCH, '0') == '1' else {}
+    else:
+        return
+
+    if not dc_batch_index:
+        apply_job_entry(dc_config, in_dc_job_entries, next(iter(in_dc_job_entries), ""))
+
+    # Files written with a consistent winding order do not need the normals pass
+    if dc_config.get(CONFIG_BLEND_SKIP_NORMALS_PASS, False) and dc_config[K_WAVEFRONT_INFO].get(K_WINDING) == 'ccw':
+        print('Skipping normals pass, faces are already facing outward.')
+        apply_object_transforms()
+    else:
+        flip_normals()  # This screws the UV Mapping after we manually project them
+
+    set_material_to_object(dc_config)
+    osm_obj_file_name = remove_file_extension(env)
+    if dc_batch_index:
+        move_batch_objects_to_collections(dc_batch_index)
+        for batch_entry in dc_batch_index.values():
+            apply_job_entry(dc_config, in_dc_job_entries, batch_entry[K_WAY_ID])
+            # The buildings of a batch can be in other folders ("work_folder_sharded"), the OBJ8 file goes next to its building file
+            relative_folder = os.path.relpath(os.path.dirname(batch_entry["file"]), os.path.dirname(env))
+            set_xplane_addon(CONN, remove_file_extension(batch_entry["file"]), dc_config,
+                             os.path.basename(remove_file_extension(batch_entry["file"])),
+                             '' if relative_folder == '.' else Path(relative_folder).as_posix())
+    else:
+        set_xplane_addon(CONN, osm_obj_file_name, dc_config)
+    # Export WaveFront
+    if dc_config.get(CONFIG_BLEND_EXPORT_VN_FILE, False) is True:
+        export_as_obj(osm_obj_file_name)
+
+    # Unwrapping would override the texture coordinates written in the WaveFront file
+    if dc_config[K_WAVEFRONT_INFO].get(K_UV, '0') == '1':
+        print('Skipping unwrap, using the WaveFront texture coordinates.')
+    else:
+        unwrap_objects()  # basic unwrap to all meshes
+
+    # logger.info(f'{datetime.datetime.now()} Calling external python script.')
+    # call_external_script("blender/uv_manip.py") # deprecate, integrated in current script
+
+    ###########################
+    # UV Manipulation
+    # Roof and bevel Creation
+    ###########################
+    for obj in bpy.context.scene.objects:
+        if obj.type == 'MESH':
+            print(f'MESH Object: {obj.name}')
+
+            if obj.name in dc_batch_index:
+                apply_job_entry(dc_config, in_dc_job_entries, dc_batch_index[obj.name][K_WAY_ID])
+                dc_config[K_WAVEFRONT_INFO] = {**dc_batch_info, **dc_batch_index[obj.name]["header"]}
+
+            bpy.context.view_layer.update()
+
+            bpy.ops.object.mode_set(mode='OBJECT')
+            mesh_dimension = obj.dimensions
+            print(f"Mesh dimensions: {mesh_dimension}")
+            # bpy.ops.object.mode_set(mode='EDIT')
+
+            if bpy.context.object.mode == 'EDIT':
+                print("Marking current object as active.")
+                bpy.ops.object.mode_set(mode='OBJECT')
+                bpy.ops.object.select_all(action='DESELECT')
+
+            obj.select_set(True)
+
+            # Set Active object in layer focus to the obj
+            bpy.context.view_layer.objects.active = obj
+
+            # Enter EDIT mode
+            bpy.ops.object.mode_set(mode='EDIT')
+
+            print(f"Object mode: {bpy.context.object.mode}")
+
+            if bpy.context.object.mode == 'EDIT':
+                logger.info('%s RUNNING UV Manipulation', datetime.datetime.now())
+
+                uv_mapping_based_xml(CONN, obj, dc_config, mesh_dimension)
+
+            bpy.ops.object.editmode_toggle()
+            bpy.ops.object.mode_set(mode='OBJECT')
+            bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
+
+    if dc_config.get(CONFIG_BLEND_SAVE_PROJECT) is not False:
+        save_as_blend_project(osm_obj_file_name)
+
+    if dc_config.get(CONFIG_BLEND_EXPORT_XPLANE_OBJ8) is not False:
+
+        # Export X-Plane OBJ8 format
+        bpy.ops.scene.export_to_relative_dir()
+
+        # sqlite flow code, "use_sqlite_flow=true"
+        if dc_config.get(CONFIG_USE_SQLITE_FLOW, False):
+            NEW_SEQ = 1
+            WAY_ID = int(dc_config.get(K_WAY_ID, -1))
+
+            # fetch max sequence number
+            if WAY_ID >= 0:
+                STMT = 'select ifnull( max(seq),0) as max_seq from obj8_data'
+                ROWS = exec_query_stmt(CONN, STMT, [], False)
+                # print (f'{rows}')
+                if ROWS:
+                    NEW_SEQ = int(ROWS['max_seq']) + 1
+
+                # print (f'New Sequence: {new_seq}.') # debug
+
+                # fetch same mesh characteristics
+                STMT = """select a.file_name_obj8, b.seq, b.way_id
+                        from obj8_data a, obj8_data b
+                        where a.way_id != b.way_id
+                        and a.edges = b.edges
+                        and a.edges_length = b.edges_length
+                        and a.way_id = ?
+                        and b.seq is not null
+                       """
+
+                BINDS = [WAY_ID]
+                ROWS = exec_query_stmt(CONN, STMT, BINDS, False)  # fetch only 1 row if exists
+                print(f"{ROWS}")
+                if ROWS is None:
+                    print(f'Did not Found similar mesh for {WAY_ID = }, will get {NEW_SEQ = }.')
+                    BINDS.clear()
+                    STMT = f"update {G_OBJ8_DATA_TABLE} set seq = ? where {K_WAY_ID} = ?"
+                    BINDS = [NEW_SEQ, WAY_ID]
+                    CONN.execute("BEGIN TRANSACTION;")
+                    exec_stmt(CONN, STMT, BINDS)
+                    CONN.execute("END TRANSACTION;")
+                else:
+                    print(f'Found similar mesh for {WAY_ID = }, {ROWS["seq"] = }')
+                    BINDS.clear()
+                    STMT = f'update {G_OBJ8_DATA_TABLE} set similar_to_way_id = ? where {K_WAY_ID} = ?'
+                    BINDS = [int(ROWS[K_WAY_ID]), WAY_ID]
+                    CONN.execute("BEGIN TRANSACTION;")
+                    exec_stmt(CONN, STMT, BINDS)
+                    CONN.execute("END TRANSACTION;")
+
+
+def read_run_config(in_config_file: str) -> dict:
+    """ The run config, written once by osm_to_xplane.py (see write_blender_run_config()), with the Blender version and texture names.
+    The compiled texture rules are kept aside in G_TEXTURE_RULES, so the jobs do not copy them. """
+    global G_TEXTURE_RULES
+
+    with open(in_config_file, mode='r', encoding='utf8') as config_in:
+        dc_config = json.load(config_in)
+    G_TEXTURE_RULES = compile_texture_rules(dc_config.pop(K_TEXTURE_RULES))
+
+    dc_config[CONFIG_BLENDER_VERSION] = int(bpy.app.version[0])
+    # Prepare the texture file names for the material and OBJ8 addon (io_blender2xplane)
+    prepare_texture_names(dc_config)
+    return dc_config
+
+
+def process_job_manifest(dc_config: dict, in_manifest_file: str):
+    """ A job manifest has one json line per building: {"mesh": the file to import, "way_id", "file", "way_meta", "texture_index"}.
+    The buildings of a batch share their "mesh" file, which is imported once. """
+    dc_meshes = {}  # mesh file => <way_id, entry>
+    with open(in_manifest_file, mode='r', encoding='utf8') as manifest_in:
+        for line in manifest_in:
+            if line.strip() != "":
+                dc_entry = json.loads(line)
+                dc_meshes.setdefault(dc_entry[K_MESH], {})[str(dc_entry[K_WAY_ID])] = dc_entry
+
+    for mesh_file, dc_job_entries in dc_meshes.items():
+        process_building_file(dc_config, mesh_file, dc_job_entries)
+
+
+def reset_blender_scene():
+    """ "blender_service": remove the objects of the previous job, its batch collections, and the data blocks
+    nobody uses anymore (meshes, materials, textures, images), so a long lived Blender does not grow from job to job.
+    The shared texture materials and their images have a fake user and stay for the next jobs. """
+    if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    for local_obj in list(bpy.data.objects):
+        bpy.data.objects.remove(local_obj, do_unlink=True)
+    for collection in list(bpy.data.collections):
+        if collection.name != "Collection":
+            bpy.data.collections.remove(collection)
+
+    # Meshes first: their materials lose their last user, and then the textures and images of the materials
+    for data_blocks in (bpy.data.meshes, bpy.data.materials, bpy.data.textures, bpy.data.images):
+        for data_block in list(data_blocks):
+            if data_block.users == 0:
+                data_blocks.remove(data_block)
+
+
+def run_blender_service():
+    """ "blender_service": read the jobs from stdin, one json line each: {"config": the run config file, "manifest": the job
+    manifest file}, the same files as on the command line. Every job is answered with one "{BLENDER_SERVICE_DONE} {json}"
+    line on stdout, {"file": the manifest, "ok": true|false, "error": ...}. Blender exits when stdin is closed. """
+    global CONN
+
+    db_file = None
+    dc_run_configs = {}  # run config file => config, read once
+    for job_line in sys.stdin:
+        if job_line.strip() == "":
+            continue
+
+        dc_result = {"file": None, "ok": True, "error": ""}
+        try:
+            dc_job = json.loads(job_line)
+            dc_result["file"] = dc_job["manifest"]
+            if dc_job["config"] not in dc_run_configs:
+                dc_run_configs[dc_job["config"]] = read_run_config(dc_job["config"])
+            dc_config = copy.deepcopy(dc_run_configs[dc_job["config"]])
+            logging.basicConfig(filename=dc_config.get(CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME), level=logging.INFO, filemode='a')
+
+            # One connection for all the jobs of a run
+            if CONN is None or db_file != dc_config["db_file"]:
+                if CONN:
+                    CONN.close()
+                db_file = dc_config["db_file"]
+                CONN = sqlite3.connect(db_file)
+
+            process_job_manifest(dc_config, dc_job["manifest"])
+        except Exception as job_err:
+            logger.info('%s Error:\n%s', datetime.datetime.now(), job_err)
+            dc_result.update(ok=False, error=str(job_err))
+        finally:
+            reset_blender_scene()
+
+        # "print()" goes to the log file, the answer must go to the pipe
+        sys.stdout.write(f'{BLENDER_SERVICE_DONE} {json.dumps(dc_result)}\n')
+        sys.stdout.flush()
 
 
 if __name__ == "__main__":
@@ -1053,6 +1384,7 @@ if __name__ == "__main__":
     bl_options = {'REGISTER', 'UNDO'}  # Enable undo for the operator.
 
     logger = logging.getLogger(__name__)
+    exit_code = 0  # not 0 when the run failed, the caller must not take a previous OBJ8 file for this run output
     if len(sys.argv) > 2:
         try:
             # https://blender.stackexchange.com/questions/6817/how-to-pass-command-line-arguments-to-a-blender-python-script
@@ -1060,142 +1392,31 @@ if __name__ == "__main__":
             argv = argv[argv.index("--") + 1:]  # get all args after "--"
 
             dc_config = {}
-            if len(argv) > 0:
-                dc_config = ast.literal_eval(argv[0])
+            if len(argv) > 0 and argv[0] == BLENDER_SERVICE_ARG:
+                argv = []  # the jobs come from stdin
+                run_blender_service()
+            elif len(argv) > 1:
+                # argv: the run config file and the job manifest file
+                dc_config = read_run_config(argv[0])
 
                 # logging.basicConfig(filename='osm_to_obj_blend.log', level=logging.INFO, filemode='a')
                 logging.basicConfig(filename=dc_config.get(CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME), level=logging.INFO, filemode='a')
                 print(f'argv after --: {argv}')  # debug
 
-                dc_config[CONFIG_BLENDER_VERSION] = int(bpy.app.version[0])
-
                 # Connect to DB
                 CONN = sqlite3.connect(dc_config["db_file"])
 
-                # Prepare the texture file names for the material and OBJ8 addon (io_blender2xplane)
-                prepare_texture_names(dc_config)
-
                 # logger.info(f'{datetime.datetime.now()} dcConfig:\n{dcConfig}')  # debug
+                process_job_manifest(dc_config, argv[1])
             else:
                 raise Error(f'Wrong number of arguments pass to blender.\n{sys.argv}')
-
-            for env in argv[1:]:  # loop over list starting from the second element
-                # wavefront_file: str = ""
-                if env.endswith(".obj"):
-                    print(f'Working on: {env}')
-                    # wavefront_file = env
-                    import_wavefront(env)
-                    print(f'File Imported: {env}')
-                    flip_normals()  # This screws the UV Mapping after we manually project them
-
-                    set_material_to_object(dc_config)
-                    osm_obj_file_name = remove_file_extension(env)
-                    set_xplane_addon(CONN, osm_obj_file_name, dc_config)
-                    # Export WaveFront
-                    if dc_config.get(CONFIG_BLEND_EXPORT_VN_FILE, False) is True:
-                        export_as_obj(osm_obj_file_name)
-
-                    unwrap_objects()  # basic unwrap to all meshes
-
-                    # logger.info(f'{datetime.datetime.now()} Calling external python script.')
-                    # call_external_script("blender/uv_manip.py") # deprecate, integrated in current script
-
-                    ###########################
-                    # UV Manipulation
-                    # Roof and bevel Creation
-                    ###########################
-                    for obj in bpy.context.scene.objects:
-                        if obj.type == 'MESH':
-                            print(f'MESH Object: {obj.name}')
-
-                            bpy.context.view_layer.update()
-
-                            bpy.ops.object.mode_set(mode='OBJECT')
-                            mesh_dimension = bpy.context.object.dimensions
-                            print(f"Mesh dimensions: {mesh_dimension}")
-                            # bpy.ops.object.mode_set(mode='EDIT')
-
-                            if bpy.context.object.mode == 'EDIT':
-                                print("Marking current object as active.")
-                                bpy.ops.object.mode_set(mode='OBJECT')
-                                bpy.ops.object.select_all(action='DESELECT')
-
-                            obj.select_set(True)
-
-                            # Set Active object in layer focus to the obj
-                            bpy.context.view_layer.objects.active = obj
-
-                            # Enter EDIT mode
-                            bpy.ops.object.mode_set(mode='EDIT')
-
-                            print(f"Object mode: {bpy.context.object.mode}")
-
-                            if bpy.context.object.mode == 'EDIT':
-                                logger.info('%s RUNNING UV Manipulation', datetime.datetime.now())
-
-                                uv_mapping_based_xml(CONN, obj, dc_config, mesh_dimension)
-
-                            bpy.ops.object.editmode_toggle()
-                            bpy.ops.object.mode_set(mode='OBJECT')
-                            bpy.ops.object.transform_apply(location=True, rotation=True, scale=True)
-
-                    if dc_config.get(CONFIG_BLEND_SAVE_PROJECT) is not False:
-                        save_as_blend_project(osm_obj_file_name)
-
-                    if dc_config.get(CONFIG_BLEND_EXPORT_XPLANE_OBJ8) is not False:
-
-                        # Export X-Plane OBJ8 format
-                        bpy.ops.scene.export_to_relative_dir()
-
-                        # sqlite flow code, "use_sqlite_flow=true"
-                        if dc_config.get(CONFIG_USE_SQLITE_FLOW, False):
-                            NEW_SEQ = 1
-                            WAY_ID = int(dc_config.get(K_WAY_ID, -1))
-
-                            # fetch max sequence number
-                            if WAY_ID >= 0:
-                                STMT = 'select ifnull( max(seq),0) as max_seq from obj8_data'
-                                ROWS = exec_query_stmt(CONN, STMT, [], False)
-                                # print (f'{rows}')
-                                if ROWS:
-                                    NEW_SEQ = int(ROWS['max_seq']) + 1
-
-                                # print (f'New Sequence: {new_seq}.') # debug
-
-                                # fetch same mesh characteristics
-                                STMT = """select a.file_name_obj8, b.seq, b.way_id
-                                        from obj8_data a, obj8_data b
-                                        where a.way_id != b.way_id
-                                        and a.edges = b.edges
-                                        and a.edges_length = b.edges_length
-                                        and a.way_id = ?
-                                        and b.seq is not null
-                                       """
-
-                                BINDS = [WAY_ID]
-                                ROWS = exec_query_stmt(CONN, STMT, BINDS, False)  # fetch only 1 row if exists
-                                print(f"{ROWS}")
-                                if ROWS is None:
-                                    print(f'Did not Found similar mesh for {WAY_ID = }, will get {NEW_SEQ = }.')
-                                    BINDS.clear()
-                                    STMT = f"update {G_OBJ8_DATA_TABLE} set seq = ? where {K_WAY_ID} = ?"
-                                    BINDS = [NEW_SEQ, WAY_ID]
-                                    CONN.execute("BEGIN TRANSACTION;")
-                                    exec_stmt(CONN, STMT, BINDS)
-                                    CONN.execute("END TRANSACTION;")
-                                else:
-                                    print(f'Found similar mesh for {WAY_ID = }, {ROWS["seq"] = }')
-                                    BINDS.clear()
-                                    STMT = f'update {G_OBJ8_DATA_TABLE} set similar_to_way_id = ? where {K_WAY_ID} = ?'
-                                    BINDS = [int(ROWS[K_WAY_ID]), WAY_ID]
-                                    CONN.execute("BEGIN TRANSACTION;")
-                                    exec_stmt(CONN, STMT, BINDS)
-                                    CONN.execute("END TRANSACTION;")
-
         except Exception as e:
-            logger.info('%s Error:\n{e}', datetime.datetime.now())
+            logger.info('%s Error:\n%s', datetime.datetime.now(), e)
+            exit_code = 1
         finally:
             if CONN:
                 CONN.close()
 
             logger.info('%s Finish Program.\n', datetime.datetime.now())
+
+    sys.exit(exit_code)
@@ -19,7 +19,13 @@ Calculate Normals
 https://gamedev.net/forums/topic/330992-vertex-normals-in-wavefront-objs/
 """
 
+import array
+import ast
+import bisect
+import hashlib
+import itertools
 import math
+import random
 import re
 import shutil
 import sqlite3
@@ -27,11 +33,17 @@ from math import trunc
 from sqlite3 import Error
 import json
 import copy
+import concurrent.futures
+import functools
+import multiprocessing
 import os
 import os.path
 from pathlib import Path
 import sys
 import platform
+import queue
+import struct
+import threading
 import time
 import subprocess
 from subprocess import CalledProcessError
@@ -40,6 +52,7 @@ import requests
 from requests.exceptions import HTTPError
 from dataclasses import dataclass
 from typing import Dict, Any
+import xml.etree.ElementTree as ET
 
 
 G_MAJOR_VER = 2025
@@ -56,12 +69,32 @@ G_NODES_TABLE = "nodes"
 G_WAYS_TABLE = "ways"
 G_WAYS_META_TABLE = "ways_meta"
 G_OBJ8_DATA_TABLE = "obj8_data"
+G_WAYS_INFO_TABLE = "ways_info"  # way attributes that are not tags, the OSM "version"
 
 # G_OUTPUT_OBJ_FILES_NAME = "obj_files.txt"
 # G_OUTPUT_OBJ_RESUME_FILES_NAME = "obj_resume_files.txt"
 
 G_PREPARED_FILES_TO_PROCESS = 0
 G_SKIPPED_FILES = 0
+G_FOOTPRINT_VERTICES_IN = 0  # footprint vertices before the simplification stage
+G_FOOTPRINT_VERTICES_OUT = 0  # footprint vertices after the simplification stage
+G_WAVEFRONT_VERTICES = 0  # vertices written to all WaveFront files
+G_WAVEFRONT_FACES = 0  # faces written to all WaveFront files
+G_TRIANGULATION_SECONDS = 0.0  # time spent triangulating the caps
+G_NATIVE_OBJ8_FILES = 0  # OBJ8 files written by format_native_obj8(), without Blender
+G_ARCHETYPE_INSTANCES = 0  # buildings placed as an instance of their archetype OBJ8, see assign_building_archetypes()
+G_ARCHETYPE_INSTANCE_LINES = {}  # archetype way_id => (its OBJ8 file, [(way_id, resume manifest line)] of its instances)
+G_BUILDING_HEIGHTS = {}  # way_id => decide_building_height() result of assign_building_archetypes(), not queried twice
+G_WAVEFRONT_WRITER = None  # WavefrontWriter, running while the WaveFront files are generated
+G_WAVEFRONT_BATCHES = None  # WavefrontBatches, when the buildings are grouped into multi-object WaveFront files
+G_WORKER_CONN = None  # read-only database connection of a "wavefront_workers" process
+G_WORKER_DC_CONFIG = None
+G_WORKER_SQLITE_SUPPORTS_MATH = True
+G_TEXTURE_RULES = None  # TextureRules, "uv_xml_config.xml" compiled once per process, see read_texture_rules()
+G_FINGERPRINT_STORE = None  # "incremental_rebuild": connection to the "way_fingerprints.sqlite" file of the work folder
+G_WAY_FINGERPRINTS = {}  # "incremental_rebuild": way_id => fingerprint of the ways rebuilt in this run, stored once exported
+G_OBJ8_STORE_FILES = {}  # "obj8_store_folder": way_id => stored OBJ8 file of the building, the DSF step references it
+G_OBJ8_STORE_HITS = 0  # buildings found in the OBJ8 store, without a Blender run
 
 CONFIG_MODE = "mode"
 CONFIG_OBJ_FILTER = "mode_obj_filter_text"
@@ -90,24 +123,119 @@ CONFIG_USE_SQLITE_FLOW = "use_sqlite_flow"  # boolean if to use the code logic t
 CONFIG_OVERPASS_URL = "overpass_url"  # holds the preferred overpass url to connect too.
 CONFIG_REQUEST_TIMEOUT = "request_timeout"  # v25.08.1 holds the timeout request from overpass
 CONFIG_LOG_FOLDER = "log_folder"  # v25.05.1 holds the log folder location
+CONFIG_SIMPLIFY_FOOTPRINT = "simplify_footprint"  # boolean, run the footprint simplification stage before writing the mesh
+CONFIG_SIMPLIFY_COLLINEAR_ANGLE_DEG = "simplify_collinear_angle_deg"  # merge consecutive edges that turn less than N degrees
+CONFIG_SIMPLIFY_SPIKE_LENGTH_MT = "simplify_spike_length_mt"  # drop vertices that stick out less than N meters
+CONFIG_SIMPLIFY_DP_TOLERANCE_MT = "simplify_dp_tolerance_mt"  # Douglas-Peucker tolerance in meters, 0 disables it
+CONFIG_SANITIZE_FOOTPRINTS = "sanitize_footprints"  # boolean, validate and repair all footprints before the mesh stage
+CONFIG_SANITIZE_CLOSE_TOLERANCE_MT = "sanitize_close_tolerance_mt"  # max gap (meters) between first/last node we will close
+CONFIG_WAVEFRONT_COMPACT_LEVELS = "wavefront_compact_levels"  # boolean, one wall span for all levels instead of a band per level
+CONFIG_WAVEFRONT_DROP_BOTTOM_FACE = "wavefront_drop_bottom_face"  # boolean, do not write the bottom face
+CONFIG_WAVEFRONT_TRIANGULATE_CAPS = "wavefront_triangulate_caps"  # boolean, write the top/bottom faces as triangles
+CONFIG_WAVEFRONT_BACKGROUND_WRITER = "wavefront_background_writer"  # boolean, default true, write the files in a writer thread
+CONFIG_WAVEFRONT_WRITER_QUEUE_SIZE = "wavefront_writer_queue_size"  # max buildings waiting to be written
+CONFIG_WAVEFRONT_WORKERS = "wavefront_workers"  # number of processes generating the WaveFront files, 0 = all cores
+CONFIG_WAVEFRONT_BATCH_SIZE = "wavefront_batch_size"  # buildings per multi-object WaveFront file, 0 = one file per building
+CONFIG_STAGING_FOLDER = "staging_folder"  # RAM backed folder (tmpfs) for the intermediate files, "" = write them to the work folder
+CONFIG_STAGING_WORK_FOLDER = "staging_work_folder"  # Holds the staging folder of this run, based on "CONFIG_STAGING_FOLDER"
+CONFIG_WORK_FOLDER_SHARDED = "work_folder_sharded"  # boolean, "{work_folder}/{tile}/{way_id hash}" sub folders instead of one flat folder
+CONFIG_WAVEFRONT_BINARY_MESH = "wavefront_binary_mesh"  # boolean, write "{}_osm.mesh" binary meshes instead of WaveFront text
+CONFIG_NATIVE_OBJ8_WRITER = "native_obj8_writer"  # boolean, write the OBJ8 file of simple buildings directly, without Blender
+CONFIG_WAVEFRONT_WRITE_UV = "wavefront_write_uv"  # boolean, write the texture coordinates (vt) so blender does not unwrap
+CONFIG_GENERATE_ROOFS = "generate_roofs"  # boolean, write hipped/gabled roofs into the WaveFront file
+CONFIG_ROOF_DEFAULT_SHAPE = "roof_default_shape"  # roof shape when the way has no "roof:shape", default "flat"
+CONFIG_ROOF_PITCH_DEG = "roof_pitch_deg"  # roof slope when the way has no "roof:height"
+CONFIG_SPATIAL_ORDER = "spatial_order"  # "hilbert" or "zorder": process the buildings sorted by their centroid, "" = overpass order
+CONFIG_FACADE_FILE = "facade_file"  # "facade" mode: the ".fac" file (library or scenery path) of the POLYGON_DEF
+CONFIG_ARCHETYPE_INSTANCING = "archetype_instancing"  # boolean, one OBJ8 per footprint archetype, the similar buildings are its instances
+CONFIG_ARCHETYPE_MAX_COUNT = "archetype_max_count"  # at most N archetypes, the buildings matching none are built one by one
+CONFIG_ARCHETYPE_TOLERANCE_MT = "archetype_tolerance_mt"  # edge length step and largest edge difference of an instance, meters
+CONFIG_OBJ8_STORE_FOLDER = "obj8_store_folder"  # content addressed store of the exported OBJ8 files, shared by all runs, "" = none
+CONFIG_BLENDER_SERVICE = "blender_service"  # boolean, one long lived Blender process exports all the buildings, see BlenderService
+CONFIG_BLENDER_SERVICE_MAX_JOBS = "blender_service_max_jobs"  # restart the Blender service after N jobs, 0 = never
+CONFIG_BLENDER_WORKERS = "blender_workers"  # concurrent Blender jobs, 0 = one per CPU, default 1. See BlenderPool
+CONFIG_BLENDER_JOB_TIMEOUT_SEC = "blender_job_timeout_sec"  # kill a Blender job running longer, 0 = no limit
+CONFIG_BLEND_UV_XML_CONFIG_FILE = "blend_uv_xml_config_file"  # the texture rules file, "uv_xml_config.xml"
+CONFIG_TEXTURE_SEED = "texture_seed"  # integer, mixed with the way_id (or shape key) to seed the texture picks of a building, default 0
 
 CONF_OUTPUT_OBJ_FILES = "obj_files"  # "obj_files.txt" => "obj_files_{bbox}.txt"
 CONF_OUTPUT_OBJ_RESUME_FILES_NAME = "obj_resume_files"  # "obj_resume_files.txt" => "obj_resume_files_{bbox}.txt"
 CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME = "osm_to_obj_blend_log"  # holds the blender output log file name and path
+CONF_OUTPUT_QUARANTINE_FILE = "footprint_quarantine"  # "footprint_quarantine_{bbox}.txt", way_id that failed validation
+CONF_OUTPUT_WAY_INDEX_FILE = "way_index"  # "way_index_{bbox}.txt", way_id|file of every building, when "work_folder_sharded"
+CONF_OUTPUT_BLENDER_JOBS = "blender_jobs"  # "blender_jobs_{bbox}.jsonl", one json line per building for Blender, see read_blender_job_entries()
 
 OPT_MODE_OBJ = "obj"  # this is also the default
 OPT_MODE_HELIPAD = "helipad"
+OPT_MODE_FACADE = "facade"  # building footprints as facade polygons of the DSF, no meshes and no Blender
 
 # v1.1
+CONFIG_INCREMENTAL_REBUILD = "incremental_rebuild"  # boolean, rebuild only the ways whose fingerprint changed, replaces "skip_rule"
 CONFIG_SKIP_RULE = "skip_rule"  # When resume work because of fail, do we want to skip already processed files ?
 # G_RESUME_LIST = [5, 10]  # 5: wavefront, 10: before calling blender
+# Config keys that select, locate or schedule the work but do not change a building, "incremental_rebuild" ignores them
+FINGERPRINT_IGNORED_CONFIG_KEYS = {CONFIG_MODE, CONFIG_OBJ_FILTER, CONFIG_HELIPAD_FILTER, CONFIG_OUT_FOLDER, CONFIG_OSM_BBOX,
+                                   CONFIG_OSM_JSON_FILE, CONFIG_DEBUG_WAY_ID, CONFIG_LIMIT, CONFIG_QUERY_META_TEXT,
+                                   CONFIG_BLENDER_BIN, CONFIG_FILTER_OUT_EVERY_NTH_MESH,
+                                   CONFIG_OUTPUT_FOLDER_FOR_THE_DSF_TEXT, CONFIG_ROOT_SCENERY_FOLDER_TO_COPY_OBJ8_FILES,
+                                   CONFIG_LIB_RELATIVE_PATH, CONFIG_SCRIPT_WORK_FOLDER, CONFIG_WORK_FOLDER,
+                                   CONFIG_WORK_FOLDER_IS_ABSOLUTE_PATH, CONFIG_OVERPASS_URL, CONFIG_REQUEST_TIMEOUT,
+                                   CONFIG_LOG_FOLDER, CONFIG_WAVEFRONT_BACKGROUND_WRITER, CONFIG_WAVEFRONT_WRITER_QUEUE_SIZE,
+                                   CONFIG_WAVEFRONT_WORKERS, CONFIG_WAVEFRONT_BATCH_SIZE, CONFIG_STAGING_FOLDER,
+                                   CONFIG_STAGING_WORK_FOLDER, CONFIG_WORK_FOLDER_SHARDED, CONFIG_WAVEFRONT_BINARY_MESH,
+                                   CONFIG_INCREMENTAL_REBUILD, CONFIG_SKIP_RULE, CONFIG_OBJ8_STORE_FOLDER,
+                                   CONFIG_BLENDER_SERVICE, CONFIG_BLENDER_SERVICE_MAX_JOBS, CONFIG_BLENDER_WORKERS,
+                                   CONFIG_BLENDER_JOB_TIMEOUT_SEC, CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME,
+                                   CONF_OUTPUT_QUARANTINE_FILE, CONF_OUTPUT_BLENDER_JOBS, CONF_OUTPUT_WAY_INDEX_FILE,
+                                   "db_file", "way_id", "way_meta"}
 
 DEFAULT_OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 DEFAULT_INPUT_DSF_TEMPLATE_FILE_NAME = "dsf_template.tmpl"
+DEFAULT_DSF_FACADE_TEXT_OUTPUT_FILE_NAME = "dsf_facade"  # "facade" mode, same folder as DEFAULT_DSF_TEXT_OUTPUT_FILE_NAME
 DEFAULT_DSF_TEXT_OUTPUT_FILE_NAME = "dsf_obj8"  # Will be created in the main script folder. Can be modified by "blend_export_xplane_output_folder"
 DEFAULT_REQUEST_TIMEOUT = 30  # v25.08.1
 
 DEFAULT_LIMIT_FILES = 1000
+DEFAULT_UV_XML_CONFIG_FILE = "uv_xml_config.xml"
+DEFAULT_DOOR_WALL_MAX_LENGTH_MT = 12.0  # same rule as the blender script, only walls up to this length get a door/window
+DEFAULT_WAVEFRONT_WRITER_QUEUE_SIZE = 256
+DEFAULT_FINGERPRINT_STORE_FILE = "way_fingerprints.sqlite"  # "incremental_rebuild", in the work folder
+BINARY_MESH_MAGIC = b"OXPM"  # binary mesh container, see pack_binary_mesh_file()
+BINARY_MESH_VERSION = 1
+DEFAULT_OBJ8_GLOBAL_SPECULAR = 0.07  # same value the blender script sets on the material
+SPATIAL_ORDER_HILBERT = "hilbert"
+SPATIAL_ORDER_ZORDER = "zorder"
+SPATIAL_ORDER_BITS = 16  # grid of 2^16 x 2^16 cells over the working set, ~1.7m cells for a 1 degree tile
+DEFAULT_ARCHETYPE_MAX_COUNT = 200
+DEFAULT_ARCHETYPE_TOLERANCE_MT = 1.0
+ARCHETYPE_MAX_SHAPE_DIFF = 0.1  # an instance area and aspect ratio are within 10% of its archetype
+DEFAULT_BLENDER_SERVICE_MAX_JOBS = 500
+BLENDER_SERVICE_ARG = "--service"  # same values as in run_blender_script.py
+BLENDER_SERVICE_DONE = "OSM_TO_XPLANE_JOB_DONE"
+DEFAULT_ROOF_PITCH_DEG = 30.0
+DEFAULT_ROOF_MAX_VERTICES = 64  # larger footprints keep a flat roof
+ROOF_SHAPE_FLAT = "flat"
+ROOF_SHAPE_HIPPED = "hipped"
+ROOF_SHAPE_GABLED = "gabled"
+DC_ROOF_SHAPES = {"hipped": ROOF_SHAPE_HIPPED, "pyramidal": ROOF_SHAPE_HIPPED, "half-hipped": ROOF_SHAPE_HIPPED,
+                  "gabled": ROOF_SHAPE_GABLED, "saltbox": ROOF_SHAPE_GABLED}  # "roof:shape" values, others are flat
+DEFAULT_SIMPLIFY_COLLINEAR_ANGLE_DEG = 3.0
+DEFAULT_SIMPLIFY_SPIKE_LENGTH_MT = 0.1
+DEFAULT_SIMPLIFY_DP_TOLERANCE_MT = 0.15
+DEFAULT_SANITIZE_CLOSE_TOLERANCE_MT = 1.0
+DEFAULT_SANITIZE_ZERO_LENGTH_MT = 0.01  # edges shorter than 1cm are considered zero length
+DEFAULT_SANITIZE_MIN_AREA_SQ_MT = 1.0  # footprints with smaller area are degenerate
+SANITIZE_QUERY_CHUNK_SIZE = 500  # way ids per footprint query, below the SQLite bind variables limit (999 before 3.32)
+
+# Footprint sanitizer reason codes
+REASON_REPEATED_NODES = "repeated_nodes"  # fixed
+REASON_ZERO_LENGTH_EDGE = "zero_length_edge"  # fixed
+REASON_MISSING_CLOSING_NODE = "missing_closing_node"  # fixed
+REASON_MISSING_NODES = "missing_nodes"  # quarantined
+REASON_UNCLOSED_RING = "unclosed_ring"  # quarantined
+REASON_TOO_FEW_NODES = "too_few_nodes"  # quarantined
+REASON_DEGENERATE_AREA = "degenerate_area"  # quarantined
+REASON_SELF_INTERSECTION = "self_intersection"  # quarantined
 DEFAULT_LOG_FOLDER = "logs"  # v25.05.1
 
 K_PERIMETER = "perimeter"
@@ -127,6 +255,15 @@ K_FILE_NAME_OSM = "file_name_osm"
 K_FILE_NAME_OBJ8 = 'file_name_obj8'
 K_SIMILAR_TO_WAY_ID = 'similar_to_way_id'
 K_ROTATION = 'rotation'
+K_ZONE_ROOF = 'roof'
+K_ZONE_WALL = 'wall'
+K_ZONE_WALL_W_DOOR = 'wall_w_door'
+K_ZONE_WALL_W_WIN = 'wall_w_win'
+K_WAY_META = 'way_meta'
+K_TEXTURE_INDEX = 'texture_index'
+K_MESH = 'mesh'
+K_TEXTURE_RULES = 'texture_rules'
+K_TEXTURE_ZONES = 'texture_zones'
 
 
 # ----------------------------------------
@@ -308,6 +445,13 @@ The name of the "key" must be the same as the "table" name
         )
     """
 
+    G_TABLES[G_WAYS_INFO_TABLE] = f"""
+        CREATE TABLE IF NOT EXISTS {G_WAYS_INFO_TABLE} (
+            way_id integer PRIMARY KEY,
+            version integer
+        )
+    """
+
     # Stores data processed in blender and then analyzed and optimize to find duplicate like obj8 files with same shape/dimensions
     G_TABLES[G_OBJ8_DATA_TABLE] = f"""
         CREATE TABLE IF NOT EXISTS {G_OBJ8_DATA_TABLE} (
@@ -444,22 +588,470 @@ def drop_all_tables(conn):
             exec_stmt(conn, stmt)
 
 
+class WavefrontWriter:
+    """ Background writer of the WaveFront files and the manifest files ("obj_files", "resume_obj_files").
+    The buildings are formatted in the main thread, finished buffers are passed through a bounded queue,
+    so the geometry stage is not slowed down by file system calls. The manifests stay open for the whole run. """
+
+    def __init__(self, in_dc_config: dict):
+        self.error = None
+        self.files_written = 0
+        self.manifests = {}
+        for manifest_key in output_manifest_keys(in_dc_config):
+            # mode "w" - a new run starts with empty manifests
+            self.manifests[manifest_key] = open(file=in_dc_config.get(manifest_key, f'{manifest_key}.txt'), mode='w', encoding='utf8')
+
+        self.queue = queue.Queue(maxsize=max(1, int(in_dc_config.get(CONFIG_WAVEFRONT_WRITER_QUEUE_SIZE, DEFAULT_WAVEFRONT_WRITER_QUEUE_SIZE))))
+        self.thread = threading.Thread(target=self.run, name="wavefront_writer", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            target, text = item
+            try:
+                if target in self.manifests:
+                    self.manifests[target].write(text)
+                elif isinstance(text, bytes):
+                    with open(file=target, mode="wb") as binary_file:
+                        binary_file.write(text)
+                    self.files_written += 1
+                else:
+                    with open(file=target, mode="w", encoding="utf8") as text_file:
+                        text_file.write(text)
+                    self.files_written += 1
+            except OSError as os_err:
+                self.error = self.error or f'{target!r}: {os_err}'  # keep the first error, keep draining the queue
+
+    def write_file(self, in_file_name: str, in_text: str):
+        self.queue.put((in_file_name, in_text))
+
+    def append_manifest(self, in_manifest_key: str, in_text: str):
+        self.queue.put((in_manifest_key, in_text))
+
+    def close(self):
+        """ Flush everything to disk, must be called before anyone reads the files (Blender, DSF). """
+        self.queue.put(None)
+        self.thread.join()
+        for manifest in self.manifests.values():
+            manifest.close()
+
+        if self.error is not None:
+            print(f'[Error] Failed to write WaveFront output: {self.error}')
+            sys.exit(1)
+
+
+def output_manifest_keys(in_dc_config: dict) -> list:
+    """ The manifests written while the WaveFront files are generated. """
+    if in_dc_config.get(CONFIG_WORK_FOLDER_SHARDED, False):
+        return [CONF_OUTPUT_OBJ_FILES, CONF_OUTPUT_OBJ_RESUME_FILES_NAME, CONF_OUTPUT_BLENDER_JOBS, CONF_OUTPUT_WAY_INDEX_FILE]
+
+    return [CONF_OUTPUT_OBJ_FILES, CONF_OUTPUT_OBJ_RESUME_FILES_NAME, CONF_OUTPUT_BLENDER_JOBS]
+
+
+def dsf_tile_name(in_lat: float, in_lon: float) -> str:
+    """ 1x1 degree tile name, the same as the X-Plane DSF files: "+32+034". """
+    return f'{math.floor(in_lat):+03d}{math.floor(in_lon):+04d}'
+
+
+def building_output_folder(in_dc_config: dict, in_lat: float, in_lon: float, way_id: int) -> str:
+    """ Folder of the intermediate files of one building ("_osm.obj", ".blend", "_osm_obj8.obj").
+    With "work_folder_sharded" it is "{work_folder}/{tile}/{hash}", where the hash is the first 2 hex digits of md5(way_id),
+    so no folder holds more than a few hundred buildings. Without it, all files go to the work folder. """
+    out_path = in_dc_config.get(CONFIG_WORK_FOLDER, "out")
+    if not in_dc_config.get(CONFIG_WORK_FOLDER_SHARDED, False):
+        return out_path
+
+    return os.path.join(out_path, dsf_tile_name(in_lat, in_lon), hashlib.md5(str(way_id).encode("utf8")).hexdigest()[:2])
+
+
+def staged_path(in_dc_config: dict, in_path: str) -> str:
+    """ Where an intermediate file of the work folder is written: the same relative path in the staging folder,
+    when "staging_folder" is set. Final artifacts (OBJ8) are moved back by persist_staged_file(). """
+    staging_path = in_dc_config.get(CONFIG_STAGING_WORK_FOLDER, "")
+    work_path = in_dc_config.get(CONFIG_WORK_FOLDER, "out")
+    if staging_path == "" or not is_sub_path(in_path, work_path):
+        return in_path
+
+    return os.path.normpath(os.path.join(staging_path, os.path.relpath(in_path, work_path)))
+
+
+def persisted_path(in_dc_config: dict, in_path: str) -> str:
+    """ The work folder path of a staged file, the opposite of staged_path(). """
+    staging_path = in_dc_config.get(CONFIG_STAGING_WORK_FOLDER, "")
+    if staging_path == "" or not is_sub_path(in_path, staging_path):
+        return in_path
+
+    return os.path.normpath(os.path.join(in_dc_config.get(CONFIG_WORK_FOLDER, "out"), os.path.relpath(in_path, staging_path)))
+
+
+def is_sub_path(in_path: str, in_folder: str) -> bool:
+    try:
+        return os.path.commonpath([os.path.abspath(in_path), os.path.abspath(in_folder)]) == os.path.abspath(in_folder)
+    except ValueError:  # different drives on windows
+        return False
+
+
+def persist_staged_file(in_dc_config: dict, in_staged_file: str):
+    """ Checkpoint: move a finished artifact from the staging folder to the work folder, so resume ("skip_rule") finds it.
+    Called after every Blender run, a crash only loses the buildings that were not exported yet. """
+    final_file = persisted_path(in_dc_config, in_staged_file)
+    if final_file == in_staged_file or not os.path.isfile(in_staged_file):
+        return
+
+    try:
+        os.makedirs(os.path.dirname(final_file), exist_ok=True)
+        shutil.move(in_staged_file, final_file)
+    except OSError as os_err:
+        print(f'[Error] Failed to move {in_staged_file!r} to the work folder.\n{os_err}')
+        sys.exit(1)
+
+
+def write_output_text(in_file_name: str, in_text):
+    """ Write a whole file, through the writer thread when it is running. "in_text" can be bytes (binary meshes). """
+    if G_WAVEFRONT_WRITER is not None:
+        G_WAVEFRONT_WRITER.write_file(in_file_name, in_text)
+    elif isinstance(in_text, bytes):
+        with open(file=in_file_name, mode="wb") as binary_file:
+            binary_file.write(in_text)
+    else:
+        with open(file=in_file_name, mode="w", encoding="utf8") as text_file:
+            text_file.write(in_text)
+
+
+def append_manifest_line(in_dc_config: dict, in_manifest_key: str, in_text: str):
+    """ Append a line to the "obj_files" or "resume_obj_files" manifest, through the writer thread when it is running. """
+    if G_WAVEFRONT_WRITER is not None:
+        G_WAVEFRONT_WRITER.append_manifest(in_manifest_key, in_text)
+    else:
+        with open(file=in_dc_config.get(in_manifest_key, f'{in_manifest_key}.txt'), mode="a", encoding="utf8") as text_file:
+            text_file.write(in_text)
+
+
+def building_needs_blender(in_dc_config: dict, in_ring_vertices: int, in_b_has_uv: bool, in_b_has_roof: bool) -> bool:
+    """ "native_obj8_writer" router: True if the building uses a feature only the blender script has.
+    Without texture coordinates Blender unwraps the mesh, a 4 edges flat top gets an extruded roof,
+    and with "add_bevel" a flat top with more edges is beveled. Triangulated caps are never extruded nor beveled. """
+    if not in_b_has_uv:
+        return True
+    if in_b_has_roof or in_dc_config.get(CONFIG_WAVEFRONT_TRIANGULATE_CAPS, False):
+        return False
+    if in_ring_vertices == 4:
+        return True
+
+    return in_ring_vertices > 4 and in_dc_config.get("add_bevel", False)
+
+
+def obj8_texture_names(in_dc_config: dict) -> tuple:
+    """ The TEXTURE and TEXTURE_LIT of the OBJ8 file, the same names the blender script gives the X-Plane layer. """
+    texture = Path(in_dc_config.get("blend_base_texture_name") or "blue8x8.png")
+    texture_lit = texture.with_name(f'{texture.stem}_lit{texture.suffix}')
+
+    return texture.as_posix(), texture_lit.as_posix()
+
+
+def format_native_obj8(in_dc_config: dict, in_vertices: list, in_faces: list, in_normals: list, in_face_uvs: list) -> str:
+    """ The OBJ8 text of a building, without Blender. The WaveFront axes are the X-Plane axes (x east, y up, z south).
+    Every face is flat shaded, so each corner is a VT with the face normal. The polygons are convex (walls, triangulated
+    caps, roof planes) and are fanned into triangles, written clockwise as X-Plane expects. """
+    dc_vt_index = {}  # "VT" line => index, the caps share their corners
+    ls_indices = []
+    for face, normal, face_uv in zip(in_faces, in_normals, in_face_uvs):
+        ls_corners = []
+        for vertex_index, uv in zip(face, face_uv):
+            vt_line = "VT {:.4f} {:.4f} {:.4f} {:.4f} {:.4f} {:.4f} {:.5f} {:.5f}\n".format(*in_vertices[vertex_index - 1], *normal, *uv)
+            ls_corners.append(dc_vt_index.setdefault(vt_line, len(dc_vt_index)))
+        for i in range(1, len(ls_corners) - 1):
+            ls_indices.extend((ls_corners[0], ls_corners[i + 1], ls_corners[i]))
+
+    texture, texture_lit = obj8_texture_names(in_dc_config)
+    ls_lines = ["I\n800\nOBJ\n\n", f'TEXTURE {texture}\n', f'TEXTURE_LIT {texture_lit}\n',
+                f'GLOBAL_specular {DEFAULT_OBJ8_GLOBAL_SPECULAR}\n',
+                f'POINT_COUNTS {len(dc_vt_index)} 0 0 {len(ls_indices)}\n\n']
+    ls_lines.extend(dc_vt_index.keys())
+    ls_lines.append("\n")
+    i_full = len(ls_indices) - len(ls_indices) % 10
+    ls_lines.extend(f'IDX10 {" ".join(str(i) for i in ls_indices[start:start + 10])}\n' for start in range(0, i_full, 10))
+    ls_lines.extend(f'IDX {i}\n' for i in ls_indices[i_full:])
+    ls_lines.append(f'\nTRIS 0 {len(ls_indices)}\n')
+
+    return "".join(ls_lines)
+
+
+def pack_binary_mesh(in_dc_meta: dict, in_vertices: list, in_faces: list, in_face_uvs: list = None) -> bytes:
+    """ One mesh record of the binary mesh container (see pack_binary_mesh_file()), little endian:
+    header "<5I" (meta length, vertices, faces, loops, has uv), json meta (object name, way_id, file, position, header info),
+    float32 x,y,z per vertex, int32 size per face, int32 vertex index (0 based) per face corner, float32 u,v per face corner.
+    The vertices are (x, height, z) like the WaveFront file, they are written in Blender axes (x, -z, height). """
+    meta = json.dumps(in_dc_meta).encode("utf8")
+    coords = array.array("f", [value for x, height, z in in_vertices for value in (x, -z, height)])
+    face_sizes = array.array("i", [len(face) for face in in_faces])
+    loops = array.array("i", [vertex_index - 1 for face in in_faces for vertex_index in face])
+    uvs = array.array("f", [value for face_uv in in_face_uvs or [] for uv in face_uv for value in uv])
+    if sys.byteorder == "big":
+        for buffer in (coords, face_sizes, loops, uvs):
+            buffer.byteswap()
+
+    return (struct.pack("<5I", len(meta), len(in_vertices), len(in_faces), len(loops), 1 if len(uvs) else 0)
+            + meta + coords.tobytes() + face_sizes.tobytes() + loops.tobytes() + uvs.tobytes())
+
+
+def pack_binary_mesh_file(in_records: list) -> bytes:
+    """ Binary mesh container: "<4sII" (magic "OXPM", version, number of records), followed by the pack_binary_mesh() records. """
+    return struct.pack("<4sII", BINARY_MESH_MAGIC, BINARY_MESH_VERSION, len(in_records)) + b"".join(in_records)
+
+
+class WavefrontBatches:
+    """ Groups the buildings into multi-object WaveFront files, "wavefront_batch_size" buildings per file, per 1x1 degree tile.
+    Every building is an "o way_{way_id}" object. The sidecar index file ("{batch}.idx", one json per line) maps the objects
+    back to their way_id, their own "{}_osm.obj" file name (used to name the OBJ8 file) and their "# key value" header info.
+    The "obj_files" manifest keeps one line per building, with the batch file as the fourth field.
+    Binary meshes ("wavefront_binary_mesh") go to a "_batch.mesh" container instead, their records hold the same information. """
+
+    def __init__(self, in_dc_config: dict, in_batch_size: int):
+        self.dc_config = in_dc_config
+        self.batch_size = in_batch_size
+        self.out_path = in_dc_config.get(CONFIG_WORK_FOLDER, "out")
+        self.open_batches = {}  # tile => (batch file name, list of object texts, list of index entries)
+        self.tile_counters = {}
+        self.files_written = 0
+
+    def add(self, way_id: int, in_output_file: str, in_position: str, in_dc_header: dict, in_text):
+        lon, lat = (float(value) for value in in_position.split()[:2])
+        tile = (math.floor(lat), math.floor(lon))
+        if tile not in self.open_batches:
+            self.tile_counters[tile] = self.tile_counters.get(tile, 0) + 1
+            extension = ".mesh" if isinstance(in_text, bytes) else ".obj"
+            batch_path = self.out_path
+            if self.dc_config.get(CONFIG_WORK_FOLDER_SHARDED, False):
+                batch_path = os.path.join(self.out_path, dsf_tile_name(lat, lon))  # the tile folder, above the way_id folders
+            os.makedirs(staged_path(self.dc_config, batch_path), exist_ok=True)
+            batch_file = staged_path(self.dc_config, os.path.join(batch_path, f'xx_tile_({tile[0]}_{tile[1]})_{self.tile_counters[tile]:04d}_batch{extension}'))
+            self.open_batches[tile] = (batch_file, [], [])
+
+        batch_file, ls_texts, ls_index = self.open_batches[tile]
+        ls_texts.append(in_text)
+        ls_index.append({"object": f'way_{way_id}', K_WAY_ID: way_id, "file": in_output_file, "position": in_position,
+                         "header": in_dc_header})
+        append_manifest_line(self.dc_config, CONF_OUTPUT_OBJ_FILES, f'{in_output_file}|{in_position}|{way_id}|{batch_file}\n')
+
+        if len(ls_index) >= self.batch_size:
+            self.flush(tile)
+
+    def flush(self, tile):
+        batch_file, ls_texts, ls_index = self.open_batches.pop(tile)
+        self.files_written += 1
+
+        if isinstance(ls_texts[0], bytes):
+            write_output_text(batch_file, pack_binary_mesh_file(ls_texts))
+            return
+
+        # Header keys with the same value in all objects go to the file header, the sidecar index has the rest
+        dc_common = dict(ls_index[0]["header"])
+        for entry in ls_index[1:]:
+            dc_common = {key: value for key, value in dc_common.items() if entry["header"].get(key) == value}
+
+        s_header = f"# $0 {G_VERSION}\n# batch 1\n" + "".join(f"# {key} {value}\n" for key, value in dc_common.items())
+        write_output_text(batch_file, s_header + "".join(ls_texts))
+        write_output_text(f'{os.path.splitext(batch_file)[0]}.idx', "".join(json.dumps(entry) + "\n" for entry in ls_index))
+
+    def close(self):
+        for tile in list(self.open_batches.keys()):
+            self.flush(tile)
+
+        print(f'Wrote {self.files_written} WaveFront batch files.')
+
+
 def check_skip_and_resume_settings(in_dc_config: dict, in_resume_lvl_needed: int, in_output_file, in_output_file_obj8,
                                    lon_lat_way_id_s):
     global CONF_OUTPUT_OBJ_RESUME_FILES_NAME
 
+    # "incremental_rebuild" decides by the way fingerprint, an existing OBJ8 file may be out of date
+    if in_dc_config.get(CONFIG_INCREMENTAL_REBUILD, False):
+        return False
+
     # Check if file exists and larger than 500 bytes then skip.
     if in_dc_config.get(CONFIG_SKIP_RULE, "") != "" and in_dc_config.get(CONFIG_SKIP_RULE, 0) == 5:
         if Path(in_output_file_obj8).exists() and Path(in_output_file_obj8).stat().st_size > 500:
             print(f'SKIPPING file: {in_output_file!r} because {in_output_file_obj8!r} exists. Based on filter...')
 
-            with open(file=in_dc_config.get(CONF_OUTPUT_OBJ_RESUME_FILES_NAME), mode="a", encoding="utf8") as text_file:
-                text_file.write(f'{in_output_file_obj8}|{lon_lat_way_id_s}\n')  # will be used after DSF
-                return True
+            # will be used after DSF
+            append_manifest_line(in_dc_config, CONF_OUTPUT_OBJ_RESUME_FILES_NAME, f'{in_output_file_obj8}|{lon_lat_way_id_s}\n')
+            return True
 
     return False
 
 
+def open_fingerprint_store(in_dc_config: dict):
+    """ "incremental_rebuild": the fingerprints live in the work folder, next to the OBJ8 files they describe,
+    since the osm database is rebuilt on every run. The OBJ8 paths are relative, so the work folder can be moved. """
+    store_file = os.path.join(in_dc_config.get(CONFIG_WORK_FOLDER, "out"), DEFAULT_FINGERPRINT_STORE_FILE)
+    try:
+        os.makedirs(os.path.dirname(store_file) or ".", exist_ok=True)
+        conn = sqlite3.connect(store_file)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS way_fingerprints (
+                way_id integer PRIMARY KEY,
+                version integer,
+                geometry_hash text,
+                config_hash text,
+                position text,
+                file_name_obj8 text
+            )
+        """)
+        conn.commit()
+    except (OSError, Error) as store_err:
+        print(f'[Error] Failed to open the fingerprint store: {store_file!r}\n{store_err}')
+        sys.exit(1)
+
+    return conn
+
+
+def config_fingerprint(in_dc_config: dict) -> str:
+    """ Hash of everything a way is built with, besides its own data: the script version, the config values
+    and the texture rules file. Changing any of them rebuilds all the ways. """
+    dc_relevant = {key: value for key, value in in_dc_config.items()
+                   if key not in FINGERPRINT_IGNORED_CONFIG_KEYS and key not in output_manifest_keys(in_dc_config)}
+    fingerprint = hashlib.sha1(G_VERSION.encode("utf8"))
+    fingerprint.update(json.dumps(dc_relevant, sort_keys=True, default=str).encode("utf8"))
+
+    xml_file = in_dc_config.get(CONFIG_BLEND_UV_XML_CONFIG_FILE, DEFAULT_UV_XML_CONFIG_FILE)
+    try:
+        with open(xml_file, "rb") as xml_in:
+            fingerprint.update(xml_in.read())
+    except OSError:
+        pass  # reported by read_texture_rules()
+
+    return fingerprint.hexdigest()
+
+
+def way_fingerprint(conn, way_id) -> tuple:
+    """ (OSM version, hash of the node coordinates and the tags) of a way. The version is 0 when the overpass
+    query did not ask for it, the hash alone still finds the edited buildings. """
+    rows = exec_query_stmt(conn, f"select version from {G_WAYS_INFO_TABLE} where way_id = ?", [way_id])
+    version = rows[0][0] if rows else 0
+
+    fingerprint = hashlib.sha1()
+    stmt = f"""select n.lat, n.lon from {G_WAYS_TABLE} w, {G_NODES_TABLE} n
+               where w.way_id = ? and n.node_id = w.node_id order by w.seq"""
+    for lat, lon in exec_query_stmt(conn, stmt, [way_id]):
+        fingerprint.update(f'{lat!r},{lon!r};'.encode("utf8"))
+    for k, v in exec_query_stmt(conn, f"select k, v from {G_WAYS_META_TABLE} where way_id = ? order by k", [way_id]):
+        fingerprint.update(f'{k}={v};'.encode("utf8"))
+
+    return version, fingerprint.hexdigest()
+
+
+def filter_unchanged_ways(conn, in_dc_config: dict, in_way_ids: list) -> list:
+    """ "incremental_rebuild": returns the ways to rebuild. The OBJ8 file of an unchanged way is reused, it goes to the
+    resume manifest like a skipped file. The fingerprints of the other ways wait in G_WAY_FINGERPRINTS for their export. """
+    global G_FINGERPRINT_STORE
+
+    if G_FINGERPRINT_STORE is None:
+        G_FINGERPRINT_STORE = open_fingerprint_store(in_dc_config)
+    G_WAY_FINGERPRINTS.clear()
+
+    work_path = in_dc_config.get(CONFIG_WORK_FOLDER, "out")
+    config_hash = config_fingerprint(in_dc_config)
+    ls_rebuild = []
+    for way_id in in_way_ids:
+        version, geometry_hash = way_fingerprint(conn, way_id)
+        stored = G_FINGERPRINT_STORE.execute(
+            "select version, geometry_hash, config_hash, position, file_name_obj8 from way_fingerprints where way_id = ?",
+            [way_id]).fetchone()
+        if stored is not None and tuple(stored[:3]) == (version, geometry_hash, config_hash):
+            obj8_file = os.path.join(work_path, stored[4])
+            if os.path.isfile(obj8_file) and os.path.getsize(obj8_file) > 500:
+                append_manifest_line(in_dc_config, CONF_OUTPUT_OBJ_RESUME_FILES_NAME, f'{obj8_file}|{stored[3]}|{way_id}\n')
+                continue
+
+        G_WAY_FINGERPRINTS[str(way_id)] = (version, geometry_hash, config_hash)
+        ls_rebuild.append(way_id)
+
+    print(f'>> Incremental rebuild: {len(ls_rebuild)} changed ways, {len(in_way_ids) - len(ls_rebuild)} up to date.<<')
+    return ls_rebuild
+
+
+def store_way_fingerprint(in_dc_config: dict, way_id, in_obj8_file: str, in_position: str):
+    """ "incremental_rebuild": record the fingerprint of a way once its OBJ8 file is in the work folder.
+    Committed per building, so a failed run resumes from the last exported one. """
+    fingerprint = G_WAY_FINGERPRINTS.pop(str(way_id).strip(), None)
+    if G_FINGERPRINT_STORE is None or fingerprint is None or not os.path.isfile(in_obj8_file):
+        return
+
+    work_path = in_dc_config.get(CONFIG_WORK_FOLDER, "out")
+    relative_file = Path(os.path.relpath(in_obj8_file, work_path)).as_posix()
+    # An edit that moved the building renames its OBJ8 file (the name holds the position), drop the previous one
+    stored = G_FINGERPRINT_STORE.execute("select file_name_obj8 from way_fingerprints where way_id = ?", [int(way_id)]).fetchone()
+    if stored is not None and stored[0] != relative_file and os.path.isfile(os.path.join(work_path, stored[0])):
+        os.remove(os.path.join(work_path, stored[0]))
+
+    G_FINGERPRINT_STORE.execute(
+        "insert or replace into way_fingerprints (way_id, version, geometry_hash, config_hash, position, file_name_obj8) "
+        "values (?, ?, ?, ?, ?, ?)", [int(way_id), *fingerprint, in_position.strip(), relative_file])
+    G_FINGERPRINT_STORE.commit()
+
+
+def normalized_mesh_bytes(in_mesh_file: str) -> bytes:
+    """ "obj8_store_folder": the content of an intermediate mesh file, without what identifies the building.
+    The WaveFront file is already in the building local frame. The meta of a binary mesh record also holds the way_id,
+    the file name and the position, they are dropped. """
+    with open(in_mesh_file, "rb") as mesh_in:
+        data = mesh_in.read()
+    if not in_mesh_file.endswith(".mesh"):
+        return data
+
+    ls_parts = [data[:12]]
+    offset = 12
+    for _ in range(struct.unpack_from("<4sII", data)[2]):
+        meta_length, vertices, faces, loops, has_uv = struct.unpack_from("<5I", data, offset)
+        offset += 20
+        dc_meta = json.loads(data[offset:offset + meta_length])
+        offset += meta_length
+        record_size = 4 * (3 * vertices + faces + loops + (2 * loops if has_uv else 0))
+        ls_parts.append(json.dumps(dc_meta.get("header", {}), sort_keys=True).encode("utf8"))
+        ls_parts.append(data[offset:offset + record_size])
+        offset += record_size
+
+    return b"".join(ls_parts)
+
+
+def obj8_store_key(in_config_hash: str, in_mesh_file: str, in_dc_job_entry: dict) -> str:
+    """ "obj8_store_folder": content address of the OBJ8 file Blender exports from a mesh file. It covers everything
+    Blender receives: the normalized mesh, the way metadata, texture set and texture zones of its job entry, the config
+    values and the texture rules (see config_fingerprint()). """
+    key = hashlib.sha1(in_config_hash.encode("utf8"))
+    key.update(json.dumps({key: in_dc_job_entry.get(key) for key in (K_WAY_META, K_TEXTURE_INDEX, K_TEXTURE_ZONES)},
+                          sort_keys=True, default=str).encode("utf8"))
+    key.update(normalized_mesh_bytes(in_mesh_file))
+    return key.hexdigest()
+
+
+def obj8_store_path(in_dc_config: dict, in_key: str) -> str:
+    """ "{obj8_store_folder}/{first 2 hex digits}/{key}_obj8.obj". The file name is also the library name of the object. """
+    return os.path.join(in_dc_config.get(CONFIG_OBJ8_STORE_FOLDER), in_key[:2], f'{in_key}_obj8.obj')
+
+
+def copy_file_atomic(in_source_file: str, in_target_file: str):
+    """ Copy through a temporary file, so a concurrent run never reads a partial OBJ8 file. Not a hard link:
+    Blender rewrites the work folder OBJ8 files in place, which would change the stored one too. """
+    os.makedirs(os.path.dirname(in_target_file), exist_ok=True)
+    temp_file = f'{in_target_file}.{os.getpid()}.tmp'
+    shutil.copyfile(in_source_file, temp_file)
+    os.replace(temp_file, in_target_file)
+
+
+def close_fingerprint_store():
+    global G_FINGERPRINT_STORE
+
+    if G_FINGERPRINT_STORE is not None:
+        G_FINGERPRINT_STORE.close()
+        G_FINGERPRINT_STORE = None
+
+
 def parse_osm_node(conn=object(), in_dict=None):
     if in_dict is None:
         in_dict = {}
@@ -485,6 +1077,11 @@ def parse_osm_way(conn=object(), in_dict=None):
 
         seq += 1
 
+    # The OSM version is only available with "out meta;" in the overpass query
+    if in_dict.get("version") is not None:
+        stmt = f"insert or replace into {G_WAYS_INFO_TABLE} (way_id, version) values (?, ?)"
+        exec_stmt(conn, stmt, [way_id, in_dict["version"]])
+
     # Read <tag>s
     binds.clear()
     if in_dict.get("tags") is not None:
@@ -736,7 +1333,51 @@ def parse_osm_building_nodes(conn, in_dc_config: dict, in_data: dict) -> list[An
     return osm_filter_list
 
 
+def store_native_obj8_fingerprints(in_dc_config: dict, in_set_way_ids: set = None):
+    """ "incremental_rebuild": the native OBJ8 files are exported with the WaveFront files, their fingerprints are stored
+    like after Blender. "in_set_way_ids": only these ways (as strings). """
+    if not (in_dc_config.get(CONFIG_INCREMENTAL_REBUILD, False) and in_dc_config.get(CONFIG_NATIVE_OBJ8_WRITER, False)):
+        return
+
+    with open(file=in_dc_config.get(CONF_OUTPUT_OBJ_RESUME_FILES_NAME), mode='r', encoding='utf8') as resume_file:
+        for line in resume_file:
+            obj8_file, position, way_id = line.rstrip("\n").split("|")[:3]
+            if in_set_way_ids is None or way_id in in_set_way_ids:
+                store_way_fingerprint(in_dc_config, way_id, obj8_file, position)
+
+
+def build_archetype_orphans(db, in_dc_config: dict, in_way_ids: list, in_b_sqlite_supports_math: bool) -> tuple:
+    """ "archetype_instancing": build the instances whose archetype has no OBJ8 file, like any other way: their WaveFront
+    files, then one more Blender round. The Blender manifests only list them during this round, the lines of the first
+    round are put back after it. Returns the prepared, skipped and Blender processed counts. """
+    global G_PREPARED_FILES_TO_PROCESS
+
+    print(f'\n>> Building {len(in_way_ids)} archetype instances on their own.<<\n')
+    dc_first_round_lines = {}  # manifest file => its lines
+    for manifest_key in (CONF_OUTPUT_OBJ_FILES, CONF_OUTPUT_BLENDER_JOBS):
+        manifest_file = in_dc_config.get(manifest_key, f'{manifest_key}.txt')
+        with open(file=manifest_file, mode='a+', encoding='utf8') as manifest_io:
+            manifest_io.seek(0)
+            dc_first_round_lines[manifest_file] = manifest_io.read()
+            manifest_io.truncate(0)
+
+    i_processed = sum(prepare_building_wavefront(db, way_id, in_dc_config, in_b_sqlite_supports_math) for way_id in in_way_ids)
+    G_PREPARED_FILES_TO_PROCESS = i_processed
+    store_native_obj8_fingerprints(in_dc_config, {str(way_id) for way_id in in_way_ids})
+    i_blended = call_blender_v1(in_dc_config=in_dc_config, conn=db, in_b_next_round=True)
+
+    for manifest_file, text in dc_first_round_lines.items():
+        with open(file=manifest_file, mode='r+', encoding='utf8') as manifest_io:
+            text += manifest_io.read()
+            manifest_io.seek(0)
+            manifest_io.write(text)
+
+    return i_processed, len(in_way_ids) - i_processed, i_blended
+
+
 def process_osm_building_nodes(db, in_dc_config: dict, main_osm_id_list: list):
+    global G_WAVEFRONT_WRITER
+
     way_counter = len(main_osm_id_list)
     # Step 2 - Create indexes after we parsed all data for better query performance
     post_overpass_index_creation(db)
@@ -749,11 +1390,27 @@ def process_osm_building_nodes(db, in_dc_config: dict, main_osm_id_list: list):
 
         # G_PREPARED_FILES_TO_PROCESS = 0
 
+        # Validate and repair footprints, so degenerate ways never reach Blender
+        if in_dc_config.get(CONFIG_SANITIZE_FOOTPRINTS, False):
+            main_osm_id_list = sanitize_footprints(conn=db, in_dc_config=in_dc_config,
+                                                   in_building_id_list=main_osm_id_list)
+
+        if in_dc_config.get(CONFIG_WAVEFRONT_BACKGROUND_WRITER, True):
+            G_WAVEFRONT_WRITER = WavefrontWriter(in_dc_config)
+
         # flag_sqlite_support_math_functions is for windows
-        i_processed_files, i_skipped_files = parse_osm_to_wavefront_obj(conn=db, in_dc_config=in_dc_config
-                                                                        , in_building_id_list=main_osm_id_list
-                                                                        ,
-                                                                        in_b_sqlite_supports_math=flag_sqlite_support_math_functions)
+        try:
+            i_processed_files, i_skipped_files = parse_osm_to_wavefront_obj(conn=db, in_dc_config=in_dc_config
+                                                                            , in_building_id_list=main_osm_id_list
+                                                                            ,
+                                                                            in_b_sqlite_supports_math=flag_sqlite_support_math_functions)
+        finally:
+            # Blender reads the manifest and the WaveFront files, everything must be on disk
+            if G_WAVEFRONT_WRITER is not None:
+                G_WAVEFRONT_WRITER.close()
+                G_WAVEFRONT_WRITER = None
+
+        store_native_obj8_fingerprints(in_dc_config)
 
         print(f"\n>> OBJ_FILES Prepared: [{i_processed_files}|{i_processed_files + i_skipped_files}] files. "
               f"Skipped: [{i_skipped_files}].<<\n")  # v1.1
@@ -767,6 +1424,16 @@ def process_osm_building_nodes(db, in_dc_config: dict, main_osm_id_list: list):
             files_processed = call_blender_v1(in_dc_config=in_dc_config,
                                               conn=db)  # Recommended # v1.1 added DB connection
 
+        # "archetype_instancing": place the instances of the built archetypes, the others are built on their own
+        if in_dc_config.get(CONFIG_ARCHETYPE_INSTANCING, False):
+            ls_orphan_way_ids = place_archetype_instances(in_dc_config)
+            if ls_orphan_way_ids:
+                i_orphans_processed, i_orphans_skipped, i_orphans_blended = build_archetype_orphans(
+                    db, in_dc_config, ls_orphan_way_ids, flag_sqlite_support_math_functions)
+                i_processed_files += i_orphans_processed
+                i_skipped_files += i_orphans_skipped
+                files_processed += i_orphans_blended
+
         # Step 5 - Prepare DSF info file to manually load into WED
         msg = ""
         if in_dc_config.get(CONFIG_USE_SQLITE_FLOW, False):
@@ -777,6 +1444,11 @@ def process_osm_building_nodes(db, in_dc_config: dict, main_osm_id_list: list):
             msg = create_dsf_text_file_with_all_the_osm_objects_and_copy_to_destination_lib_v1(
                 in_dc_config=in_dc_config)
 
+        # "staging_folder": the OBJ8 files were persisted after each Blender run, drop the intermediates of this run
+        if in_dc_config.get(CONFIG_STAGING_WORK_FOLDER, "") != "":
+            shutil.rmtree(in_dc_config.get(CONFIG_STAGING_WORK_FOLDER), ignore_errors=True)
+        close_fingerprint_store()
+
         # General message
         print("""\nIf you would like to change the textures to "DDS" from "PNG", you should do the following:
         1. Convert the image to a DDS file using DDSTool application:
@@ -794,11 +1466,86 @@ def process_osm_building_nodes(db, in_dc_config: dict, main_osm_id_list: list):
         print(
             f">> OBJ_FILES Prepared: [{i_processed_files}/{i_processed_files + i_skipped_files}] files. Pre-Processed Skipped: [{i_skipped_files}].<<")  # v1.1
         print(f">> Blender Processed: {files_processed} files.<<")
+        print(f">> WaveFront geometry: {G_WAVEFRONT_VERTICES} vertices, {G_WAVEFRONT_FACES} faces.<<")
+        if in_dc_config.get(CONFIG_NATIVE_OBJ8_WRITER, False):
+            print(f">> Native OBJ8 files: {G_NATIVE_OBJ8_FILES}, without Blender.<<")
+        if in_dc_config.get(CONFIG_OBJ8_STORE_FOLDER, "") != "":
+            print(f">> OBJ8 store: {G_OBJ8_STORE_HITS} buildings found, {len(G_OBJ8_STORE_FILES) - G_OBJ8_STORE_HITS} stored.<<")
+        if in_dc_config.get(CONFIG_ARCHETYPE_INSTANCING, False):
+            print(f">> Archetype instances: {G_ARCHETYPE_INSTANCES} buildings placed without their own OBJ8 file.<<")
+        if in_dc_config.get(CONFIG_WAVEFRONT_TRIANGULATE_CAPS, False):
+            print(f">> Caps triangulation took: {G_TRIANGULATION_SECONDS:.3f} seconds.<<")
+
+        if in_dc_config.get(CONFIG_SIMPLIFY_FOOTPRINT, False) and G_FOOTPRINT_VERTICES_IN > 0:
+            reduction = 100.0 * (G_FOOTPRINT_VERTICES_IN - G_FOOTPRINT_VERTICES_OUT) / G_FOOTPRINT_VERTICES_IN
+            print(f">> Footprint simplification: {G_FOOTPRINT_VERTICES_IN} -> {G_FOOTPRINT_VERTICES_OUT} vertices. "
+                  f"Walls reduced by {reduction:.1f}%.<<")
 
         if msg != "":
             print(f'>> DSF Message: {msg!r}')
 
 
+def process_osm_facade_nodes(db, in_dc_config: dict, main_osm_id_list: list):
+    """ "facade" mode: every building footprint becomes a facade polygon (POLYGON_DEF/BEGIN_POLYGON) of the DSF,
+    with the height decide_building_height() computes. X-Plane builds the walls and the roof, there is no Blender step. """
+    post_overpass_index_creation(db)
+
+    facade_file = in_dc_config.get(CONFIG_FACADE_FILE, "")
+    if facade_file == "":
+        print(f'[Error] "mode" is {OPT_MODE_FACADE!r} but {CONFIG_FACADE_FILE!r} is not set. Aborting.')
+        sys.exit(1)
+
+    if in_dc_config.get(CONFIG_SANITIZE_FOOTPRINTS, False):
+        main_osm_id_list = sanitize_footprints(conn=db, in_dc_config=in_dc_config, in_building_id_list=main_osm_id_list)
+    if in_dc_config.get(CONFIG_SPATIAL_ORDER, "") != "":
+        main_osm_id_list = sort_ways_by_spatial_order(db, in_dc_config, main_osm_id_list)
+
+    b_sqlite_supports_math = in_dc_config.get(CONFIG_SQLITE_SUPPORT_MATH, True)
+    ls_polygons = []
+    for way_id in main_osm_id_list[:in_dc_config.get(CONFIG_LIMIT, DEFAULT_LIMIT_FILES)]:
+        dc_rows = fetch_osm_info_from_db(db, [way_id], b_sqlite_supports_math)
+        if len(dc_rows) < 4:  # 3 corners and the closing node
+            continue
+
+        ls_rows = list(dc_rows.values())
+        mx_vert_length = max((row[K_MT_DISTANCE] or 0.0) for row in ls_rows)
+        f_height, building_levels, dc_way_meta = decide_building_height(db, way_id, in_dc_config, mx_vert_length,
+                                                                        ls_rows[-1][K_PERIMETER])
+
+        # The closing node is not repeated, and the ring is written counter-clockwise
+        ls_points = [(float(row[K_LON]), float(row[K_LAT])) for row in ls_rows if row[K_SEQ] < row[K_MAX_SEQ]]
+        signed_area = sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ls_points, ls_points[1:] + ls_points[:1]))
+        if signed_area < 0:
+            ls_points.reverse()
+
+        ls_polygons.append((way_id, max(1, round(f_height)), ls_points))
+
+    output_folder = in_dc_config.get(CONFIG_OUTPUT_FOLDER_FOR_THE_DSF_TEXT, '') or os.getcwd()
+    postfix = in_dc_config.get(CONFIG_OSM_BBOX, '').replace(',', '_')
+    output_dsf_text = os.path.join(output_folder, f'{DEFAULT_DSF_FACADE_TEXT_OUTPUT_FILE_NAME}_{postfix}.txt')
+    try:
+        with open(DEFAULT_INPUT_DSF_TEMPLATE_FILE_NAME, 'r', encoding='utf8') as input_template:
+            ls_lines = [input_template.read(), "PROPERTY sim/require_facade 1/0\n", f'POLYGON_DEF {Path(facade_file).as_posix()}\n\n']
+
+        # The facade height (meters) is the polygon parameter, every point is "lon lat"
+        for way_id, i_height, ls_points in ls_polygons:
+            ls_lines.append(f'# way_id {way_id}\nBEGIN_POLYGON 0 {i_height} 2\nBEGIN_WINDING\n')
+            ls_lines.extend(f'POLYGON_POINT {lon:.9f} {lat:.9f}\n' for lon, lat in ls_points)
+            ls_lines.append('END_WINDING\nEND_POLYGON\n')
+
+        with open(output_dsf_text, 'w', encoding='utf8') as dsf_text_out:
+            dsf_text_out.write("".join(ls_lines))
+    except OSError as ose:
+        print(f"Fail to write to {output_dsf_text!r} file.\n{ose}")
+        sys.exit(1)
+
+    print(f"\n>> Found: {len(main_osm_id_list)} way_id that represent buildings.<<")
+    print(f">> Facade polygons: {len(ls_polygons)}, written to: {output_dsf_text!r}.<<")
+
+    if in_dc_config.get(CONFIG_ROOT_SCENERY_FOLDER_TO_COPY_OBJ8_FILES, '') != '' and len(ls_polygons) > 0:
+        convert_dsf_text_and_copy_to_scenery(in_dc_config, output_folder, output_dsf_text)
+
+
 def call_overpass (bbox_coord: str, in_dc_config: dict = dict, in_overpass_json_file_name: str = ''):
     # initialize if to use overpass or local cached result
     b_use_overpass = True if bbox_coord != '' and in_overpass_json_file_name == '' else False
@@ -815,7 +1562,7 @@ def call_overpass (bbox_coord: str, in_dc_config: dict = dict, in_overpass_json_
     """
 
     overpass_query = in_dc_config.get(CONFIG_OBJ_FILTER, overpass_query) \
-                     if in_dc_config.get(CONFIG_MODE, "") in ["", OPT_MODE_OBJ] else in_dc_config.get( CONFIG_HELIPAD_FILTER, "")
+                     if in_dc_config.get(CONFIG_MODE, "") in ["", OPT_MODE_OBJ, OPT_MODE_FACADE] else in_dc_config.get( CONFIG_HELIPAD_FILTER, "")
     # replace "{{bbox}}"
     overpass_query = overpass_query.replace("{{bbox}}", bbox_coord)
 
@@ -885,6 +1632,10 @@ def fetch_osm_data_in_bbox_and_call_task_by_mode_value(db, bbox_coord: str, in_d
             db = initialize_database ( in_dc_config=in_dc_config)
             osm_filter_list = parse_osm_building_nodes(conn=db, in_dc_config=in_dc_config, in_data=data)
             process_osm_building_nodes(db=db, in_dc_config=in_dc_config, main_osm_id_list=osm_filter_list)
+        elif in_dc_config.get(CONFIG_MODE, "") == OPT_MODE_FACADE:
+            db = initialize_database(in_dc_config=in_dc_config)
+            osm_filter_list = parse_osm_building_nodes(conn=db, in_dc_config=in_dc_config, in_data=data)
+            process_osm_facade_nodes(db=db, in_dc_config=in_dc_config, main_osm_id_list=osm_filter_list)
         elif in_dc_config.get(CONFIG_MODE, "") == OPT_MODE_HELIPAD:
             parse_osm_helipad_nodes(in_dc_config=in_dc_config, in_data=data)
         else:
@@ -917,6 +1668,1166 @@ def calculate_new_coordinates(start_x: float, start_y: float, distance_meters: f
     return new_x, new_y
 
 
+# ----------------------------------------
+# -  Footprint simplification   ----------
+# ----------------------------------------
+# The footprint is a closed ring of [x, y, z] vertices (y is always 0), the closing vertex is not repeated.
+# Each vertex we remove is one less wall quad per building level in the WaveFront file, in Blender and in the OBJ8.
+
+def distance_point_to_segment_xz(point: list, seg_start: list, seg_end: list) -> float:
+    """ Return the distance in meters between a vertex and a segment on the X/Z plane. """
+    dx = seg_end[0] - seg_start[0]
+    dz = seg_end[2] - seg_start[2]
+    seg_len_sq = dx * dx + dz * dz
+    if seg_len_sq == 0.0:
+        return math.hypot(point[0] - seg_start[0], point[2] - seg_start[2])
+
+    t = ((point[0] - seg_start[0]) * dx + (point[2] - seg_start[2]) * dz) / seg_len_sq
+    t = max(0.0, min(1.0, t))
+    return math.hypot(point[0] - (seg_start[0] + t * dx), point[2] - (seg_start[2] + t * dz))
+
+
+def prune_ring_vertices(vt_list: list, in_fn_remove) -> list:
+    """ Remove the vertices "in_fn_remove(prev_pt, curr_pt, next_pt)" selects, in one pass: after a removal only the
+    neighbours of the removed vertex are checked again. Same result as restarting the scan after each removal. """
+    points = list(vt_list)
+    indx = 0
+    b_recheck_last = False  # the last vertex was removed: vertex 0 and the new last vertex have a new neighbour
+    while indx < len(points) and len(points) > 3:
+        if in_fn_remove(points[indx - 1], points[indx], points[(indx + 1) % len(points)]):
+            del points[indx]
+            if indx == len(points):
+                indx = 0
+                b_recheck_last = True
+            else:
+                indx = max(indx - 1, 0)  # the previous vertex has a new neighbour
+        elif b_recheck_last:
+            indx = len(points) - 1  # the vertices in between did not change
+            b_recheck_last = False
+        else:
+            indx += 1
+
+    return points
+
+
+def merge_collinear_vertices(vt_list: list, in_angle_tolerance_deg: float) -> list:
+    """ Remove vertices where the incoming and outgoing edges turn less than "in_angle_tolerance_deg" degrees. """
+
+    def is_collinear(prev_pt: list, curr_pt: list, next_pt: list) -> bool:
+        heading_in = math.atan2(curr_pt[2] - prev_pt[2], curr_pt[0] - prev_pt[0])
+        heading_out = math.atan2(next_pt[2] - curr_pt[2], next_pt[0] - curr_pt[0])
+        turn_deg = math.fabs(math.degrees(heading_out - heading_in))
+        return min(turn_deg, 360.0 - turn_deg) < in_angle_tolerance_deg
+
+    return prune_ring_vertices(vt_list, is_collinear)
+
+
+def remove_footprint_spikes(vt_list: list, in_spike_length_mt: float) -> list:
+    """ Remove vertices that sit closer than "in_spike_length_mt" to a neighbour
+    or stick out less than "in_spike_length_mt" from the line between their neighbours. """
+
+    def is_spike(prev_pt: list, curr_pt: list, next_pt: list) -> bool:
+        shortest_edge = min(math.hypot(curr_pt[0] - prev_pt[0], curr_pt[2] - prev_pt[2]),
+                            math.hypot(next_pt[0] - curr_pt[0], next_pt[2] - curr_pt[2]))
+        return (shortest_edge < in_spike_length_mt
+                or distance_point_to_segment_xz(curr_pt, prev_pt, next_pt) < in_spike_length_mt)
+
+    return prune_ring_vertices(vt_list, is_spike)
+
+
+def douglas_peucker_ring(vt_list: list, in_tolerance_mt: float) -> list:
+    """ Run Douglas-Peucker on a closed ring.
+    The ring is split at the first vertex and the vertex farthest from it, so both anchors are always kept. """
+    if len(vt_list) < 4 or in_tolerance_mt <= 0.0:
+        return list(vt_list)
+
+    first_pt = vt_list[0]
+    far_indx = max(range(1, len(vt_list)),
+                   key=lambda i: math.hypot(vt_list[i][0] - first_pt[0], vt_list[i][2] - first_pt[2]))
+
+    keep = [False] * len(vt_list)
+    keep[0] = keep[far_indx] = True
+
+    # Each stack item is a (start, end) index pair, "end" may be len(vt_list) which represents vertex 0 again.
+    stack = [(0, far_indx), (far_indx, len(vt_list))]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        seg_start = vt_list[start]
+        seg_end = vt_list[end % len(vt_list)]
+        max_dist = -1.0
+        max_indx = start
+        for indx in range(start + 1, end):
+            dist = distance_point_to_segment_xz(vt_list[indx], seg_start, seg_end)
+            if dist > max_dist:
+                max_dist = dist
+                max_indx = indx
+
+        if max_dist > in_tolerance_mt:
+            keep[max_indx] = True
+            stack.append((start, max_indx))
+            stack.append((max_indx, end))
+
+    points = [pt for indx, pt in enumerate(vt_list) if keep[indx]]
+    return points if len(points) > 2 else list(vt_list)
+
+
+def simplify_footprint(vt_list: list, in_dc_config: dict) -> list:
+    """ Footprint simplification stage: collinear merge, spike removal and Douglas-Peucker.
+    Returns the simplified ring, or the original one if simplification would leave less than 3 vertices. """
+    angle_deg = float(in_dc_config.get(CONFIG_SIMPLIFY_COLLINEAR_ANGLE_DEG, DEFAULT_SIMPLIFY_COLLINEAR_ANGLE_DEG))
+    spike_mt = float(in_dc_config.get(CONFIG_SIMPLIFY_SPIKE_LENGTH_MT, DEFAULT_SIMPLIFY_SPIKE_LENGTH_MT))
+    dp_tolerance_mt = float(in_dc_config.get(CONFIG_SIMPLIFY_DP_TOLERANCE_MT, DEFAULT_SIMPLIFY_DP_TOLERANCE_MT))
+
+    points = merge_collinear_vertices(vt_list, angle_deg) if angle_deg > 0.0 else list(vt_list)
+    points = remove_footprint_spikes(points, spike_mt) if spike_mt > 0.0 else points
+    points = douglas_peucker_ring(points, dp_tolerance_mt)
+
+    if len(points) < 3:
+        return list(vt_list)
+
+    return points
+
+
+def ring_signed_area_xz(vt_list: list) -> float:
+    """ Signed area of a footprint ring on the X/Z plane.
+    Positive when the ring is counter-clockwise seen from above (+Y), meaning its top face normal points up. """
+    area = 0.0
+    for indx in range(len(vt_list)):
+        curr_pt = vt_list[indx]
+        next_pt = vt_list[(indx + 1) % len(vt_list)]
+        area += next_pt[0] * curr_pt[2] - curr_pt[0] * next_pt[2]
+
+    return area * 0.5
+
+
+def make_ring_counter_clockwise(vt_list: list) -> list:
+    """ Return the ring in counter-clockwise order, seen from above. """
+    if ring_signed_area_xz(vt_list) < 0.0:
+        return list(reversed(vt_list))
+
+    return list(vt_list)
+
+
+def wall_outward_normal_xz(start_pt: list, end_pt: list) -> tuple:
+    """ Outward normal of a wall whose base runs from start_pt to end_pt on a counter-clockwise ring. """
+    dx = end_pt[0] - start_pt[0]
+    dz = end_pt[2] - start_pt[2]
+    length = math.hypot(dx, dz)
+    if length == 0.0:
+        return 0.0, 0.0, 0.0
+
+    return -dz / length, 0.0, dx / length
+
+
+# ----------------------------------------
+# -  Footprint sanitizer        ----------
+# ----------------------------------------
+# Degenerate OSM ways make Blender fail and "call_blender_v1()" aborts the whole batch.
+# We validate all footprints up front, repair what we can in the "ways" table and quarantine the rest.
+
+def segments_intersect_2d(p1: tuple, p2: tuple, p3: tuple, p4: tuple) -> bool:
+    """ Return True if segment p1-p2 crosses or touches segment p3-p4. """
+    def orientation(a, b, c):
+        value = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+        if math.fabs(value) < 1e-9:
+            return 0
+        return 1 if value > 0 else -1
+
+    def on_segment(a, b, c):  # c is collinear with a-b, check if it is inside the a-b box
+        return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+
+    o1 = orientation(p1, p2, p3)
+    o2 = orientation(p1, p2, p4)
+    o3 = orientation(p3, p4, p1)
+    o4 = orientation(p3, p4, p2)
+
+    if o1 != o2 and o3 != o4:
+        return True
+
+    return ((o1 == 0 and on_segment(p1, p2, p3)) or (o2 == 0 and on_segment(p1, p2, p4))
+            or (o3 == 0 and on_segment(p3, p4, p1)) or (o4 == 0 and on_segment(p3, p4, p2)))
+
+
+def ring_has_self_intersection(xs: list, ys: list) -> bool:
+    """ Test all non-adjacent edges of a closed ring (closing vertex not repeated) against each other. """
+    n = len(xs)
+    # Edge bounding boxes, computed once for the whole ring
+    edge_min_x = [min(xs[i], xs[(i + 1) % n]) for i in range(n)]
+    edge_max_x = [max(xs[i], xs[(i + 1) % n]) for i in range(n)]
+    edge_min_y = [min(ys[i], ys[(i + 1) % n]) for i in range(n)]
+    edge_max_y = [max(ys[i], ys[(i + 1) % n]) for i in range(n)]
+
+    for i in range(n):
+        for j in range(i + 2, n):
+            if i == 0 and j == n - 1:
+                continue  # adjacent through the closing vertex
+
+            if (edge_max_x[i] < edge_min_x[j] or edge_max_x[j] < edge_min_x[i]
+                    or edge_max_y[i] < edge_min_y[j] or edge_max_y[j] < edge_min_y[i]):
+                continue
+
+            if segments_intersect_2d((xs[i], ys[i]), (xs[(i + 1) % n], ys[(i + 1) % n]),
+                                     (xs[j], ys[j]), (xs[(j + 1) % n], ys[(j + 1) % n])):
+                return True
+
+    return False
+
+
+def hilbert_key(x: int, y: int, bits: int = SPATIAL_ORDER_BITS) -> int:
+    """ Distance of the cell (x, y) along the Hilbert curve that fills a 2^bits x 2^bits grid. """
+    key = 0
+    s = 1 << (bits - 1)
+    while s > 0:
+        rx = 1 if (x & s) > 0 else 0
+        ry = 1 if (y & s) > 0 else 0
+        key += s * s * ((3 * rx) ^ ry)
+        # rotate the quadrant, so the curve stays continuous
+        if ry == 0:
+            if rx == 1:
+                x = s - 1 - x
+                y = s - 1 - y
+            x, y = y, x
+        s >>= 1
+
+    return key
+
+
+def zorder_key(x: int, y: int, bits: int = SPATIAL_ORDER_BITS) -> int:
+    """ Morton code of the cell (x, y): the bits of x and y interleaved. """
+    key = 0
+    for bit in range(bits):
+        key |= ((x >> bit) & 1) << (2 * bit) | ((y >> bit) & 1) << (2 * bit + 1)
+
+    return key
+
+
+def sort_ways_by_spatial_order(conn, in_dc_config: dict, in_building_id_list: list) -> list:
+    """ "spatial_order": sort the ways by the Hilbert (or Z-order) key of their centroid, so neighbouring buildings are
+    processed together. Database pages, batches and output folders stay local, and a "limit" run covers one area. """
+    curve = in_dc_config.get(CONFIG_SPATIAL_ORDER, "")
+    if curve not in (SPATIAL_ORDER_HILBERT, SPATIAL_ORDER_ZORDER):
+        print(f'Unknown "spatial_order" value: {curve!r}, keeping the overpass order.')
+        return in_building_id_list
+
+    stmt = f"""select w.way_id, avg(n.lat) as lat, avg(n.lon) as lon from {G_WAYS_TABLE} w, {G_NODES_TABLE} n
+               where n.node_id = w.node_id group by w.way_id"""
+    dc_centroids = {row[K_WAY_ID]: (row[K_LAT], row[K_LON]) for row in exec_query_stmt(conn, stmt)}
+    if len(dc_centroids) == 0:
+        return in_building_id_list
+
+    min_lat = min(lat for lat, lon in dc_centroids.values())
+    min_lon = min(lon for lat, lon in dc_centroids.values())
+    span = max(max(lat for lat, lon in dc_centroids.values()) - min_lat,
+               max(lon for lat, lon in dc_centroids.values()) - min_lon) or 1.0
+    cells = (1 << SPATIAL_ORDER_BITS) - 1
+    curve_key = hilbert_key if curve == SPATIAL_ORDER_HILBERT else zorder_key
+
+    def way_key(way_id):
+        centroid = dc_centroids.get(way_id)
+        if centroid is None:
+            return -1  # no nodes, keep it first, the mesh stage reports it
+        return curve_key(int((centroid[1] - min_lon) / span * cells), int((centroid[0] - min_lat) / span * cells))
+
+    return sorted(in_building_id_list, key=way_key)
+
+
+def sanitize_footprints(conn, in_dc_config: dict, in_building_id_list: list) -> list:
+    """ Validate and repair all building footprints in one pass, before the WaveFront stage.
+    Repaired ways are re-written into the "ways" table, the rest are quarantined with a reason code.
+    Returns the list of way_id that passed validation, in the original order. """
+    close_tolerance_mt = float(in_dc_config.get(CONFIG_SANITIZE_CLOSE_TOLERANCE_MT, DEFAULT_SANITIZE_CLOSE_TOLERANCE_MT))
+    earth_radius_mt = 6371.0 * 1000.0
+
+    # Fetch the footprints of the given ways only, a few hundred ways per query (the SQLite bind variables limit).
+    # Rows are ordered, so each way is a contiguous block.
+    dc_columns = {}  # Column lists per way_id: node_ids, lat, lon
+    ls_way_ids = list(dict.fromkeys(in_building_id_list))
+    for chunk_start in range(0, len(ls_way_ids), SANITIZE_QUERY_CHUNK_SIZE):
+        ls_chunk = ls_way_ids[chunk_start:chunk_start + SANITIZE_QUERY_CHUNK_SIZE]
+        s_binds = ", ".join(["?"] * len(ls_chunk))
+        stmt = f'''select w.way_id, w.seq, w.node_id, n.lat, n.lon
+from {G_WAYS_TABLE} w
+left join {G_NODES_TABLE} n
+on w.node_id = n.node_id
+where w.way_id in ({s_binds})
+order by w.way_id, w.seq
+'''
+        rows = exec_query_stmt(conn, stmt, ls_chunk)
+        if rows is None:
+            print('Footprint sanitizer could not read the ways table. Skipping validation.')
+            return list(in_building_id_list)
+
+        for row in rows:
+            columns = dc_columns.setdefault(row[K_WAY_ID], ([], [], []))
+            columns[0].append(row["node_id"])
+            columns[1].append(row[K_LAT])
+            columns[2].append(row[K_LON])
+
+    dc_repaired = {}  # way_id: list of node_id, closing node included
+    dc_reason_counter = {}
+    ls_quarantine = []  # [way_id, reason, detail]
+    ls_passed_way_ids = []
+
+    for way_id in in_building_id_list:
+        node_ids, lats, lons = dc_columns.get(way_id, ([], [], []))
+        if len(node_ids) == 0 or None in lats or None in lons:
+            ls_quarantine.append([way_id, REASON_MISSING_NODES, f'{lats.count(None)} of {len(node_ids)} nodes have no coordinates'])
+            continue
+
+        # Project all nodes to meters, relative to the first node
+        cos_lat = math.cos(math.radians(lats[0]))
+        xs = [math.radians(lon - lons[0]) * earth_radius_mt * cos_lat for lon in lons]
+        ys = [math.radians(lat - lats[0]) * earth_radius_mt for lat in lats]
+
+        ls_reasons = []
+        # Work on an open ring, the closing node is added back when we write the repaired way
+        if len(node_ids) > 1 and node_ids[0] == node_ids[-1]:
+            node_ids, xs, ys = node_ids[:-1], xs[:-1], ys[:-1]
+        elif len(node_ids) > 1:
+            gap_mt = math.hypot(xs[-1] - xs[0], ys[-1] - ys[0])
+            if gap_mt > close_tolerance_mt:
+                ls_quarantine.append([way_id, REASON_UNCLOSED_RING, f'gap of {gap_mt:.2f} meters between first and last node'])
+                continue
+            ls_reasons.append(REASON_MISSING_CLOSING_NODE)
+
+        # Drop repeated nodes and zero length edges, the test wraps around to the first node
+        keep_indexes = []
+        for indx in range(len(node_ids)):
+            if keep_indexes:
+                prev_indx = keep_indexes[-1]
+                if node_ids[indx] == node_ids[prev_indx]:
+                    ls_reasons.append(REASON_REPEATED_NODES)
+                    continue
+                if math.hypot(xs[indx] - xs[prev_indx], ys[indx] - ys[prev_indx]) < DEFAULT_SANITIZE_ZERO_LENGTH_MT:
+                    ls_reasons.append(REASON_ZERO_LENGTH_EDGE)
+                    continue
+            keep_indexes.append(indx)
+
+        while len(keep_indexes) > 1 and (node_ids[keep_indexes[-1]] == node_ids[keep_indexes[0]] or math.hypot(
+                xs[keep_indexes[-1]] - xs[keep_indexes[0]],
+                ys[keep_indexes[-1]] - ys[keep_indexes[0]]) < DEFAULT_SANITIZE_ZERO_LENGTH_MT):
+            ls_reasons.append(REASON_ZERO_LENGTH_EDGE)
+            keep_indexes.pop()
+
+        node_ids = [node_ids[i] for i in keep_indexes]
+        xs = [xs[i] for i in keep_indexes]
+        ys = [ys[i] for i in keep_indexes]
+
+        if len(node_ids) < 3:
+            ls_quarantine.append([way_id, REASON_TOO_FEW_NODES, f'{len(node_ids)} unique nodes'])
+            continue
+
+        area_sq_mt = 0.5 * math.fabs(sum(xs[i] * ys[(i + 1) % len(xs)] - xs[(i + 1) % len(xs)] * ys[i]
+                                         for i in range(len(xs))))
+        if area_sq_mt < DEFAULT_SANITIZE_MIN_AREA_SQ_MT:
+            ls_quarantine.append([way_id, REASON_DEGENERATE_AREA, f'area of {area_sq_mt:.3f} square meters'])
+            continue
+
+        if ring_has_self_intersection(xs, ys):
+            ls_quarantine.append([way_id, REASON_SELF_INTERSECTION, f'{len(node_ids)} nodes'])
+            continue
+
+        if ls_reasons:
+            dc_repaired[way_id] = node_ids + [node_ids[0]]
+            for reason in set(ls_reasons):
+                dc_reason_counter[reason] = dc_reason_counter.get(reason, 0) + 1
+
+        ls_passed_way_ids.append(way_id)
+
+    # Write repaired ways back, so the WaveFront stage reads the clean footprint
+    if dc_repaired:
+        try:
+            conn.commit()  # close any implicit transaction before we start ours
+            conn.execute("BEGIN TRANSACTION;")
+            for way_id, repaired_node_ids in dc_repaired.items():
+                conn.execute(f"delete from {G_WAYS_TABLE} where way_id = ?", [way_id])
+                conn.executemany(f"insert into {G_WAYS_TABLE} (seq, way_id, node_id) values (?, ?, ?)",
+                                 [[seq + 1, way_id, node_id] for seq, node_id in enumerate(repaired_node_ids)])
+        except Error as err:
+            print(f'Error writing repaired footprints to SQLite: {err}')
+        finally:
+            conn.commit()
+
+    # Store the quarantined way_id so they can be inspected later
+    quarantine_file = in_dc_config.get(CONF_OUTPUT_QUARANTINE_FILE, f'{CONF_OUTPUT_QUARANTINE_FILE}.txt')
+    with open(file=quarantine_file, mode='w', encoding='utf8') as text_file:
+        for way_id, reason, detail in ls_quarantine:
+            dc_reason_counter[reason] = dc_reason_counter.get(reason, 0) + 1
+            text_file.write(f'{way_id}|{reason}|{detail}\n')
+
+    print(f'\n>> Footprint sanitizer: {len(ls_passed_way_ids)} passed, {len(dc_repaired)} repaired, '
+          f'{len(ls_quarantine)} quarantined (see {quarantine_file!r}).<<')
+    for reason, counter in dc_reason_counter.items():
+        print(f'\t{reason}: {counter}')
+
+    return ls_passed_way_ids
+
+
+# ----------------------------------------
+# -  Archetype instancing       ----------
+# ----------------------------------------
+# Most residential footprints repeat the same few shapes. With "archetype_instancing" the ways are grouped by their
+# footprint descriptor, only one way per group (the archetype) is built, and the others are placed in the DSF
+# as instances of its OBJ8 file, rotated to their own heading.
+
+def building_base_file(in_dc_config: dict, in_lat, in_lon, way_id) -> str:
+    """ Path of the intermediate files of one building, without the "_osm.obj" or "_osm_obj8.obj" suffix. """
+    return os.path.join(building_output_folder(in_dc_config, float(in_lat), float(in_lon), way_id),
+                        f'xx_({in_lat}_{in_lon})_{way_id}')
+
+
+def footprint_descriptor(in_ring: list, in_step_mt: float) -> dict:
+    """ Shape descriptor of a counter-clockwise footprint ring on the X/Z plane.
+    The ring is read from its canonical start vertex, the one whose edge lengths sequence (rounded to "in_step_mt")
+    is the largest, so the same shape gets the same descriptor whatever its first node and its orientation. """
+    n = len(in_ring)
+    ls_lengths = [math.hypot(in_ring[(i + 1) % n][0] - pt[0], in_ring[(i + 1) % n][2] - pt[2]) for i, pt in enumerate(in_ring)]
+    ls_rounded = [round(length / in_step_mt) for length in ls_lengths]
+    start = max(range(n), key=lambda i: ls_rounded[i:] + ls_rounded[:i])
+
+    start_pt, next_pt = in_ring[start], in_ring[(start + 1) % n]
+    edge_angle = math.atan2(next_pt[2] - start_pt[2], next_pt[0] - start_pt[0])
+    along = [pt[0] * math.cos(edge_angle) + pt[2] * math.sin(edge_angle) for pt in in_ring]
+    across = [pt[2] * math.cos(edge_angle) - pt[0] * math.sin(edge_angle) for pt in in_ring]
+
+    return {"edges": n,
+            "rounded_lengths": tuple(ls_rounded[start:] + ls_rounded[:start]),
+            "lengths": ls_lengths[start:] + ls_lengths[:start],
+            "area": abs(ring_signed_area_xz(in_ring)),
+            "aspect": (max(along) - min(along)) / max(max(across) - min(across), 0.001),
+            "start_pt": (start_pt[0], start_pt[2]),
+            "edge_angle": edge_angle}
+
+
+def archetype_distance(in_descriptor: dict, in_archetype: dict) -> float:
+    """ Largest edge length difference between a footprint and an archetype with the same edge count, in meters.
+    Returns infinity when their area or aspect ratio differ by more than ARCHETYPE_MAX_SHAPE_DIFF. """
+    if (abs(in_descriptor["area"] - in_archetype["area"]) > ARCHETYPE_MAX_SHAPE_DIFF * in_archetype["area"]
+            or abs(in_descriptor["aspect"] - in_archetype["aspect"]) > ARCHETYPE_MAX_SHAPE_DIFF * in_archetype["aspect"]):
+        return math.inf
+
+    return max(abs(a - b) for a, b in zip(in_descriptor["lengths"], in_archetype["lengths"]))
+
+
+def assign_building_archetypes(conn, in_dc_config: dict, in_building_id_list: list) -> list:
+    """ "archetype_instancing": group the ways by edge count, rounded edge lengths, levels, height and tags, and keep
+    the "archetype_max_count" largest groups as archetypes. The other ways join their closest archetype, if one is within
+    "archetype_tolerance_mt". Only ways that pass the wall length and perimeter filters can be archetypes.
+    The instances wait in G_ARCHETYPE_INSTANCE_LINES, with the OBJ8 file of their archetype and their own position and
+    heading, until place_archetype_instances() checks that this OBJ8 file was built. Returns the ways to build:
+    the archetypes and the ways that match none, in the original order. """
+
+    step_mt = float(in_dc_config.get(CONFIG_ARCHETYPE_TOLERANCE_MT, DEFAULT_ARCHETYPE_TOLERANCE_MT)) or DEFAULT_ARCHETYPE_TOLERANCE_MT
+    max_archetypes = int(in_dc_config.get(CONFIG_ARCHETYPE_MAX_COUNT, DEFAULT_ARCHETYPE_MAX_COUNT))
+    earth_radius_mt = 6371.0 * 1000.0
+
+    stmt = f'''select w.way_id, w.seq, n.lat, n.lon
+from {G_WAYS_TABLE} w, {G_NODES_TABLE} n
+where n.node_id = w.node_id
+order by w.way_id, w.seq
+'''
+    dc_nodes = {}
+    for row in exec_query_stmt(conn, stmt):
+        dc_nodes.setdefault(row[K_WAY_ID], []).append((row[K_LAT], row[K_LON]))
+
+    # Footprint of each way in the WaveFront frame: meters from its first node, X to the north and Z to the east
+    G_ARCHETYPE_INSTANCE_LINES.clear()
+    G_BUILDING_HEIGHTS.clear()
+    dc_descriptors = {}
+    dc_groups = {}
+    for way_id in in_building_id_list:
+        ls_nodes = dc_nodes.get(way_id, [])
+        if len(ls_nodes) < 4:  # 3 corners and the closing node
+            continue
+
+        lat0, lon0 = ls_nodes[0]
+        cos_lat = math.cos(math.radians(lat0))
+        ring = make_ring_counter_clockwise([[math.radians(lat - lat0) * earth_radius_mt, 0.0,
+                                             math.radians(lon - lon0) * earth_radius_mt * cos_lat]
+                                            for lat, lon in ls_nodes[:-1]])
+        descriptor = footprint_descriptor(ring, step_mt)
+        perimeter = sum(descriptor["lengths"])
+        if building_filter_message(in_dc_config, way_id, max(descriptor["lengths"]), perimeter) != "":
+            continue  # never built, so neither an archetype nor an instance
+
+        G_BUILDING_HEIGHTS[way_id] = decide_building_height(conn, way_id, in_dc_config, max(descriptor["lengths"]), perimeter)
+        f_height, building_levels, dc_way_meta = G_BUILDING_HEIGHTS[way_id]
+
+        descriptor["way_id"] = way_id
+        descriptor["position"] = ls_nodes[-1]  # the closing node, like the manifest line of the way
+        descriptor["class"] = (descriptor["edges"], building_levels, round(f_height / step_mt), tuple(sorted(dc_way_meta.items())))
+        dc_descriptors[way_id] = descriptor
+        dc_groups.setdefault((descriptor["class"], descriptor["rounded_lengths"]), []).append(descriptor)
+
+    # The most repeated shapes become the archetypes, the first way of the group is the one built
+    ls_groups = sorted((group for group in dc_groups.values() if len(group) > 1), key=len, reverse=True)[:max(max_archetypes, 0)]
+    dc_archetypes_by_class = {}
+    for group in ls_groups:
+        dc_archetypes_by_class.setdefault(group[0]["class"], []).append(group[0])
+
+    set_build = set()
+    i_instances = 0
+    for way_id in in_building_id_list:
+        descriptor = dc_descriptors.get(way_id)
+        ls_candidates = dc_archetypes_by_class.get(descriptor["class"], []) if descriptor is not None else []
+        archetype = min(ls_candidates, key=lambda candidate: archetype_distance(descriptor, candidate), default=None)
+        if archetype is None or archetype is descriptor or archetype_distance(descriptor, archetype) > step_mt:
+            set_build.add(way_id)
+            continue
+
+        # Rotate the archetype around its origin so its canonical edge lies on ours, then move its start vertex onto ours.
+        # The X/Z offset is applied as east/south meters, like the vertices of the OBJ8 file.
+        theta = descriptor["edge_angle"] - archetype["edge_angle"]
+        arch_x, arch_z = archetype["start_pt"]
+        offset_x = descriptor["start_pt"][0] - (arch_x * math.cos(theta) - arch_z * math.sin(theta))
+        offset_z = descriptor["start_pt"][1] - (arch_x * math.sin(theta) + arch_z * math.cos(theta))
+
+        lat0, lon0 = dc_nodes[way_id][0]
+        lat = lat0 - math.degrees(offset_z / earth_radius_mt)
+        lon = lon0 + math.degrees(offset_x / (earth_radius_mt * math.cos(math.radians(lat0))))
+        heading = math.degrees(theta) % 360.0
+
+        arch_lat, arch_lon = archetype["position"]
+        archetype_obj8 = building_base_file(in_dc_config, arch_lat, arch_lon, archetype["way_id"]) + "_osm_obj8.obj"
+        G_ARCHETYPE_INSTANCE_LINES.setdefault(archetype["way_id"], (archetype_obj8, []))[1].append(
+            (way_id, f'{archetype_obj8}|{lon:.9f} {lat:.9f} {heading:.2f}|{way_id}\n'))
+        G_WAY_FINGERPRINTS.pop(str(way_id), None)  # "incremental_rebuild" must not own, nor later delete, a shared OBJ8 file
+        i_instances += 1
+
+    print(f'>> Archetypes: {len(ls_groups)} archetypes, {i_instances} instances, '
+          f'{len(set_build) - len(ls_groups)} buildings without archetype.<<')
+    return [way_id for way_id in in_building_id_list if way_id in set_build]
+
+
+def place_archetype_instances(in_dc_config: dict) -> list:
+    """ "archetype_instancing": once the archetypes are built, write the instances of every archetype that has its OBJ8
+    file to the resume manifest. Returns the instances whose archetype has none (filtered out, failed or timed out in
+    Blender), they are built on their own. """
+    global G_ARCHETYPE_INSTANCES
+
+    ls_orphan_way_ids = []
+    for archetype_way_id, (archetype_obj8, ls_instances) in G_ARCHETYPE_INSTANCE_LINES.items():
+        if os.path.isfile(archetype_obj8):
+            for way_id, text in ls_instances:
+                append_manifest_line(in_dc_config, CONF_OUTPUT_OBJ_RESUME_FILES_NAME, text)
+            G_ARCHETYPE_INSTANCES += len(ls_instances)
+        else:
+            print(f'Archetype way: {archetype_way_id} has no OBJ8 file, building its {len(ls_instances)} instances on their own.')
+            ls_orphan_way_ids.extend(way_id for way_id, text in ls_instances)
+
+    G_ARCHETYPE_INSTANCE_LINES.clear()
+    return ls_orphan_way_ids
+
+
+# ----------------------------------------
+# -  Texture rules (uv_xml_config.xml) ---
+# ----------------------------------------
+# Same rules the blender script uses in "uv_mapping_based_xml()", so we can compute the UV coordinates
+# before Blender starts, from the texture rectangles and the wall lengths.
+
+def expand_ranges(input_list: list) -> list:
+    """ Expand "from--to" range values into a list of values, example: ["2--4"] => ["2", "3", "4"]. """
+    expanded_list = []
+
+    for item in input_list:
+        if '--' in item:  # Check if it's a range
+            start, end = item.split('--')
+            expanded_list.extend(str(i) for i in range(int(start), int(end) + 1))
+        else:
+            expanded_list.append(item)
+
+    return expanded_list
+
+
+def eval_xml_text(in_node, in_default: dict) -> dict:
+    """ Evaluate the text of an XML node as a python dictionary, return "in_default" if it fails. """
+    if in_node is None or in_node.text is None:
+        return in_default
+
+    try:
+        value = ast.literal_eval(in_node.text.strip())
+    except (ValueError, SyntaxError) as eval_err:
+        print(f'Error evaluating <{in_node.tag}>: {eval_err}')
+        return in_default
+
+    return value if isinstance(value, dict) else in_default
+
+
+@dataclass(frozen=True)
+class TextureRules:
+    """ "uv_xml_config.xml" compiled once per process, see read_texture_rules(). Read only: the WaveFront worker processes
+    get the compiled rules from their pool initializer, and the Blender jobs from the run config (see as_json()). """
+    bucket_lengths: tuple  # the <index> max lengths, sorted
+    bucket_sets: tuple  # the set index of every bucket length
+    index_meta: tuple  # ((set index, first key, ((key, frozenset of the expanded values), ...)), ...), in the XML order
+    uv_rotation_fix: dict
+    sets: dict  # set index => {zone type: (zones [x, y, width, height], cumulative weights)}
+
+    def as_json(self) -> dict:
+        """ The compiled rules, as plain lists, for the Blender run config. """
+        return {"bucket_lengths": list(self.bucket_lengths), "bucket_sets": list(self.bucket_sets),
+                "index_meta": [[set_index, first_key, {key: sorted(values) for key, values in grades}]
+                               for set_index, first_key, grades in self.index_meta],
+                "uv_rotation_fix": self.uv_rotation_fix,
+                "sets": {set_index: {zone_type: [list(zones), list(cum_weights)] for zone_type, (zones, cum_weights) in dc_zones.items()}
+                         for set_index, dc_zones in self.sets.items()}}
+
+
+def read_texture_rules(in_dc_config: dict) -> TextureRules:
+    """ Parse and compile the "uv_xml_config.xml" file once per process: the "index_meta" ranges are expanded into
+    sets, the "index" buckets are sorted for a bisection search, and the zone weights are accumulated. """
+    global G_TEXTURE_RULES
+
+    if G_TEXTURE_RULES is not None:
+        return G_TEXTURE_RULES
+
+    xml_file = in_dc_config.get(CONFIG_BLEND_UV_XML_CONFIG_FILE, DEFAULT_UV_XML_CONFIG_FILE)
+    try:
+        root = ET.parse(xml_file).getroot()
+    except (OSError, ET.ParseError) as xml_err:
+        print(f'[Error] Failed to read the texture rules file: {xml_file!r}\n{xml_err}')
+        sys.exit(1)
+
+    if root.find('index') is None:
+        print(f'No <index> element was found in {xml_file!r}. Aborting !!')
+        sys.exit(1)
+
+    ls_index_meta = []
+    for set_index, dc_grades in eval_xml_text(root.find('index_meta'), {}).items():
+        if isinstance(dc_grades, dict) and dc_grades:
+            ls_index_meta.append((str(set_index), next(iter(dc_grades)),
+                                  tuple((key, frozenset(expand_ranges(values))) for key, values in dc_grades.items())))
+
+    dc_sets = {}
+    for n_set in root.iter('set'):
+        dc_zones = {}
+        for zone_type in [K_ZONE_ROOF, K_ZONE_WALL, K_ZONE_WALL_W_DOOR, K_ZONE_WALL_W_WIN]:
+            ls_zones = []
+            ls_weights = []
+            for child in n_set.iter(zone_type):
+                ls_text = child.text.split(',')
+                if len(ls_text) < 4:
+                    print(f'Error reading {zone_type}, does not have at least four values: {ls_text!r}. Skipping tag.')
+                    continue
+
+                ls_zones.append(tuple(float(value) for value in ls_text[:4]))
+                s_weight = child.get("weight", "1")
+                ls_weights.append(int(s_weight) if s_weight.isnumeric() else 1)
+
+            dc_zones[zone_type] = (tuple(ls_zones), tuple(itertools.accumulate(ls_weights)))
+
+        dc_sets[n_set.get("index")] = dc_zones
+
+    ls_buckets = sorted((bucket, str(set_index)) for set_index, bucket in eval_xml_text(root.find('index'), {}).items())
+    G_TEXTURE_RULES = TextureRules(bucket_lengths=tuple(bucket for bucket, _ in ls_buckets),
+                                   bucket_sets=tuple(set_index for _, set_index in ls_buckets),
+                                   index_meta=tuple(ls_index_meta),
+                                   uv_rotation_fix=eval_xml_text(root.find('uv_rotation_fix'), {}),
+                                   sets=dc_sets)
+
+    return G_TEXTURE_RULES
+
+
+def find_texture_set_index(in_rules: TextureRules, in_dc_way_meta: dict, in_max_length: float) -> str:
+    """ Pick the texture "set" index based on the way metadata first, and fall back to the max length buckets.
+    Same grading as "find_node_bucket_based_on_metadata_or_dimension()" in the blender script. """
+    picked_index = ""
+    highest_grade = 0
+    for set_index, first_key, grades in in_rules.index_meta:
+        cumulative_grade = 0
+        for meta_key, values in grades:
+            if in_dc_way_meta.get(meta_key) in values:
+                cumulative_grade += 5 if meta_key == first_key else 1  # first key is worth 5 points
+
+        if cumulative_grade > highest_grade:
+            highest_grade = cumulative_grade
+            picked_index = set_index
+
+    if picked_index != "":
+        return picked_index
+
+    # The first bucket long enough, or the last one
+    if not in_rules.bucket_lengths:
+        return "1"
+    i_bucket = bisect.bisect_left(in_rules.bucket_lengths, in_max_length)
+    return in_rules.bucket_sets[min(i_bucket, len(in_rules.bucket_sets) - 1)]
+
+
+def texture_random(in_dc_config: dict, in_seed_id) -> random.Random:
+    """ The random generator of the texture picks of one building, seeded with its way_id (or texture_shape_key()) and
+    "texture_seed". A building gets the same texture zones in every run, whatever the order or the process it is built in. """
+    digest = hashlib.sha1(f'{in_dc_config.get(CONFIG_TEXTURE_SEED, 0)}|{in_seed_id}'.encode("utf8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "little"))
+
+
+def texture_shape_key(in_vt_footprint: list, in_height: float, in_building_levels: int, in_dc_way_meta: dict,
+                      in_texture_index: str) -> str:
+    """ "obj8_store_folder": what the mesh of a building is made of, its footprint in the local frame (to the centimeter,
+    like the WaveFront file), height, levels, tags and texture set, without its way_id. Seeding the texture picks with it
+    gives identical buildings the same texture zones, so they share one OBJ8 store key (see obj8_store_key()). """
+    key = hashlib.sha1(json.dumps([[(round(pt[0], 2), round(pt[2], 2)) for pt in in_vt_footprint], round(in_height, 2),
+                                   in_building_levels, in_dc_way_meta, in_texture_index],
+                                  sort_keys=True, default=str).encode("utf8"))
+    return key.hexdigest()
+
+
+def pick_texture_zones(in_rules: TextureRules, in_set_index: str, in_random: random.Random) -> dict:
+    """ Randomly pick one zone [x, y, width, height] for the roof, wall, door and window, based on their weights. """
+    dc_set = in_rules.sets.get(in_set_index) or in_rules.sets.get("1", {})
+    dc_picked = {}
+    for zone_type, (ls_zones, ls_cum_weights) in dc_set.items():
+        if ls_zones:
+            dc_picked[zone_type] = list(in_random.choices(ls_zones, cum_weights=ls_cum_weights if ls_cum_weights[-1] > 0 else None)[0])
+
+    return dc_picked
+
+
+def roof_uv_from_footprint(vt_list: list, in_zone: list, in_reference_list: list = None) -> list:
+    """ Planar projection of a footprint (seen from above) into a texture zone, keeping the aspect ratio.
+    "in_reference_list" is the footprint to fit in the zone, when projecting only a part of it (roof face). """
+    xs = [pt[0] for pt in in_reference_list or vt_list]
+    zs = [pt[2] for pt in in_reference_list or vt_list]
+    span = max(max(xs) - min(xs), max(zs) - min(zs), 0.01)
+    min_x = min(xs)
+    min_z = min(zs)
+
+    return [(in_zone[0] + in_zone[2] * (pt[0] - min_x) / span, in_zone[1] + in_zone[3] * (pt[2] - min_z) / span)
+            for pt in vt_list]
+
+
+# ----------------------------------------
+# -  Triangulation (ear clipping)       --
+# ----------------------------------------
+# Used for the top/bottom caps, so the n-gon is triangulated once, here, and not by Blender and the OBJ8 exporter.
+# The points are (x, z) tuples, the triangles are index triplets into: outer ring + holes (in that order).
+
+def signed_area_2d(in_points: list, in_indexes: list = None) -> float:
+    """ Standard (math) signed area of a 2D polygon, positive when counter-clockwise on the x/z axes. """
+    indexes = in_indexes if in_indexes is not None else range(len(in_points))
+    indexes = list(indexes)
+    area = 0.0
+    for i in range(len(indexes)):
+        x1, z1 = in_points[indexes[i]]
+        x2, z2 = in_points[indexes[(i + 1) % len(indexes)]]
+        area += x1 * z2 - x2 * z1
+
+    return area * 0.5
+
+
+def cross_2d(o_pt, a_pt, b_pt) -> float:
+    return (a_pt[0] - o_pt[0]) * (b_pt[1] - o_pt[1]) - (a_pt[1] - o_pt[1]) * (b_pt[0] - o_pt[0])
+
+
+def point_in_triangle_2d(pt, a_pt, b_pt, c_pt) -> bool:
+    """ True if "pt" is inside or on the counter-clockwise triangle a, b, c """
+    return cross_2d(a_pt, b_pt, pt) >= 0.0 and cross_2d(b_pt, c_pt, pt) >= 0.0 and cross_2d(c_pt, a_pt, pt) >= 0.0
+
+
+def bridge_hole(in_points: list, in_outer: list, in_hole: list) -> list:
+    """ Connect a (clockwise) hole to the (counter-clockwise) outer index list, returns the merged index list.
+    The bridge goes from the hole right most vertex to a visible outer vertex (David Eberly's method). """
+    hole_start = max(range(len(in_hole)), key=lambda i: in_points[in_hole[i]][0])
+    mx, mz = in_points[in_hole[hole_start]]
+
+    # Cast a ray to +x and find the closest outer edge it hits
+    best_x = math.inf
+    best_vertex = -1
+    for i in range(len(in_outer)):
+        ax, az = in_points[in_outer[i]]
+        bx, bz = in_points[in_outer[(i + 1) % len(in_outer)]]
+        if (az - mz) * (bz - mz) > 0.0 or az == bz:
+            continue
+        hit_x = ax + (mz - az) * (bx - ax) / (bz - az)
+        if mx <= hit_x < best_x:
+            best_x = hit_x
+            best_vertex = i if ax > bx else (i + 1) % len(in_outer)
+
+    if best_vertex < 0:
+        raise ValueError('hole is not inside the outer ring')
+
+    # A reflex outer vertex inside the triangle (M, hit, P) would hide P, pick the one with the smallest angle
+    px, pz = in_points[in_outer[best_vertex]]
+    triangle = [(mx, mz), (best_x, mz), (px, pz)]
+    if cross_2d(*triangle) < 0.0:
+        triangle.reverse()
+    best_angle = math.inf
+    for i in range(len(in_outer)):
+        pt = in_points[in_outer[i]]
+        if i == best_vertex or pt == (px, pz):
+            continue
+        prev_pt = in_points[in_outer[i - 1]]
+        next_pt = in_points[in_outer[(i + 1) % len(in_outer)]]
+        if cross_2d(prev_pt, pt, next_pt) < 0.0 and point_in_triangle_2d(pt, *triangle):
+            angle = abs(math.atan2(pt[1] - mz, pt[0] - mx))
+            if angle < best_angle:
+                best_angle = angle
+                best_vertex = i
+
+    hole_order = in_hole[hole_start:] + in_hole[:hole_start]
+    return in_outer[:best_vertex + 1] + hole_order + [hole_order[0], in_outer[best_vertex]] + in_outer[best_vertex + 1:]
+
+
+def triangulate_polygon(in_outer: list, in_holes: list = None) -> list:
+    """ Ear clipping triangulation of a simple polygon with optional holes (inner rings).
+    Returns triangles as index triplets, with the same winding as "in_outer". """
+    if len(in_outer) < 3:
+        return []
+
+    points = [tuple(pt) for pt in in_outer]
+    outer = list(range(len(in_outer)))
+    b_reversed = signed_area_2d(points) < 0.0
+    if b_reversed:
+        outer.reverse()  # work counter-clockwise
+
+    # Holes are bridged clockwise, right most hole first
+    ls_holes = []
+    for hole in in_holes or []:
+        hole_indexes = list(range(len(points), len(points) + len(hole)))
+        points.extend(tuple(pt) for pt in hole)
+        if signed_area_2d(points, hole_indexes) > 0.0:
+            hole_indexes.reverse()
+        ls_holes.append(hole_indexes)
+    for hole_indexes in sorted(ls_holes, key=lambda hole: max(points[i][0] for i in hole), reverse=True):
+        outer = bridge_hole(points, outer, hole_indexes)
+
+    # Doubly linked list over the "outer" positions (bridged vertices appear twice)
+    count = len(outer)
+    node_prev = [(i - 1) % count for i in range(count)]
+    node_next = [(i + 1) % count for i in range(count)]
+
+    # The reflex vertices are kept in a uniform grid of about one vertex per cell, an ear only tests the cells of its bounding box
+    min_x = min(points[i][0] for i in outer)
+    min_z = min(points[i][1] for i in outer)
+    cell_size = max(max(points[i][0] for i in outer) - min_x, max(points[i][1] for i in outer) - min_z) / math.sqrt(count) or 1.0
+    dc_grid = {}  # (cell x, cell z) => reflex nodes
+
+    def grid_cell(pt):
+        return int((pt[0] - min_x) / cell_size), int((pt[1] - min_z) / cell_size)
+
+    def is_reflex(node):
+        return cross_2d(points[outer[node_prev[node]]], points[outer[node]], points[outer[node_next[node]]]) <= 0.0
+
+    def set_reflex(node, in_b_reflex):
+        if in_b_reflex and node not in reflex:
+            reflex.add(node)
+            dc_grid.setdefault(grid_cell(points[outer[node]]), set()).add(node)
+        elif not in_b_reflex and node in reflex:
+            reflex.discard(node)
+            dc_grid[grid_cell(points[outer[node]])].discard(node)
+
+    def is_ear(node):
+        if node in reflex:
+            return False
+        a_pt = points[outer[node_prev[node]]]
+        b_pt = points[outer[node]]
+        c_pt = points[outer[node_next[node]]]
+        min_cell_x, min_cell_z = grid_cell((min(a_pt[0], b_pt[0], c_pt[0]), min(a_pt[1], b_pt[1], c_pt[1])))
+        max_cell_x, max_cell_z = grid_cell((max(a_pt[0], b_pt[0], c_pt[0]), max(a_pt[1], b_pt[1], c_pt[1])))
+        # only reflex vertices can be inside an ear, vertices shared with the ear (bridges) are ignored
+        for cell_x in range(min_cell_x, max_cell_x + 1):
+            for cell_z in range(min_cell_z, max_cell_z + 1):
+                for other in dc_grid.get((cell_x, cell_z), ()):
+                    other_pt = points[outer[other]]
+                    if other_pt not in (a_pt, b_pt, c_pt) and point_in_triangle_2d(other_pt, a_pt, b_pt, c_pt):
+                        return False
+        return True
+
+    reflex = set()
+    for i in range(count):
+        set_reflex(i, is_reflex(i))
+    triangles = []
+    node = 0
+    misses = 0
+    while count > 3:
+        if misses >= count:
+            # No ear, numerical noise or a self intersecting ring: clip the least reflex vertex to keep going
+            misses = 0
+            start_node = node
+            best_node = node
+            node = node_next[node]
+            while node != start_node:
+                if cross_2d(points[outer[node_prev[node]]], points[outer[node]], points[outer[node_next[node]]]) > \
+                        cross_2d(points[outer[node_prev[best_node]]], points[outer[best_node]], points[outer[node_next[best_node]]]):
+                    best_node = node
+                node = node_next[node]
+            node = best_node
+            set_reflex(node, False)
+        elif not is_ear(node):
+            node = node_next[node]
+            misses += 1
+            continue
+
+        prev_node = node_prev[node]
+        next_node = node_next[node]
+        triangles.append((outer[prev_node], outer[node], outer[next_node]))
+        node_next[prev_node] = next_node
+        node_prev[next_node] = prev_node
+        count -= 1
+        misses = 0
+        set_reflex(node, False)
+        for neighbour in (prev_node, next_node):
+            set_reflex(neighbour, is_reflex(neighbour))
+        node = next_node
+
+    triangles.append((outer[node_prev[node]], outer[node], outer[node_next[node]]))
+
+    if b_reversed:
+        triangles = [(c, b, a) for a, b, c in triangles]
+
+    return triangles
+
+
+# ----------------------------------------
+# -  Roof generation (straight skeleton) -
+# ----------------------------------------
+# The roof faces are the faces of the straight skeleton of the footprint: every footprint edge moves inward with the
+# same speed, and the roof height of a point is the distance its edge travelled, multiplied by the roof slope.
+# Events: "edge event" an edge shrinks to zero length, "split event" a reflex vertex runs into an opposite edge.
+
+@dataclass
+class SkeletonVertex:
+    """A moving vertex of the shrinking footprint (wavefront), between the "left" and "right" footprint edges."""
+    x: float
+    z: float
+    time: float  # the distance the edges travelled when this vertex was created
+    vx: float
+    vz: float
+    edge_left: int  # footprint edge ending at this vertex
+    edge_right: int  # footprint edge starting at this vertex
+
+    def position_at(self, in_time: float) -> tuple:
+        return self.x + self.vx * (in_time - self.time), self.z + self.vz * (in_time - self.time)
+
+
+def skeleton_vertex(in_x: float, in_z: float, in_time: float, in_edge_left: int, in_edge_right: int, in_edges: list) -> SkeletonVertex:
+    """ Create a wavefront vertex, its velocity keeps it on both (moving) edges lines. """
+    _, _, nx_l, nz_l = in_edges[in_edge_left]
+    _, _, nx_r, nz_r = in_edges[in_edge_right]
+    det = nx_l * nz_r - nz_l * nx_r
+    if abs(det) < 1e-9:
+        # Parallel edges: move with the edge. Opposite edges: they met, this is a ridge end point and does not move.
+        vx, vz = (nx_l, nz_l) if nx_l * nx_r + nz_l * nz_r > 0 else (0.0, 0.0)
+    else:
+        vx = (nz_r - nz_l) / det
+        vz = (nx_l - nx_r) / det
+
+    return SkeletonVertex(in_x, in_z, in_time, vx, vz, in_edge_left, in_edge_right)
+
+
+def straight_skeleton_arcs(in_ring_xz: list) -> list:
+    """ Compute the straight skeleton of a counter-clockwise footprint (as written in the WaveFront file).
+    Returns a list of arcs: (edge_a, edge_b, (x, z, time), (x, z, time)), the arc is on the roof faces of both edges. """
+    count = len(in_ring_xz)
+    edges = []  # [start x, start z, inward normal x, inward normal z]
+    for i in range(count):
+        x1, z1 = in_ring_xz[i]
+        x2, z2 = in_ring_xz[(i + 1) % count]
+        length = math.hypot(x2 - x1, z2 - z1)
+        if length < 1e-9:
+            raise ValueError('zero length footprint edge')
+        edges.append((x1, z1, (z2 - z1) / length, -(x2 - x1) / length))  # inward: right hand side of the edge
+
+    arcs = []
+    ls_rings = [([skeleton_vertex(x, z, 0.0, (i - 1) % count, i, edges) for i, (x, z) in enumerate(in_ring_xz)], 0.0)]
+    max_iterations = 4 * count * count + 10
+
+    while ls_rings:
+        ring, current_time = ls_rings.pop()
+        max_iterations -= 1
+        if max_iterations < 0:
+            raise ValueError('straight skeleton did not converge')
+
+        if len(ring) < 3:
+            if len(ring) == 2:
+                p1 = ring[0].position_at(current_time)
+                p2 = ring[1].position_at(current_time)
+                for vertex, point in ((ring[0], p1), (ring[1], p2)):
+                    arcs.append((vertex.edge_left, vertex.edge_right, (vertex.x, vertex.z, vertex.time), (*point, current_time)))
+                arcs.append((ring[0].edge_right, ring[0].edge_left, (*p1, current_time), (*p2, current_time)))
+            continue
+
+        # Find the first event of this ring
+        event_time = math.inf
+        event = None
+        size = len(ring)
+        for i in range(size):
+            v1 = ring[i]
+            v2 = ring[(i + 1) % size]
+            # Edge event: the edge between v1 and v2 shrinks to zero length
+            _, _, nx, nz = edges[v1.edge_right]
+            dx, dz = -nz, nx  # edge direction
+            p1 = v1.position_at(current_time)
+            p2 = v2.position_at(current_time)
+            shrink_speed = (v2.vx - v1.vx) * dx + (v2.vz - v1.vz) * dz
+            if shrink_speed < -1e-12:
+                t = current_time + max(0.0, ((p2[0] - p1[0]) * dx + (p2[1] - p1[1]) * dz) / -shrink_speed)
+                if t < event_time:
+                    event_time = t
+                    event = ("edge", i)
+
+            # Split event: a reflex vertex hits an edge that is not its neighbour
+            _, _, nx_l, nz_l = edges[v1.edge_left]
+            _, _, nx_r, nz_r = edges[v1.edge_right]
+            if (-nz_r) * nx_l + nx_r * nz_l >= -1e-9:
+                continue  # convex vertex
+
+            p1 = v1.position_at(current_time)
+            for k in range(size):
+                e1 = ring[k]
+                e2 = ring[(k + 1) % size]
+                if k == i or (k + 1) % size == i:
+                    continue
+
+                ex, ez, enx, enz = edges[e1.edge_right]
+                approach_speed = 1.0 - (v1.vx * enx + v1.vz * enz)
+                if approach_speed <= 1e-12:
+                    continue
+                t = current_time + ((p1[0] - ex) * enx + (p1[1] - ez) * enz - current_time) / approach_speed
+                if t < current_time - 1e-9 or t >= event_time:
+                    continue
+
+                # the hit point must be on the edge segment at that time
+                hit = v1.position_at(t)
+                s1 = e1.position_at(t)
+                s2 = e2.position_at(t)
+                seg_x, seg_z = s2[0] - s1[0], s2[1] - s1[1]
+                seg_len_sq = seg_x * seg_x + seg_z * seg_z
+                if seg_len_sq < 1e-12:
+                    continue
+                u = ((hit[0] - s1[0]) * seg_x + (hit[1] - s1[1]) * seg_z) / seg_len_sq
+                if -1e-6 <= u <= 1 + 1e-6:
+                    event_time = max(t, current_time)
+                    event = ("split", i, k)
+
+        if event is None:
+            raise ValueError('no skeleton event found')
+
+        if event[0] == "edge":
+            i = event[1]
+            v1 = ring[i]
+            v2 = ring[(i + 1) % size]
+            p1 = v1.position_at(event_time)
+            p2 = v2.position_at(event_time)
+            point = ((p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2)
+            for vertex in (v1, v2):
+                arcs.append((vertex.edge_left, vertex.edge_right, (vertex.x, vertex.z, vertex.time), (*point, event_time)))
+
+            new_vertex = skeleton_vertex(*point, event_time, v1.edge_left, v2.edge_right, edges)
+            if (i + 1) % size == 0:
+                new_ring = [new_vertex] + ring[1:i]
+            else:
+                new_ring = ring[:i] + [new_vertex] + ring[i + 2:]
+            ls_rings.append((new_ring, event_time))
+        else:
+            _, i, k = event
+            vertex = ring[i]
+            point = vertex.position_at(event_time)
+            arcs.append((vertex.edge_left, vertex.edge_right, (vertex.x, vertex.z, vertex.time), (*point, event_time)))
+            split_edge = ring[k].edge_right
+            # ring A: the hit point, then the vertices after the split edge up to the vertex before the reflex vertex
+            ring_a = [skeleton_vertex(*point, event_time, vertex.edge_left, split_edge, edges)]
+            j = (k + 1) % size
+            while j != i:
+                ring_a.append(ring[j])
+                j = (j + 1) % size
+            # ring B: the hit point, then the vertices after the reflex vertex up to the split edge start
+            ring_b = [skeleton_vertex(*point, event_time, split_edge, vertex.edge_right, edges)]
+            j = (i + 1) % size
+            while j != (k + 1) % size:
+                ring_b.append(ring[j])
+                j = (j + 1) % size
+            ls_rings.append((ring_a, event_time))
+            ls_rings.append((ring_b, event_time))
+
+    return arcs
+
+
+def generate_roof_faces(in_ring_xz: list, in_shape: str, in_pitch_deg: float, in_roof_height: float = None) -> list:
+    """ Build the roof faces of a counter-clockwise footprint.
+    Returns a list of faces, every face is a list of (x, height, z) points, counter-clockwise seen from outside.
+    Raises ValueError when the skeleton could not be computed, the caller should keep a flat roof. """
+    count = len(in_ring_xz)
+    arcs = straight_skeleton_arcs(in_ring_xz)
+
+    def key(x, z):
+        return round(x, 3), round(z, 3)
+
+    # Gather the arcs of every footprint edge face
+    dc_face_arcs = {i: [] for i in range(count)}
+    dc_time = {}
+    for edge_a, edge_b, (x1, z1, t1), (x2, z2, t2) in arcs:
+        k1 = key(x1, z1)
+        k2 = key(x2, z2)
+        if k1 == k2:
+            continue
+        dc_time[k1] = t1
+        dc_time[k2] = t2
+        for edge in {edge_a, edge_b}:
+            dc_face_arcs[edge].append((k1, k2))
+
+    # Walk from the end of the edge, over the arcs, back to its start
+    faces = []
+    for i in range(count):
+        start = key(*in_ring_xz[i])
+        end = key(*in_ring_xz[(i + 1) % count])
+        dc_time[start] = dc_time[end] = 0.0
+        ls_arcs = list(dc_face_arcs[i])
+        face = [start, end]
+        current = end
+        while current != start:
+            for arc_index, (k1, k2) in enumerate(ls_arcs):
+                if current in (k1, k2):
+                    current = k2 if current == k1 else k1
+                    ls_arcs.pop(arc_index)
+                    break
+            else:
+                raise ValueError(f'roof face of edge {i} is not closed')
+            if current != start:
+                face.append(current)
+        faces.append(face)
+
+    # Gabled: move the apex of the hip triangles to the footprint edge, the triangle becomes a vertical gable wall
+    dc_moved = {}
+    if in_shape == ROOF_SHAPE_GABLED:
+        triangle_apexes = [face[2] for face in faces if len(face) == 3]
+        for face in faces:
+            if len(face) == 3 and triangle_apexes.count(face[2]) == 1:
+                (x1, z1), (x2, z2), (ax, az) = face
+                seg_len_sq = (x2 - x1) ** 2 + (z2 - z1) ** 2
+                u = ((ax - x1) * (x2 - x1) + (az - z1) * (z2 - z1)) / seg_len_sq
+                dc_moved[face[2]] = (x1 + u * (x2 - x1), z1 + u * (z2 - z1))
+
+    max_time = max(dc_time.values())
+    if max_time <= 0.0:
+        raise ValueError('roof has no height')
+    slope = in_roof_height / max_time if in_roof_height else math.tan(math.radians(in_pitch_deg))
+
+    roof_faces = []
+    for face in faces:
+        roof_face = []
+        for point in face:
+            x, z = dc_moved.get(point, point)
+            roof_face.append((x, dc_time[point] * slope, z))
+        roof_faces.append(roof_face)
+
+    return roof_faces
+
+
+def face_normal(in_points: list) -> tuple:
+    """ Newell's method normal of a 3D polygon (x, y, z) """
+    nx = ny = nz = 0.0
+    for i, (x1, y1, z1) in enumerate(in_points):
+        x2, y2, z2 = in_points[(i + 1) % len(in_points)]
+        nx += (y1 - y2) * (z1 + z2)
+        ny += (z1 - z2) * (x1 + x2)
+        nz += (x1 - x2) * (y1 + y2)
+    length = math.sqrt(nx * nx + ny * ny + nz * nz)
+    return (nx / length, ny / length, nz / length) if length > 0 else (0.0, 1.0, 0.0)
+
+
 def fetch_osm_info_from_db(conn, binds: list = None, in_b_sqlite_supports_math: bool = True):
     if binds is None:
         binds = []
@@ -1022,10 +2933,397 @@ WHERE w.way_id = ?
     return dc_rows
 
 
+class WavefrontWorkerWriter:
+    """ Output of a "wavefront_workers" process: the WaveFront files are written directly,
+    the manifest lines and the batch objects are returned to the main process, which adds them in the original way order. """
+
+    def __init__(self):
+        self.manifest_lines = []
+        self.batch_objects = []
+
+    def write_file(self, in_file_name: str, in_text):
+        if isinstance(in_text, bytes):
+            with open(file=in_file_name, mode="wb") as binary_file:
+                binary_file.write(in_text)
+        else:
+            with open(file=in_file_name, mode="w", encoding="utf8") as text_file:
+                text_file.write(in_text)
+
+    def append_manifest(self, in_manifest_key: str, in_text: str):
+        self.manifest_lines.append((in_manifest_key, in_text))
+
+    def add(self, *args):
+        """ Same signature as WavefrontBatches.add(). """
+        self.batch_objects.append(args)
+
+
+def init_wavefront_worker(in_dc_config: dict, in_b_sqlite_supports_math: bool, in_texture_rules: TextureRules = None,
+                          in_dc_building_heights: dict = None):
+    """ Pool initializer, every worker process has its own read-only database connection.
+    The texture rules are compiled once by the parent process, and so are the "archetype_instancing" building heights. """
+    global G_WORKER_CONN
+    global G_TEXTURE_RULES
+    global G_WORKER_DC_CONFIG
+    global G_WORKER_SQLITE_SUPPORTS_MATH
+    global G_WAVEFRONT_WRITER
+    global G_WAVEFRONT_BATCHES
+
+    G_WORKER_CONN = sqlite3.connect(f'file:{Path(in_dc_config.get("db_file")).as_posix()}?mode=ro', uri=True)
+    G_WORKER_DC_CONFIG = in_dc_config
+    G_WORKER_SQLITE_SUPPORTS_MATH = in_b_sqlite_supports_math
+    G_TEXTURE_RULES = in_texture_rules
+    G_BUILDING_HEIGHTS.update(in_dc_building_heights or {})
+    G_WAVEFRONT_WRITER = WavefrontWorkerWriter()
+    G_WAVEFRONT_BATCHES = G_WAVEFRONT_WRITER if int(in_dc_config.get(CONFIG_WAVEFRONT_BATCH_SIZE, 0)) > 0 else None
+
+
+def prepare_building_wavefront_in_worker(way_id: int) -> tuple:
+    """ Runs in a worker process. Returns the processed flag, the manifest lines, the batch objects, the geometry statistics
+    and the error of a failed way ("" when it did not fail). """
+    global G_FOOTPRINT_VERTICES_IN
+    global G_FOOTPRINT_VERTICES_OUT
+    global G_WAVEFRONT_VERTICES
+    global G_WAVEFRONT_FACES
+    global G_TRIANGULATION_SECONDS
+    global G_NATIVE_OBJ8_FILES
+
+    G_FOOTPRINT_VERTICES_IN = G_FOOTPRINT_VERTICES_OUT = G_WAVEFRONT_VERTICES = G_WAVEFRONT_FACES = G_NATIVE_OBJ8_FILES = 0
+    G_TRIANGULATION_SECONDS = 0.0
+    G_WAVEFRONT_WRITER.manifest_lines = []
+    G_WAVEFRONT_WRITER.batch_objects = []
+
+    try:
+        v_processed = prepare_building_wavefront(G_WORKER_CONN, way_id, G_WORKER_DC_CONFIG, G_WORKER_SQLITE_SUPPORTS_MATH)
+    except (Exception, SystemExit) as err:
+        # sys.exit() would end the worker process without an answer, and pool.imap() would wait for it forever
+        return 0, [], [], (0, 0, 0, 0, 0.0, 0), repr(err)
+
+    return (v_processed, G_WAVEFRONT_WRITER.manifest_lines, G_WAVEFRONT_WRITER.batch_objects,
+            (G_FOOTPRINT_VERTICES_IN, G_FOOTPRINT_VERTICES_OUT, G_WAVEFRONT_VERTICES, G_WAVEFRONT_FACES, G_TRIANGULATION_SECONDS,
+             G_NATIVE_OBJ8_FILES), "")
+
+
+def generate_wavefront_files_parallel(in_dc_config: dict, in_way_ids: list, in_b_sqlite_supports_math: bool, in_workers: int):
+    """ Generate the WaveFront files in a process pool. Yields the processed flag of every way, in the "in_way_ids" order,
+    so the manifests and the counters are the same as in the single process loop. """
+    global G_FOOTPRINT_VERTICES_IN
+    global G_FOOTPRINT_VERTICES_OUT
+    global G_WAVEFRONT_VERTICES
+    global G_WAVEFRONT_FACES
+    global G_TRIANGULATION_SECONDS
+    global G_NATIVE_OBJ8_FILES
+
+    print(f'Generating {len(in_way_ids)} WaveFront files with {in_workers} processes.')
+    chunk_size = max(1, len(in_way_ids) // (in_workers * 8))
+    texture_rules = read_texture_rules(in_dc_config)
+    # "spawn" behaves the same on all platforms, and does not copy the writer thread into the workers
+    with multiprocessing.get_context("spawn").Pool(processes=in_workers, initializer=init_wavefront_worker,
+                                                   initargs=(in_dc_config, in_b_sqlite_supports_math, texture_rules,
+                                                             {way_id: G_BUILDING_HEIGHTS[way_id] for way_id in in_way_ids
+                                                              if way_id in G_BUILDING_HEIGHTS})) as pool:
+        ls_results = pool.imap(prepare_building_wavefront_in_worker, in_way_ids, chunk_size)
+        for way_id, (v_processed, ls_manifest_lines, ls_batch_objects, stats, error) in zip(in_way_ids, ls_results):
+            if error:
+                print(f'[Error] Failed to prepare the WaveFront file of way: {way_id}, {error}. Aborting !!')
+                pool.terminate()
+                sys.exit(1)
+
+            for manifest_key, text in ls_manifest_lines:
+                append_manifest_line(in_dc_config, manifest_key, text)
+
+            for batch_object in ls_batch_objects:
+                G_WAVEFRONT_BATCHES.add(*batch_object)
+
+            G_FOOTPRINT_VERTICES_IN += stats[0]
+            G_FOOTPRINT_VERTICES_OUT += stats[1]
+            G_WAVEFRONT_VERTICES += stats[2]
+            G_WAVEFRONT_FACES += stats[3]
+            G_TRIANGULATION_SECONDS += stats[4]
+            G_NATIVE_OBJ8_FILES += stats[5]
+            yield v_processed
+
+
+def decide_building_height(conn, way_id: int, in_dc_config: dict, mx_vert_length: float, in_perimeter: float) -> tuple:
+    """ Height of a building: from its size, then from the height and level keys of its metadata.
+    Returns (height in meters, building levels, way metadata). Used by the meshes and by the "facade" mode. """
+    #################
+    # Tentative height decision, not using OSM Metadata
+    #################
+    f_height = 2.5
+
+    # Decide height by longest edge. units: meters
+    if mx_vert_length > 20:
+        f_height = 9.0
+    elif mx_vert_length > 12:
+        f_height = 6.0
+    elif mx_vert_length > 8:
+        f_height = 3.5
+
+    # Decide height using perimeter information
+    if in_perimeter > 150.0:
+        f_height = 9.0
+    elif in_perimeter > 80:
+        f_height = 6.0
+
+    # v1.1 gather way_id metadata information to send to Blender
+    s_default_where_const = "and ( k like 'build%' or k like 'roof%' or k = 'amenity' or k='height' )"
+    stmt = f'select k, v from ways_meta where way_id=? {in_dc_config.get(CONFIG_QUERY_META_TEXT, s_default_where_const)}'
+    rows = exec_query_stmt(conn, stmt, [way_id], True)
+    dc_way_meta = {}
+    # print(f'rows type:{type(rows)}')
+
+    # TODO: Re-write this code to be more pythonic
+    for indx, row in list(enumerate(rows)):
+        keys_list = row.keys()
+        i = 1
+        key = ""
+        for k in keys_list:
+            if i == 1:
+                key = row[k]
+                dc_way_meta[key] = ""
+                i += 1
+            elif i == 2:
+                dc_way_meta[key] = row[k]
+                i += 1
+                break
+            else:
+                break
+
+    in_dc_config["way_meta"] = dc_way_meta
+    print(f'{dc_way_meta}\n')
+
+    list_height_keys = in_dc_config.get(CONFIG_HEIGHT_KEYS_LIST, [])
+    building_height = 0.0
+    if isinstance(list_height_keys, list):
+        for l_key in list_height_keys:
+            if l_key in dc_way_meta:
+                if is_number(dc_way_meta[l_key]):
+                    building_height = float(dc_way_meta[l_key])
+                else:
+                    flag_parsed, num_parsed_list = parse_feet_inches(dc_way_meta[l_key])
+                    if flag_parsed:
+                        building_height = num_parsed_list[0] * 0.3048  # convert to meters
+                        break  # exit loop
+                    else:
+                        building_height = 0.0
+
+        print(f'Metadata height: {building_height=}')
+
+    if building_height > 0.0:
+        f_height = building_height
+
+    # v1.2 Added support of level key list. There might be other keys that represent levels.
+    # First found, first served.
+    building_levels = 0
+    list_of_level_keys = in_dc_config.get('level_keys_list', [])
+    if not isinstance(list_of_level_keys, list):
+        list_of_level_keys = []
+    for key in list_of_level_keys:
+        if dc_way_meta.get(key, None) is not None:
+            building_levels = int(dc_way_meta.get(key, 1))
+            break
+
+    # The next logic is to make sure that the value is valid, or
+    # we fall back to the default osm key metadata for levels.
+    building_levels = building_levels if building_levels > 0 else int(dc_way_meta.get("building:levels", 1))
+
+    # v1.1 Force building level rules
+    if building_levels > 1:
+        f_height = building_levels * 3.0  # Default floor height is 3 meters
+    else:
+        building_levels = 1  # make sure never Zero
+
+    print(f'Final Height: {f_height=}, {building_height=}, {building_levels=}')  # debug
+    # end v1.1 height information
+
+    return f_height, building_levels, dc_way_meta
+
+
+def building_filter_message(in_dc_config: dict, way_id, in_mx_vert_length: float, in_perimeter: float) -> str:
+    """ The wall length and perimeter filters. Returns why the way is filtered out, "" when it is built. """
+    filter_out_obj_with_perimeter_greater_than = in_dc_config.get(CONFIG_FILTER_OUT_OBJ_WITH_PERIMETER_GREATER_THAN,
+                                                                  0.0)
+    filter_out_obj_with_perimeter_less_than = in_dc_config.get(CONFIG_FILTER_OUT_OBJ_WITH_PERIMETER_LESS_THAN, 0.0)
+    filter_in_obj_with_perimeter_between_lst = in_dc_config.get(CONFIG_FILTER_IN_OBJ_WITH_PERIMETER_BETWEEN, [])
+
+    # Filter out by wall length
+    if in_mx_vert_length > in_dc_config.get(CONFIG_MAX_WALL_LENGTH, 0.0) > 0.0:
+        return f"Way: {way_id} has a wall longer than {in_dc_config.get(CONFIG_MAX_WALL_LENGTH, 0.0)} meters. Skipping..."
+
+    # Filter out objects with perimeter larger than
+    if in_perimeter > filter_out_obj_with_perimeter_greater_than > 0.0:
+        return f"\nWay: {way_id} has a perimeter longer than {filter_out_obj_with_perimeter_greater_than} meters. Perimeter length: {in_perimeter}. Skipping...\n"
+
+    # Filter out objects with perimeter less than
+    if in_perimeter < filter_out_obj_with_perimeter_less_than > 0.0:
+        return f'''\nWay: {way_id} has a perimeter less than {filter_out_obj_with_perimeter_less_than} meters. 
+            Perimeter length: {in_perimeter}. Skipping...\n '''
+
+    # Filter in objects with perimeter between
+    if isinstance(filter_in_obj_with_perimeter_between_lst, list) and len(
+            filter_in_obj_with_perimeter_between_lst) > 1:
+        # check if the mesh perimeter is outside the "filter in" values.
+        # Check if the shortest allowed length is bigger than the perimeter
+        # or the biggest allowed length is shorter than the perimeter.
+        if filter_in_obj_with_perimeter_between_lst[0] > in_perimeter or in_perimeter > \
+                filter_in_obj_with_perimeter_between_lst[1]:
+            return f'''\nWay: {way_id} has a perimeter not in the filter range: {filter_in_obj_with_perimeter_between_lst!r}  
+                Perimeter length: {in_perimeter}. Skipping...\n '''
+
+    return ""
+
+
+def prepare_building_wavefront(conn, way_id: int, in_dc_config: dict, in_b_sqlite_supports_math: bool = True) -> int:
+    """ Build the WaveFront file of one way (building).
+    Returns 1 if the file was written, 0 if the way was filtered out or skipped by the resume rules. """
+    global G_FOOTPRINT_VERTICES_IN
+    global G_FOOTPRINT_VERTICES_OUT
+
+    binds = [way_id]
+    dc_rows = fetch_osm_info_from_db(conn, binds, in_b_sqlite_supports_math)
+
+    print(f'Fetched: {len(dc_rows)} rows.')  # debug
+
+    if len(dc_rows) == 0:
+        print(f'There are no rows corresponding to the way id: {way_id}. Aborting script.')
+        sys.exit(-1)
+
+    # Loop over all rows and create the base of the OBJ mesh
+    vt_obj_wavefront = []  # Initialize with 0,0 coordinates
+    x = y = z = last_x = last_z = 0.0  # removed last_y
+    mx_vert_length = 0.0  # will hold the longest row[K_MT_DISTANCE]
+    mesh_rotation = 0.0
+
+    # f_mesh_perimeter = 0.0
+    last_row = None
+    for idx, (row_no, row) in enumerate(dc_rows.items()):
+
+        y = 0  # currently y always equal to zero, since we are drawing a plane
+        if (row[K_MT_DISTANCE] is not None) and mx_vert_length < row[K_MT_DISTANCE]:
+            mx_vert_length = row[K_MT_DISTANCE]
+
+        # calculate new position based on previous coordinates, distance and bearing
+        if idx > 0 and row[K_SEQ] < (row[K_MAX_SEQ] - 1):  # We calculate rows 1..(N-1)
+            # In X-Plane X=east/west, Z=North South
+            try:
+                x, z = calculate_new_coordinates(last_x, last_z, row[K_MT_DISTANCE], row[K_DEGREES_ROUND])
+                if row_no == 2 and idx == 1:
+                    mesh_rotation = row[K_DEGREES_ROUND]
+            except Error as e:
+                print(f"{e}\n\tFor row: {idx}")
+                continue
+        elif idx == 0:
+            vt_obj_wavefront.append([x, y, z])  # store position array [0,0,0]
+            x, z = calculate_new_coordinates(last_x, last_z, row[K_MT_DISTANCE], row[K_DEGREES_ROUND])
+        elif row[K_SEQ] == row[K_MAX_SEQ]:
+            # We inject to last "row" the mesh rotation for future use
+            row[K_ROTATION] = mesh_rotation
+            last_row = copy.deepcopy(row)
+            break  # exit loop without handling closing vertex
+        else:
+            last_row = copy.deepcopy(row)
+            continue  # We should never reach this line of code.
+
+        vt_obj_wavefront.append([x, y, z])  # store in array
+        last_x = x
+        # last_y = y
+        last_z = z
+
+    ###############################
+    # Filter by perimeter or Wall Length
+    ###############################
+
+    print(f'{way_id=!r}, {last_row[K_PERIMETER]=!r}')  # v1.2 perimeter info
+
+    filter_message = building_filter_message(in_dc_config, way_id, mx_vert_length, last_row[K_PERIMETER])
+    if filter_message != "":
+        print(filter_message)
+        return 0
+
+    # Footprint simplification stage, before we multiply the walls by the building levels
+    if in_dc_config.get(CONFIG_SIMPLIFY_FOOTPRINT, False):
+        vertices_before = len(vt_obj_wavefront)
+        vt_obj_wavefront = simplify_footprint(vt_obj_wavefront, in_dc_config)
+        G_FOOTPRINT_VERTICES_IN += vertices_before
+        G_FOOTPRINT_VERTICES_OUT += len(vt_obj_wavefront)
+        if vertices_before != len(vt_obj_wavefront):
+            print(f'Simplified way: {way_id} footprint from {vertices_before} to {len(vt_obj_wavefront)} vertices.')
+
+    # We assume that all arrays represents a cube, so we need to add the elevation coordinates
+
+    # OSM ways have no guaranteed orientation. We always write counter-clockwise rings (seen from above),
+    # so walls and caps face outward and Blender does not have to recalculate the normals.
+    vt_obj_wavefront = make_ring_counter_clockwise(vt_obj_wavefront)
+    vt_obj_wavefront_elev = copy.deepcopy(vt_obj_wavefront)
+
+    if way_id in G_BUILDING_HEIGHTS:  # "archetype_instancing" already decided it
+        f_height, building_levels, dc_way_meta = G_BUILDING_HEIGHTS.pop(way_id)
+    else:
+        f_height, building_levels, dc_way_meta = decide_building_height(conn, way_id, in_dc_config, mx_vert_length,
+                                                                        last_row[K_PERIMETER])
+
+    # create a list of levels: [vt_obj_wavefront_elev, vt_obj_wavefront_elev,vt_obj_wavefront_elev]
+    # Each element represents a building level
+    # Modify height
+    for vt_array in vt_obj_wavefront_elev:
+        # validate we have a tuple
+        if len(vt_array) > 2:
+            vt_array[1] = f_height / building_levels
+
+    # make a copy of the top face * number of levels
+    list_of_vt_obj_wavefront_elev_levels = []
+    for lvl in range(building_levels):
+        list_of_vt_obj_wavefront_elev_levels.append(copy.deepcopy(vt_obj_wavefront_elev))
+
+    # Pick the texture set and zones here, seeded with the way_id, so every run gives the same textures. Blender gets them
+    # in the job manifest. With the UV coordinates written, Blender does not need to unwrap.
+    # "obj8_store_folder": seeded with the shape of the building instead, identical buildings share their stored OBJ8 file.
+    texture_rules = read_texture_rules(in_dc_config)
+    footprint_max_length = max(max(pt[i] for pt in vt_obj_wavefront) - min(pt[i] for pt in vt_obj_wavefront) for i in (0, 2))
+    texture_index = find_texture_set_index(texture_rules, dc_way_meta, footprint_max_length)
+    texture_seed_id = way_id
+    if in_dc_config.get(CONFIG_OBJ8_STORE_FOLDER, "") != "":
+        texture_seed_id = texture_shape_key(vt_obj_wavefront, f_height, building_levels, dc_way_meta, texture_index)
+    dc_picked_zones = pick_texture_zones(texture_rules, texture_index, texture_random(in_dc_config, texture_seed_id))
+    dc_texture_zones = None
+    if in_dc_config.get(CONFIG_WAVEFRONT_WRITE_UV, False) or in_dc_config.get(CONFIG_NATIVE_OBJ8_WRITER, False):
+        dc_texture_zones = dc_picked_zones
+        if K_ZONE_ROOF not in dc_texture_zones or K_ZONE_WALL not in dc_texture_zones:
+            print(f'Texture set {texture_index!r} has no roof or wall zone, Blender will unwrap way: {way_id}')
+            dc_texture_zones = None
+
+    # Hipped/gabled roof, from "roof:shape" or the default shape
+    roof_faces = None
+    roof_shape = DC_ROOF_SHAPES.get(dc_way_meta.get("roof:shape", in_dc_config.get(CONFIG_ROOF_DEFAULT_SHAPE, ROOF_SHAPE_FLAT)), ROOF_SHAPE_FLAT)
+    if in_dc_config.get(CONFIG_GENERATE_ROOFS, False) and roof_shape != ROOF_SHAPE_FLAT and len(vt_obj_wavefront) <= DEFAULT_ROOF_MAX_VERTICES:
+        try:
+            roof_height = float(dc_way_meta["roof:height"]) if is_number(dc_way_meta.get("roof:height", "")) else None
+            roof_faces = generate_roof_faces([(pt[0], pt[2]) for pt in vt_obj_wavefront], roof_shape,
+                                             in_dc_config.get(CONFIG_ROOF_PITCH_DEG, DEFAULT_ROOF_PITCH_DEG), roof_height)
+        except (ValueError, KeyError, ZeroDivisionError) as roof_err:
+            print(f'Failed to generate {roof_shape} roof for way: {way_id}, keeping a flat roof. {roof_err}')
+
+    v_processed = write_cube_from_osm_to_wavefront_format(conn, way_id, in_dc_config, building_levels, f_height,
+                                                          vt_obj_wavefront, vt_obj_wavefront_elev, last_row,
+                                                          dc_texture_zones, roof_faces,
+                                                          {K_WAY_META: dc_way_meta, K_TEXTURE_INDEX: texture_index,
+                                                           K_TEXTURE_ZONES: dc_picked_zones})
+
+    return v_processed
+
+
 def parse_osm_to_wavefront_obj(conn, in_dc_config: dict, in_building_id_list: list,
                                in_b_sqlite_supports_math: bool = True):
     global G_SKIPPED_FILES
     global G_PREPARED_FILES_TO_PROCESS
+    global G_FOOTPRINT_VERTICES_IN
+    global G_FOOTPRINT_VERTICES_OUT
+    global G_WAVEFRONT_VERTICES
+    global G_WAVEFRONT_FACES
+    global G_TRIANGULATION_SECONDS
+    global G_WAVEFRONT_BATCHES
+    global G_NATIVE_OBJ8_FILES
+    global G_ARCHETYPE_INSTANCES
     global CONF_OUTPUT_OBJ_FILES
     global CONF_OUTPUT_OBJ_RESUME_FILES_NAME
     # global G_OUTPUT_OBJ_FILES_NAME
@@ -1042,25 +3340,34 @@ def parse_osm_to_wavefront_obj(conn, in_dc_config: dict, in_building_id_list: li
     #     The point 0,0,0 is a point on the ground where the object has been placed in x-plane scenery.
     #     The X-Plane scenery file referencing the object may rotate the object clockwise around the Y axis.
 
-    # clear obj_files.txt file
-    with open(file=in_dc_config.get(CONF_OUTPUT_OBJ_FILES, f'{CONF_OUTPUT_OBJ_FILES}.txt'), mode='w', encoding='utf8'):
-        pass
+    # clear obj_files.txt file, the writer thread already opened it empty
+    if G_WAVEFRONT_WRITER is None:
+        for manifest_key in output_manifest_keys(in_dc_config):
+            with open(file=in_dc_config.get(manifest_key, f'{manifest_key}.txt'), mode='w', encoding='utf8'):
+                pass
 
-    with open(file=in_dc_config.get(CONF_OUTPUT_OBJ_RESUME_FILES_NAME, f'{CONF_OUTPUT_OBJ_RESUME_FILES_NAME}.txt'),
-              mode="w", encoding="utf8"):
-        pass
-
-    i_limit = 0
     i_actual_processed = 0  # v1.1
     i_skipped_files = 0  # v1.1
     G_PREPARED_FILES_TO_PROCESS = 0
     G_SKIPPED_FILES = 0
-
-    for way_id in in_building_id_list:
-        i_limit += 1
+    G_FOOTPRINT_VERTICES_IN = 0
+    G_FOOTPRINT_VERTICES_OUT = 0
+    G_WAVEFRONT_VERTICES = 0
+    G_WAVEFRONT_FACES = 0
+    G_TRIANGULATION_SECONDS = 0.0
+    G_NATIVE_OBJ8_FILES = 0
+    G_ARCHETYPE_INSTANCES = 0
+
+    # "spatial_order": neighbouring buildings one after the other, before "limit" picks the first ones
+    if in_dc_config.get(CONFIG_SPATIAL_ORDER, "") != "":
+        in_building_id_list = sort_ways_by_spatial_order(conn, in_dc_config, in_building_id_list)
+
+    # The "limit" and "every nth" filters depend on the way position only, so we apply them before the work starts
+    ls_way_ids = []
+    for i_limit, way_id in enumerate(in_building_id_list, start=1):
         # v1.2 fixed limiting tests.
         if i_limit > in_dc_config.get(CONFIG_LIMIT, DEFAULT_LIMIT_FILES):
-            return i_actual_processed, i_skipped_files  # Exit the loop # v1.1 added processed + skipped files
+            break
 
         if (in_dc_config.get(CONFIG_FILTER_OUT_EVERY_NTH_MESH) is not None
                 and i_limit % int(in_dc_config.get(CONFIG_FILTER_OUT_EVERY_NTH_MESH)) == 0):
@@ -1069,231 +3376,65 @@ def parse_osm_to_wavefront_obj(conn, in_dc_config: dict, in_building_id_list: li
             i_skipped_files += 1
             continue
 
-        binds = [way_id]
-        dc_rows = fetch_osm_info_from_db(conn, binds, in_b_sqlite_supports_math)
+        ls_way_ids.append(way_id)
 
-        print(f'Fetched: {len(dc_rows)} rows.')  # debug
+    # "incremental_rebuild": the up-to-date ways reuse their OBJ8 file, like the "skip_rule" skipped ones
+    if in_dc_config.get(CONFIG_INCREMENTAL_REBUILD, False):
+        i_ways = len(ls_way_ids)
+        ls_way_ids = filter_unchanged_ways(conn, in_dc_config, ls_way_ids)
+        G_SKIPPED_FILES += i_ways - len(ls_way_ids)
+        i_skipped_files += i_ways - len(ls_way_ids)
 
-        if len(dc_rows) == 0:
-            print(f'There are no rows corresponding to the way id: {way_id}. Aborting script.')
-            sys.exit(-1)
-
-        # Loop over all rows and create the base of the OBJ mesh
-        vt_obj_wavefront = []  # Initialize with 0,0 coordinates
-        x = y = z = last_x = last_z = 0.0  # removed last_y
-        mx_vert_length = 0.0  # will hold the longest row[K_MT_DISTANCE]
-        mesh_rotation = 0.0
-
-        # f_mesh_perimeter = 0.0
-        last_row = None
-        for idx, (row_no, row) in enumerate(dc_rows.items()):
-
-            y = 0  # currently y always equal to zero, since we are drawing a plane
-            if (row[K_MT_DISTANCE] is not None) and mx_vert_length < row[K_MT_DISTANCE]:
-                mx_vert_length = row[K_MT_DISTANCE]
-
-            # calculate new position based on previous coordinates, distance and bearing
-            if idx > 0 and row[K_SEQ] < (row[K_MAX_SEQ] - 1):  # We calculate rows 1..(N-1)
-                # In X-Plane X=east/west, Z=North South
-                try:
-                    x, z = calculate_new_coordinates(last_x, last_z, row[K_MT_DISTANCE], row[K_DEGREES_ROUND])
-                    if row_no == 2 and idx == 1:
-                        mesh_rotation = row[K_DEGREES_ROUND]
-                except Error as e:
-                    print(f"{e}\n\tFor row: {idx}")
-                    continue
-            elif idx == 0:
-                vt_obj_wavefront.append([x, y, z])  # store position array [0,0,0]
-                x, z = calculate_new_coordinates(last_x, last_z, row[K_MT_DISTANCE], row[K_DEGREES_ROUND])
-            elif row[K_SEQ] == row[K_MAX_SEQ]:
-                # We inject to last "row" the mesh rotation for future use
-                row[K_ROTATION] = mesh_rotation
-                last_row = copy.deepcopy(row)
-                break  # exit loop without handling closing vertex
-            else:
-                last_row = copy.deepcopy(row)
-                continue  # We should never reach this line of code.
-
-            vt_obj_wavefront.append([x, y, z])  # store in array
-            last_x = x
-            # last_y = y
-            last_z = z
-
-        ###############################
-        # Filter by perimeter or Wall Length
-        ###############################
-
-        filter_out_obj_with_perimeter_greater_than = in_dc_config.get(CONFIG_FILTER_OUT_OBJ_WITH_PERIMETER_GREATER_THAN,
-                                                                      0.0)
-        filter_out_obj_with_perimeter_less_than = in_dc_config.get(CONFIG_FILTER_OUT_OBJ_WITH_PERIMETER_LESS_THAN, 0.0)
-        filter_in_obj_with_perimeter_between_lst = in_dc_config.get(CONFIG_FILTER_IN_OBJ_WITH_PERIMETER_BETWEEN, [])
-
-        print(f'{way_id=!r}, {last_row[K_PERIMETER]=!r}')  # v1.2 perimeter info
-
-        # Filter out by wall length
-        if mx_vert_length > in_dc_config.get(CONFIG_MAX_WALL_LENGTH, 0.0) > 0.0:
-            i_skipped_files += 1
-            print(
-                f"Way: {way_id} has a wall longer than {in_dc_config.get(CONFIG_MAX_WALL_LENGTH, 0.0)} meters. Skipping...")
-            continue
-
-        # Filter out objects with perimeter larger than
-        if last_row[K_PERIMETER] > filter_out_obj_with_perimeter_greater_than > 0.0:
-            i_skipped_files += 1
-            print(
-                f"\nWay: {way_id} has a perimeter longer than {filter_out_obj_with_perimeter_greater_than} meters. Perimeter length: {last_row[K_PERIMETER]}. Skipping...\n")
-            continue
-
-        # Filter out objects with perimeter less than
-        if last_row[K_PERIMETER] < filter_out_obj_with_perimeter_less_than > 0.0:
-            i_skipped_files += 1
-            print(
-                f'''\nWay: {way_id} has a perimeter less than {filter_out_obj_with_perimeter_less_than} meters. 
-                Perimeter length: {last_row[K_PERIMETER]}. Skipping...\n '''
-            )
-            continue
-
-        # Filter in objects with perimeter between
-        if isinstance(filter_in_obj_with_perimeter_between_lst, list) and len(
-                filter_in_obj_with_perimeter_between_lst) > 1:
-            # check if the mesh perimeter is outside the "filter in" values.
-            # Check if the shortest allowed length is bigger than the perimeter
-            # or the biggest allowed length is shorter than the perimeter.
-            if filter_in_obj_with_perimeter_between_lst[0] > last_row[K_PERIMETER] or last_row[K_PERIMETER] > \
-                    filter_in_obj_with_perimeter_between_lst[1]:
-                i_skipped_files += 1
-                print(
-                    f'''\nWay: {way_id} has a perimeter not in the filter range: {filter_in_obj_with_perimeter_between_lst!r}  
-                    Perimeter length: {last_row[K_PERIMETER]}. Skipping...\n '''
-                )
-                continue
-
-        # We assume that all arrays represents a cube, so we need to add the elevation coordinates
-
-        vt_obj_wavefront.reverse()
-        vt_obj_wavefront_elev = copy.deepcopy(vt_obj_wavefront)
-
-        #################
-        # Tentative height decision, not using OSM Metadata
-        #################
-        f_height = 2.5
-
-        # Decide height by longest edge. units: meters
-        if mx_vert_length > 20:
-            f_height = 9.0
-        elif mx_vert_length > 12:
-            f_height = 6.0
-        elif mx_vert_length > 8:
-            f_height = 3.5
-
-        # Decide height using perimeter information
-        if last_row[K_PERIMETER] > 150.0:
-            f_height = 9.0
-        elif last_row[K_PERIMETER] > 80:
-            f_height = 6.0
-
-        # v1.1 gather way_id metadata information to send to Blender
-        s_default_where_const = "and ( k like 'build%' or k = 'amenity' or k='height' )"
-        stmt = f'select k, v from ways_meta where way_id=? {dc_config.get(CONFIG_QUERY_META_TEXT, s_default_where_const)}'
-        rows = exec_query_stmt(conn, stmt, binds, True)
-        dc_way_meta = {}
-        # print(f'rows type:{type(rows)}')
-
-        # TODO: Re-write this code to be more pythonic
-        for indx, row in list(enumerate(rows)):
-            keys_list = row.keys()
-            i = 1
-            key = ""
-            for k in keys_list:
-                if i == 1:
-                    key = row[k]
-                    dc_way_meta[key] = ""
-                    i += 1
-                elif i == 2:
-                    dc_way_meta[key] = row[k]
-                    i += 1
-                    break
-                else:
-                    break
-
-        in_dc_config["way_meta"] = dc_way_meta
-        print(f'{dc_way_meta}\n')
-
-        list_height_keys = in_dc_config.get(CONFIG_HEIGHT_KEYS_LIST, [])
-        building_height = 0.0
-        if isinstance(list_height_keys, list):
-            for l_key in list_height_keys:
-                if l_key in dc_way_meta:
-                    if is_number(dc_way_meta[l_key]):
-                        building_height = float(dc_way_meta[l_key])
-                    else:
-                        flag_parsed, num_parsed_list = parse_feet_inches(dc_way_meta[l_key])
-                        if flag_parsed:
-                            building_height = num_parsed_list[0] * 0.3048  # convert to meters
-                            break  # exit loop
-                        else:
-                            building_height = 0.0
-
-            print(f'Metadata height: {building_height=}')
-
-        if building_height > 0.0:
-            f_height = building_height
-
-        # v1.2 Added support of level key list. There might be other keys that represent levels.
-        # First found, first served.
-        building_levels = 0
-        list_of_level_keys = in_dc_config.get('level_keys_list', [])
-        if not isinstance(list_of_level_keys, list):
-            list_of_level_keys = []
-        for key in list_of_level_keys:
-            if dc_way_meta.get(key, None) is not None:
-                building_levels = int(dc_way_meta.get(key, 1))
-                break
-
-        # The next logic is to make sure that the value is valid, or
-        # we fall back to the default osm key metadata for levels.
-        building_levels = building_levels if building_levels > 0 else int(dc_way_meta.get("building:levels", 1))
-
-        # v1.1 Force building level rules
-        if building_levels > 1:
-            f_height = building_levels * 3.0  # Default floor height is 3 meters
+    # "archetype_instancing": only the archetypes and the ways matching none are built, the others are placed as instances
+    if in_dc_config.get(CONFIG_ARCHETYPE_INSTANCING, False):
+        if in_dc_config.get(CONFIG_USE_SQLITE_FLOW, False) or int(in_dc_config.get(CONFIG_WAVEFRONT_BATCH_SIZE, 0)) > 0:
+            print('"archetype_instancing" is not supported with "use_sqlite_flow" or "wavefront_batch_size", building every way.')
         else:
-            building_levels = 1  # make sure never Zero
-
-        print(f'Final Height: {f_height=}, {building_height=}, {building_levels=}')  # debug
-        # end v1.1 height information
-
-        # create a list of levels: [vt_obj_wavefront_elev, vt_obj_wavefront_elev,vt_obj_wavefront_elev]
-        # Each element represents a building level
-        # Modify height
-        for vt_array in vt_obj_wavefront_elev:
-            # validate we have a tuple
-            if len(vt_array) > 2:
-                vt_array[1] = f_height / building_levels
-
-        # make a copy of the top face * number of levels
-        list_of_vt_obj_wavefront_elev_levels = []
-        for lvl in range(building_levels):
-            list_of_vt_obj_wavefront_elev_levels.append(copy.deepcopy(vt_obj_wavefront_elev))
-
-        v_processed = write_cube_from_osm_to_wavefront_format(conn, way_id, in_dc_config, building_levels, f_height,
-                                                              vt_obj_wavefront, vt_obj_wavefront_elev, last_row)
+            ls_way_ids = assign_building_archetypes(conn, in_dc_config, ls_way_ids)
+
+    i_workers = int(in_dc_config.get(CONFIG_WAVEFRONT_WORKERS, 1))
+    i_workers = (os.cpu_count() or 1) if i_workers == 0 else i_workers
+    if i_workers > 1 and in_dc_config.get(CONFIG_USE_SQLITE_FLOW, False):
+        print('"wavefront_workers" is not supported with "use_sqlite_flow", using one process.')
+        i_workers = 1
+
+    i_batch_size = int(in_dc_config.get(CONFIG_WAVEFRONT_BATCH_SIZE, 0))
+    if i_batch_size > 0 and in_dc_config.get(CONFIG_USE_SQLITE_FLOW, False):
+        print('"wavefront_batch_size" is not supported with "use_sqlite_flow", writing one file per building.')
+        in_dc_config[CONFIG_WAVEFRONT_BATCH_SIZE] = i_batch_size = 0
+    G_WAVEFRONT_BATCHES = WavefrontBatches(in_dc_config, i_batch_size) if i_batch_size > 0 else None
+
+    if i_workers > 1 and len(ls_way_ids) > 1:
+        conn.commit()  # the workers read the database from their own connections
+        processed_results = generate_wavefront_files_parallel(in_dc_config, ls_way_ids, in_b_sqlite_supports_math, i_workers)
+    else:
+        processed_results = (prepare_building_wavefront(conn, way_id, in_dc_config, in_b_sqlite_supports_math) for way_id in ls_way_ids)
+
+    for v_processed in processed_results:
         G_PREPARED_FILES_TO_PROCESS += v_processed
         i_actual_processed += v_processed
         i_skipped_files += 1 if v_processed == 0 else 0  # add 1 only if v_processed is zero
 
-        # debug_limit = in_dc_config.get(CONFIG_LIMIT, DEFAULT_LIMIT_FILES)
-        if i_limit + 1 > in_dc_config.get(CONFIG_LIMIT, DEFAULT_LIMIT_FILES):
-            return i_actual_processed, i_skipped_files  # Exit the loop # v1.1 added processed + skipped files
+    if G_WAVEFRONT_BATCHES is not None:
+        G_WAVEFRONT_BATCHES.close()  # the last, partial, batch of every tile
+        G_WAVEFRONT_BATCHES = None
 
     return i_actual_processed, i_skipped_files
 
 
 def write_cube_from_osm_to_wavefront_format(conn, way_id: int, in_dc_config: dict, in_building_levels: int,
-                                            in_suggested_height: float, vt_arrays=None, vt_arrays_elev=None, row=None):
-    """ Write the base cube to an "{}_osm.obj" file to use later with blender. """
+                                            in_suggested_height: float, vt_arrays=None, vt_arrays_elev=None, row=None,
+                                            in_dc_texture_zones: dict = None, in_roof_faces: list = None, in_dc_blender_job: dict = None):
+    """ Write the base cube to an "{}_osm.obj" file to use later with blender.
+    When "in_dc_texture_zones" is provided, the texture coordinates (vt) are written too, so blender can skip unwrapping.
+    When "in_roof_faces" is provided (see generate_roof_faces()), they replace the flat top face.
+    "in_dc_blender_job" (way metadata and texture set) goes to the "blender_jobs" manifest, see read_blender_job_entries(). """
     global CONF_OUTPUT_OBJ_FILES
     global CONF_OUTPUT_OBJ_RESUME_FILES_NAME
+    global G_WAVEFRONT_VERTICES
+    global G_WAVEFRONT_FACES
+    global G_TRIANGULATION_SECONDS
+    global G_NATIVE_OBJ8_FILES
 
     if vt_arrays is None:
         vt_arrays = []
@@ -1306,26 +3447,54 @@ def write_cube_from_osm_to_wavefront_format(conn, way_id: int, in_dc_config: dic
     if in_building_levels < 1:
         in_building_levels = 1
 
+    # Compact mode: one wall span for all levels. Blender will repeat the wall texture "in_building_levels" times
+    # instead of us writing a band of wall faces per level.
+    geometry_levels = 1 if in_dc_config.get(CONFIG_WAVEFRONT_COMPACT_LEVELS, False) else in_building_levels
+    levels_in_span = in_building_levels if geometry_levels == 1 else 1
+    b_write_bottom_face = not in_dc_config.get(CONFIG_WAVEFRONT_DROP_BOTTOM_FACE, False)
+    # "native_obj8_writer": simple buildings skip the WaveFront file and Blender, see building_needs_blender()
+    b_native_obj8 = (in_dc_config.get(CONFIG_NATIVE_OBJ8_WRITER, False) and not in_dc_config.get(CONFIG_USE_SQLITE_FLOW, False)
+                     and in_dc_config.get("blend_export_xplane_obj8") is not False
+                     and not building_needs_blender(in_dc_config, len(vt_arrays), bool(in_dc_texture_zones), bool(in_roof_faces)))
+    if not b_native_obj8 and not in_dc_config.get(CONFIG_WAVEFRONT_WRITE_UV, False):
+        in_dc_texture_zones = None  # picked for the native writer only, Blender unwraps this building
+    b_write_uv = bool(in_dc_texture_zones)
+    b_triangulate_caps = in_dc_config.get(CONFIG_WAVEFRONT_TRIANGULATE_CAPS, False) or b_native_obj8
+    b_binary_mesh = in_dc_config.get(CONFIG_WAVEFRONT_BINARY_MESH, False)
+
     list_all_levels = [vt_arrays]
     list_all_levels_index = []
-    for lvl in range(in_building_levels):
-        list_all_levels.append(copy.deepcopy(vt_arrays_elev))  # Adding elevated levels
+    for lvl in range(geometry_levels):
+        list_all_levels.append([list(vt_point) for vt_point in vt_arrays_elev])  # Adding elevated levels
 
     i_counter = 1
     for indx, vt_list in enumerate(list_all_levels):
         vt_indx = []
         for vt_point in vt_list:
-            vt_point[1] = indx * (in_suggested_height / in_building_levels)
+            vt_point[1] = indx * (in_suggested_height / geometry_levels)
             vt_indx.append(i_counter)
             i_counter += 1
         # Store index
-        list_all_levels_index.append(copy.deepcopy(vt_indx))
-        vt_indx.clear()
+        list_all_levels_index.append(vt_indx)
 
     # print(f'{list_all_levels=}')  # debug
     # print(f'{list_all_levels_index=}')  # debug
     # v1.1 end
 
+    # Roof vertices: the footprint points are the top level vertices, the others are added after them
+    dc_roof_vertex_index = {}  # (x, height, z) => vertex index
+    ls_roof_vertices = []
+    if in_roof_faces:
+        for vt_point, val_index in zip(list_all_levels[-1], list_all_levels_index[-1]):
+            dc_roof_vertex_index[(round(vt_point[0], 3), 0.0, round(vt_point[2], 3))] = val_index
+        for roof_face in in_roof_faces:
+            for x, height, z in roof_face:
+                roof_key = (round(x, 3), round(height, 3), round(z, 3))
+                if roof_key not in dc_roof_vertex_index:
+                    dc_roof_vertex_index[roof_key] = i_counter
+                    ls_roof_vertices.append([x, in_suggested_height + height, z])
+                    i_counter += 1
+
     ####################
     # open output file #
     ####################
@@ -1351,24 +3520,22 @@ def write_cube_from_osm_to_wavefront_format(conn, way_id: int, in_dc_config: dic
     #     out_path = os.path.join(dir_path, work_path)
     # dc_config[CONFIG_WORK_FOLDER] = out_path
 
-    out_path = dc_config.get(CONFIG_WORK_FOLDER, "out")
+    out_path = building_output_folder(in_dc_config, float(row[K_LAT]), float(row[K_LON]), way_id)
 
-    # Create the working folder "out" if it is not available
+    # Create the working folder "out" (or its shard folder) if it is not available
     if not os.path.isdir(out_path):
         try:
-            os.mkdir(out_path)
+            os.makedirs(out_path, exist_ok=True)  # "wavefront_workers" processes can create the same folder
         except OSError as ose:
             print(f'Failed to create "out" folder.\n{ose}')
             sys.exit(1)
 
-    s_lat_lon = f'{row[K_LAT]}_{row[K_LON]}'
-
-    # define the base output file name
-    base_file_name = f'xx_({s_lat_lon})_{way_id}'
+    # define the base output file name: "xx_({lat}_{lon})_{way_id}"
     # base_file_name = f'xx_{s_lat_lon}_{way_id}'  # v25.05.1 "[]" instead of "()" in the hope to solve the file naming issues is io.path.isFile()
     # "{dir_path}/out/{base_file_name}_osm.obj" # will be used for import into blender
-    output_file = os.path.join(out_path, base_file_name) + "_osm.obj"
-    output_file_obj8 = os.path.join(out_path, base_file_name) + "_osm_obj8.obj"  # v1.1
+    base_file = building_base_file(in_dc_config, row[K_LAT], row[K_LON], way_id)
+    output_file = base_file + ("_osm.mesh" if b_binary_mesh else "_osm.obj")
+    output_file_obj8 = base_file + "_osm_obj8.obj"  # v1.1
 
     # Check skip rules: if file exists and larger than 500 bytes then skip.
     if check_skip_and_resume_settings(in_dc_config=in_dc_config, in_resume_lvl_needed=5, in_output_file=output_file
@@ -1377,108 +3544,539 @@ def write_cube_from_osm_to_wavefront_format(conn, way_id: int, in_dc_config: dic
                                       ):
         return 0
 
+    # "staging_folder": the intermediate file (and the OBJ8 Blender writes next to it) lives in RAM until persisted
+    output_file = staged_path(in_dc_config, output_file)
+    if in_dc_config.get(CONFIG_STAGING_WORK_FOLDER, "") != "":
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
     ########
     # Header
     s_header = f"""# $0 {G_VERSION}
     #Written by Saar
     """
+    # Mesh information for the blender script, one "# key value" per line
+    dc_header = {"levels_in_span": levels_in_span, "bottom_face": int(b_write_bottom_face), "winding": "ccw"}
+    if in_roof_faces:
+        dc_header["roof"] = 1
+    if b_triangulate_caps:
+        dc_header["caps_triangulated"] = 1
+    if b_write_uv:
+        dc_header["uv"] = 1
+        dc_header["roof_zone"] = ','.join(str(value) for value in in_dc_texture_zones[K_ZONE_ROOF])
+    dc_header = {key: str(value) for key, value in dc_header.items()}
+    s_header += "".join(f"# {key} {value}\n" for key, value in dc_header.items())
     s_output_object = "o cube\n"  # type of vertex object: plane, cube etc
 
-    with open(file=output_file, mode="w", encoding="utf8") as text_file:
-        text_file.write(s_header)
-        # text_file.write(sMtllib)
-        text_file.write(s_output_object)
-
-        # v1.1 Write vertex (v) from array. Write from all lists
-        for level in list_all_levels:
-            for vt_row in level:
-                text_file.write("v")
-                for vt in vt_row:
-                    text_file.write(' {:.2f}'.format(vt))
-                text_file.write("\n")
-
-        i_counter = 0
-        s_faces = ""
-        i_index_normal = 1
-
-        # v1.1
-        # Loop over all levels lists and prepare the faces
-        dc_faces_list = {}
-        for indx_list_i in range(len(list_all_levels_index)):
-            current_list = list_all_levels_index[indx_list_i]
-
-            # The following code will wrap around to the first list after the last list.
-            # We will stop once this occurs
-            next_list = list_all_levels_index[(indx_list_i + 1) % len(list_all_levels_index)]
-
-            # exit if we wrapped around, if we reached the last index, we don't want to cycle
-            if indx_list_i + 1 == len(list_all_levels_index):
-                break
-
-            for indx in range(len(current_list)):
-                i_counter += 1
-                if indx + 1 < len(current_list):
-                    # vt base1, vt base2, vt base1'(elev), vt base2'(elev)
-                    s_faces = f"{current_list[indx]}//{i_index_normal} {current_list[indx + 1]}//{i_index_normal} {next_list[indx + 1]}//{i_index_normal} {next_list[indx]}//{i_index_normal}"
+    # Batch mode: the building is one object of a multi-object file (see WavefrontBatches), the header goes to the
+    # sidecar index and the faces use relative (negative) indices, so the object text does not depend on its position.
+    b_batch = G_WAVEFRONT_BATCHES is not None and not b_native_obj8
+    if b_batch:
+        s_header = ""
+        s_output_object = f"o way_{way_id}\n"
+
+    i_counter = 0
+    i_index_normal = 1
+    dc_normals_list = {}  # one vertex normal (vn) per face, the rings are counter-clockwise so all face outward
+    dc_uv_list = {}  # the texture coordinates of each face corner, only when "b_write_uv"
+    base_ring = list_all_levels[0]
+    b_used_uv_door = False
+    i_window_counter = 0
+    level_height = in_suggested_height / geometry_levels
+
+    # v1.1
+    # Loop over all levels lists and prepare the faces
+    dc_faces_list = {}
+    for indx_list_i in range(len(list_all_levels_index)):
+        current_list = list_all_levels_index[indx_list_i]
+
+        # The following code will wrap around to the first list after the last list.
+        # We will stop once this occurs
+        next_list = list_all_levels_index[(indx_list_i + 1) % len(list_all_levels_index)]
+
+        # exit if we wrapped around, if we reached the last index, we don't want to cycle
+        if indx_list_i + 1 == len(list_all_levels_index):
+            break
+
+        for indx in range(len(current_list)):
+            i_counter += 1
+            indx_next = (indx + 1) % len(current_list)
+            # vt base1, vt base2, vt base1'(elev), vt base2'(elev)
+            dc_faces_list[i_index_normal] = [current_list[indx], current_list[indx_next], next_list[indx_next], next_list[indx]]
+            dc_normals_list[i_index_normal] = wall_outward_normal_xz(base_ring[indx], base_ring[indx_next])
+
+            if b_write_uv:
+                # Same zone rules as the blender script: first short wall gets a door, the next one a window.
+                wall_length = math.dist((base_ring[indx][0], base_ring[indx][2]), (base_ring[indx_next][0], base_ring[indx_next][2]))
+                b_short_wall = max(wall_length, level_height) <= DEFAULT_DOOR_WALL_MAX_LENGTH_MT
+                if not b_used_uv_door and b_short_wall:
+                    zone = in_dc_texture_zones.get(K_ZONE_WALL_W_DOOR, in_dc_texture_zones[K_ZONE_WALL])
+                    b_used_uv_door = True
+                elif i_window_counter < 1 and b_short_wall:
+                    zone = in_dc_texture_zones.get(K_ZONE_WALL_W_WIN, in_dc_texture_zones[K_ZONE_WALL])
+                    i_window_counter += 1
                 else:
-                    s_faces = f"{current_list[indx]}//{i_index_normal} {current_list[0]}//{i_index_normal} {next_list[0]}//{i_index_normal} {next_list[indx]}//{i_index_normal}"
-
-                dc_faces_list[i_index_normal] = s_faces
-                i_index_normal += 1
-
-        ########################
-        # Add Bottom and Top faces
-        ########################
-        # Add Bottom face
-        s_faces = ""
-        for indx in range(len(list_all_levels_index[0])):
-            s_faces += f"{list_all_levels_index[0][indx]}//{i_index_normal} "
-
-        dc_faces_list[i_index_normal] = s_faces
+                    zone = in_dc_texture_zones[K_ZONE_WALL]
+
+                x0, y0, zone_w, zone_h = zone
+                # A zone covering the full texture height can be repeated on a compact wall, see blender script
+                y1 = y0 + (zone_h * levels_in_span if levels_in_span > 1 and y0 == 0.0 and zone_h >= 1.0 else zone_h)
+                dc_uv_list[i_index_normal] = [(x0, y0), (x0 + zone_w, y0), (x0 + zone_w, y1), (x0, y1)]
+
+            i_index_normal += 1
+
+    ########################
+    # Add Bottom and Top faces
+    ########################
+    # Add Bottom face, nobody ever sees it, so it can be dropped.
+    # Written clockwise, so it faces down.
+    if b_write_uv:
+        roof_uv = roof_uv_from_footprint(list_all_levels[-1], in_dc_texture_zones[K_ZONE_ROOF])
+
+    # The caps are triangulated here once, instead of by Blender and the OBJ8 exporter
+    cap_triangles = [tuple(range(len(base_ring)))]
+    if b_triangulate_caps:
+        start_time = time.perf_counter()
+        cap_triangles = triangulate_polygon([(pt[0], pt[2]) for pt in base_ring])
+        G_TRIANGULATION_SECONDS += time.perf_counter() - start_time
+
+    if b_write_bottom_face:
+        for triangle in cap_triangles:
+            dc_faces_list[i_index_normal] = [list_all_levels_index[0][i] for i in reversed(triangle)]
+            dc_normals_list[i_index_normal] = (0.0, -1.0, 0.0)
+            if b_write_uv:
+                dc_uv_list[i_index_normal] = [roof_uv[i] for i in reversed(triangle)]
+            i_index_normal += 1
+
+    # Add Top face, or the roof faces
+    if in_roof_faces:
+        for roof_face in in_roof_faces:
+            dc_faces_list[i_index_normal] = [dc_roof_vertex_index[(round(x, 3), round(height, 3), round(z, 3))] for x, height, z in roof_face]
+            dc_normals_list[i_index_normal] = face_normal(roof_face)
+            if b_write_uv and dc_normals_list[i_index_normal][1] > 0.1:
+                dc_uv_list[i_index_normal] = roof_uv_from_footprint(roof_face, in_dc_texture_zones[K_ZONE_ROOF], list_all_levels[-1])
+            elif b_write_uv:
+                # Gable wall: along its base edge and up to its apex
+                x0, y0, zone_w, zone_h = in_dc_texture_zones[K_ZONE_WALL]
+                (x1, _, z1), (x2, _, z2) = roof_face[0], roof_face[1]
+                base_len_sq = max((x2 - x1) ** 2 + (z2 - z1) ** 2, 0.0001)
+                max_height = max(max(pt[1] for pt in roof_face), 0.01)
+                dc_uv_list[i_index_normal] = [(x0 + zone_w * ((x - x1) * (x2 - x1) + (z - z1) * (z2 - z1)) / base_len_sq,
+                                               y0 + zone_h * height / max_height) for x, height, z in roof_face]
+            i_index_normal += 1
+    else:
+        for triangle in cap_triangles:
+            dc_faces_list[i_index_normal] = [list_all_levels_index[-1][i] for i in triangle]
+            dc_normals_list[i_index_normal] = (0.0, 1.0, 0.0)
+            if b_write_uv:
+                dc_uv_list[i_index_normal] = [roof_uv[i] for i in triangle]
+            i_index_normal += 1
+
+    s_position = f'{row[K_LON]} {row[K_LAT]} 0.00'
+    if b_native_obj8:
+        write_output_text(output_file_obj8, format_native_obj8(in_dc_config, [vt_row for level in list_all_levels for vt_row in level] + ls_roof_vertices,
+                                                               list(dc_faces_list.values()), list(dc_normals_list.values()),
+                                                               list(dc_uv_list.values())))
+        G_NATIVE_OBJ8_FILES += 1
+    elif b_binary_mesh:
+        # Blender builds the mesh with bulk calls, no float formatting and no WaveFront import
+        binary_mesh = pack_binary_mesh({"object": f'way_{way_id}', K_WAY_ID: way_id, "file": output_file, "position": s_position,
+                                        "header": dc_header},
+                                       [vt_row for level in list_all_levels for vt_row in level] + ls_roof_vertices,
+                                       list(dc_faces_list.values()), list(dc_uv_list.values()) if b_write_uv else None)
+        if b_batch:
+            G_WAVEFRONT_BATCHES.add(way_id, output_file, s_position, dc_header, binary_mesh)
+        else:
+            write_output_text(output_file, pack_binary_mesh_file([binary_mesh]))
+    else:
+        # The whole file is formatted into one buffer, and written by the writer thread (see WavefrontWriter)
+        ls_lines = [s_header, s_output_object]  # ls_lines.append(sMtllib)
 
-        # Add Top face
-        i_index_normal += 1
-        s_faces = ""
+        # v1.1 Write vertex (v) from array. Write from all lists
+        ls_lines.extend("v {:.2f} {:.2f} {:.2f}\n".format(*vt_row) for level in list_all_levels for vt_row in level)
+        ls_lines.extend("v {:.2f} {:.2f} {:.2f}\n".format(*vt_row) for vt_row in ls_roof_vertices)
 
-        top_level_list = list_all_levels_index[-1]  # DEBUG return the last list in the array
-        for indx, val_index in enumerate(list_all_levels_index[-1]):
-            s_faces += f"{val_index}//{i_index_normal} "
+        # Write the vertex normals (vn) the faces point to
+        ls_lines.extend("vn {:.4f} {:.4f} {:.4f}\n".format(*normal) for normal in dc_normals_list.values())
 
-        dc_faces_list[i_index_normal] = s_faces
+        # Write the texture coordinates (vt), one per face corner
+        ls_lines.extend("vt {:.5f} {:.5f}\n".format(*uv) for uv_list in dc_uv_list.values() for uv in uv_list)
 
         ########################
         # Write Vertex Textures (vt)
         ########################
         # Write s
-        text_file.write("s 0\n")
+        ls_lines.append("s 0\n")
         # Write material name: usemtl blue
-        text_file.write("usemtl blue\n")
+        ls_lines.append("usemtl blue\n")
         ########################
 
-        # Write Faces
-        for indx, s_face in dc_faces_list.items():
-            text_file.write(f"f {s_face}\n")
+        # Write Faces, "v//vn" or "v/vt/vn"
+        i_vertex_offset = i_uv_offset = i_normal_offset = 0
+        if b_batch:
+            i_vertex_offset = -(sum(len(level) for level in list_all_levels) + len(ls_roof_vertices) + 1)
+            i_uv_offset = -(sum(len(uv_list) for uv_list in dc_uv_list.values()) + 1)
+            i_normal_offset = -(len(dc_normals_list) + 1)
+
+        i_index_uv = 1
+        for indx, face_vertices in dc_faces_list.items():
+            ls_corners = []
+            for val_index in face_vertices:
+                if b_write_uv:
+                    ls_corners.append(f"{val_index + i_vertex_offset}/{i_index_uv + i_uv_offset}/{indx + i_normal_offset}")
+                    i_index_uv += 1
+                else:
+                    ls_corners.append(f"{val_index + i_vertex_offset}//{indx + i_normal_offset}")
+            ls_lines.append(f"f {' '.join(ls_corners)}\n")
 
-        #################################################
-        # Write the "obj" file into the "G_OUTPUT_OBJ_FILES_NAME" or the database
-        if dc_config.get(CONFIG_USE_SQLITE_FLOW, False):
-            conn.execute("BEGIN TRANSACTION;")
-            binds = [way_id, row[K_LAT], row[K_LON], output_file, row[K_ROTATION]]
-            stmt = f"insert into {G_OBJ8_DATA_TABLE} (way_id, lat, lon, file_name_osm, rotation) values (?,?,?,?,?)"  # initialize the row in obj8_data table
-            exec_stmt(conn, stmt, binds)
-            binds.clear()
-            conn.execute("END TRANSACTION;")
+        if b_batch:
+            G_WAVEFRONT_BATCHES.add(way_id, output_file, s_position, dc_header, "".join(ls_lines))
+        else:
+            write_output_text(output_file, "".join(ls_lines))
 
-        # generate_obj_file_log = os.path.join(in_dc_config.get(CONFIG_LOG_FOLDER), in_dc_config.get(CONF_OUTPUT_OBJ_FILES))
-        # with open(generate_obj_file_log, 'a', encoding='utf8') as file:
-        with open(f"{in_dc_config[CONF_OUTPUT_OBJ_FILES]}", 'a', encoding='utf8') as file:
-            # Write the ".obj" file name, position (lon lat), heading (0.0) and way_id for future use.
-            file.write(f'{output_file}|{row[K_LON]} {row[K_LAT]} 0.00|{way_id}\n')
+    G_WAVEFRONT_VERTICES += sum(len(level) for level in list_all_levels) + len(ls_roof_vertices)
+    G_WAVEFRONT_FACES += len(dc_faces_list)
 
-        return 1
+    #################################################
+    # Write the "obj" file into the "G_OUTPUT_OBJ_FILES_NAME" or the database
+    if in_dc_config.get(CONFIG_USE_SQLITE_FLOW, False):
+        conn.execute("BEGIN TRANSACTION;")
+        binds = [way_id, row[K_LAT], row[K_LON], output_file, row[K_ROTATION]]
+        stmt = f"insert into {G_OBJ8_DATA_TABLE} (way_id, lat, lon, file_name_osm, rotation) values (?,?,?,?,?)"  # initialize the row in obj8_data table
+        exec_stmt(conn, stmt, binds)
+        binds.clear()
+        conn.execute("END TRANSACTION;")
+
+    # Write the ".obj" file name, position (lon lat), heading (0.0) and way_id for future use.
+    # In batch mode the line is written by WavefrontBatches.add(), with the batch file name.
+    # A native OBJ8 file is final, it goes to the resume manifest, which Blender does not read and the DSF step does.
+    if b_native_obj8:
+        append_manifest_line(in_dc_config, CONF_OUTPUT_OBJ_RESUME_FILES_NAME, f'{output_file_obj8}|{s_position}|{way_id}\n')
+    elif not b_batch:
+        append_manifest_line(in_dc_config, CONF_OUTPUT_OBJ_FILES, f'{output_file}|{row[K_LON]} {row[K_LAT]} 0.00|{way_id}\n')
+    if not b_native_obj8:
+        append_manifest_line(in_dc_config, CONF_OUTPUT_BLENDER_JOBS,
+                             json.dumps({K_WAY_ID: way_id, "file": output_file, **(in_dc_blender_job or {})}, default=str) + "\n")
+
+    # Sharded layout: the lookup index of the building files, relative to the work folder
+    if in_dc_config.get(CONFIG_WORK_FOLDER_SHARDED, False):
+        relative_file = os.path.relpath(output_file_obj8 if b_native_obj8 else persisted_path(in_dc_config, output_file),
+                                        in_dc_config.get(CONFIG_WORK_FOLDER, "out"))
+        append_manifest_line(in_dc_config, CONF_OUTPUT_WAY_INDEX_FILE, f'{way_id}|{Path(relative_file).as_posix()}\n')
+
+    return 1
+
+
+def read_blender_job_entries(in_dc_config: dict) -> dict:
+    """ The "blender_jobs" manifest, written with the building files: <way_id, {way_id, file, way_meta, texture_index, texture_zones}>.
+    A Blender job gets the entries of its buildings in its own job manifest (see BlenderPool.submit()). """
+    dc_entries = {}
+    jobs_file = in_dc_config.get(CONF_OUTPUT_BLENDER_JOBS, f'{CONF_OUTPUT_BLENDER_JOBS}.txt')
+    if not os.path.isfile(jobs_file):
+        return dc_entries
+
+    with open(file=jobs_file, mode='r', encoding='utf8') as jobs_in:
+        for line in jobs_in:
+            if line.strip() != "":
+                dc_entry = json.loads(line)
+                dc_entries[str(dc_entry[K_WAY_ID])] = dc_entry
+
+    return dc_entries
+
+
+def write_blender_run_config(in_dc_config: dict, in_config_file: str, in_log_file: str = None):
+    """ The config of the Blender jobs, written once per run (per worker, with its own log file) as json.
+    The per building values ("way_id", "way_meta") come from the job manifests. """
+    dc_run_config = {key: value for key, value in in_dc_config.items() if key not in (K_WAY_ID, K_WAY_META)}
+    dc_run_config[CONFIG_OBJ_FILTER] = None
+    dc_run_config[CONFIG_HELIPAD_FILTER] = None
+    dc_run_config[K_TEXTURE_RULES] = read_texture_rules(in_dc_config).as_json()  # Blender does not parse the XML file again
+    if in_log_file is not None:
+        dc_run_config[CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME] = in_log_file
+    with open(file=in_config_file, mode='w', encoding='utf8') as config_out:
+        json.dump(dc_run_config, config_out, indent=2, default=str)
+
+
+class BlenderService:
+    """ "blender_service": one long lived Blender process that runs "run_blender_script.py --service".
+    A job is one json line on its stdin (the run config file and the job manifest file), and Blender
+    answers one "{BLENDER_SERVICE_DONE} {json}" line on its stdout once the OBJ8 file is exported. Blender resets the scene
+    and purges the orphan data between the jobs, and the process is restarted every "blender_service_max_jobs" jobs. """
+
+    def __init__(self, in_dc_config: dict, in_command: list, in_log_file: str = None):
+        self.command = in_command + [BLENDER_SERVICE_ARG]
+        self.max_jobs = int(in_dc_config.get(CONFIG_BLENDER_SERVICE_MAX_JOBS, DEFAULT_BLENDER_SERVICE_MAX_JOBS))
+        self.log_file = in_log_file  # None: the Blender output goes to the console
+        self.process = None
+        self.jobs = 0
+        self.timed_out = False
+
+    def start(self):
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, encoding="utf8", bufsize=1)
+        self.jobs = 0
+
+    def kill_on_timeout(self):
+        self.timed_out = True
+        self.process.kill()
+
+    def run_job(self, in_config_file: str, in_manifest_file: str, in_timeout: float = None):
+        """ Export the mesh file of a job manifest. A failed job is reported like a failed Blender process. Raises TimeoutExpired when the job
+        was killed after "in_timeout" seconds, and CalledProcessError when Blender exited or answered that the job failed. """
+        if self.process is None or self.process.poll() is not None or self.jobs >= self.max_jobs > 0:
+            self.close()
+            self.start()
+
+        self.jobs += 1
+        self.timed_out = False
+        timer = threading.Timer(in_timeout, self.kill_on_timeout) if in_timeout else None
+        if timer is not None:
+            timer.start()
+        try:
+            try:
+                self.process.stdin.write(json.dumps({"config": in_config_file, "manifest": in_manifest_file}) + "\n")
+                self.process.stdin.flush()
+            except OSError:
+                pass  # Blender exited, stdout is closed too
+
+            for line in self.process.stdout:
+                if line.startswith(BLENDER_SERVICE_DONE):
+                    dc_result = json.loads(line[len(BLENDER_SERVICE_DONE):])
+                    if not dc_result.get("ok", False):
+                        # Blender is still running, only this job failed: its OBJ8 file may be partial
+                        self.write_output(f'Blender failed for {in_manifest_file!r}: {dc_result.get("error")}\n')
+                        raise CalledProcessError(1, self.command, f'Blender service failed to export {in_manifest_file!r}: '
+                                                                  f'{dc_result.get("error")}')
+                    return
+
+                self.write_output(line)  # the output of Blender itself
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        return_code = self.process.wait()
+        self.process = None
+        if self.timed_out:
+            raise subprocess.TimeoutExpired(self.command, in_timeout)
+        raise CalledProcessError(return_code, self.command, f'Blender service exited while exporting {in_manifest_file!r}')
+
+    def write_output(self, in_text: str):
+        if self.log_file is None:
+            print(in_text, end="")
+        else:
+            with open(self.log_file, "a", encoding="utf8") as log_out:
+                log_out.write(in_text)
 
+    def close(self):
+        """ Closing stdin ends the Blender loop. """
+        if self.process is None:
+            return
 
-def call_blender_v1(in_dc_config: dict, conn):
+        try:
+            self.write_output(self.process.communicate(timeout=60)[0] or "")
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.communicate()
+        self.process = None
+
+
+class BlenderWorker:
+    """ One slot of the BlenderPool: a new Blender process per job, without a shell, or a BlenderService with "blender_service".
+    With "in_log_file" the Blender output and the log of the blender script go to this worker own log file,
+    "in_config_file" is the run config written for this worker (see write_blender_run_config()). """
+
+    def __init__(self, in_dc_config: dict, in_config_file: str, in_log_file: str = None):
+        current_directory = os.getcwd()
+        self.command = [in_dc_config.get(CONFIG_BLENDER_BIN), f'{current_directory}/blender/empty.blend', "--background",
+                        "--python", f'{current_directory}/blender/run_blender_script.py', "--"]
+        self.config_file = in_config_file
+        self.log_file = in_log_file
+        self.service = BlenderService(in_dc_config, self.command, in_log_file) if in_dc_config.get(CONFIG_BLENDER_SERVICE, False) else None
+        self.process = None
+
+    def run(self, in_manifest_file: str, in_timeout: float = None):
+        """ Export the mesh file of a job manifest. Raises TimeoutExpired (the process was killed) or CalledProcessError. """
+        if self.service is not None:
+            self.service.run_job(self.config_file, in_manifest_file, in_timeout)
+            return
+
+        command = self.command + [self.config_file, in_manifest_file]
+        log_out = open(self.log_file, "a", encoding="utf8") if self.log_file is not None else None
+        try:
+            self.process = subprocess.Popen(command, stdout=log_out, stderr=subprocess.STDOUT if log_out is not None else None)
+            try:
+                return_code = self.process.wait(timeout=in_timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+                raise
+        finally:
+            self.process = None
+            if log_out is not None:
+                log_out.close()
+
+        if return_code != 0:
+            raise CalledProcessError(return_code, command)
+
+    def kill(self):
+        process = self.process if self.service is None else self.service.process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def close(self):
+        if self.service is not None:
+            self.service.close()
+
+
+class BlenderPool:
+    """ "blender_workers": runs the Blender jobs on N concurrent BlenderWorker, and kills a job that runs longer than
+    "blender_job_timeout_sec". Each worker writes its own log file, "{osm_to_obj_blend_log}_w01.log"...
+    With one worker the jobs run in order, and the Blender output goes to the console and to the configured log file.
+    The run config is written once, next to the "obj_files" manifest: "{obj_files}_blender_config.json". """
+
+    def __init__(self, in_dc_config: dict, in_workers: int):
+        self.workers_count = in_workers if in_workers > 0 else (os.cpu_count() or 1)
+        self.timeout = float(in_dc_config.get(CONFIG_BLENDER_JOB_TIMEOUT_SEC, 0)) or None
+        log_file = in_dc_config.get(CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME) or "osm_to_obj_blend.log"
+        config_root = f'{os.path.splitext(in_dc_config.get(CONF_OUTPUT_OBJ_FILES, CONF_OUTPUT_OBJ_FILES))[0]}_blender_config'
+
+        self.workers = []
+        self.idle_workers = queue.Queue()
+        for i_worker in range(1, self.workers_count + 1):
+            worker_log_file = None
+            config_file = f'{config_root}.json'
+            if self.workers_count > 1:
+                log_root, log_ext = os.path.splitext(log_file)
+                worker_log_file = f'{log_root}_w{i_worker:02d}{log_ext or ".log"}'
+                config_file = f'{config_root}_w{i_worker:02d}.json'
+                with open(file=worker_log_file, mode='w', encoding='utf8'):
+                    pass
+            write_blender_run_config(in_dc_config, config_file, worker_log_file)
+            self.workers.append(BlenderWorker(in_dc_config, config_file, worker_log_file))
+            self.idle_workers.put(self.workers[-1])
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers_count)
+        self.dc_jobs = {}  # future => job manifest file
+        self.dc_callbacks = {}  # job manifest file => callbacks, called with True once exported, or False when it timed out or failed
+        self.lock = threading.Lock()
+        self.busy = 0
+        self.busy_seconds = 0.0
+        self.start_time = time.time()
+        self.timed_out = 0
+        self.failed = 0
+
+    def submit(self, in_file: str, in_ls_entries: list, in_ls_callbacks: list):
+        """ Write the job manifest of the mesh (or batch) file "in_file", "{file}_job.jsonl", one line per building
+        with the mesh file, and queue the job. "in_ls_callbacks": one per building to finish once the job is done. """
+        manifest_file = f'{os.path.splitext(in_file)[0]}_job.jsonl'
+        with open(file=manifest_file, mode='w', encoding='utf8') as manifest_out:
+            manifest_out.writelines(json.dumps({K_MESH: in_file, **dc_entry}, default=str) + "\n" for dc_entry in in_ls_entries)
+
+        self.dc_callbacks[manifest_file] = in_ls_callbacks
+        self.dc_jobs[self.executor.submit(self.run_job, manifest_file)] = manifest_file
+
+    def run_job(self, in_manifest_file: str) -> float:
+        worker = self.idle_workers.get()
+        with self.lock:
+            self.busy += 1
+        start_time = time.time()
+        try:
+            worker.run(in_manifest_file, self.timeout)
+        finally:
+            elapsed_time = time.time() - start_time
+            with self.lock:
+                self.busy -= 1
+                self.busy_seconds += elapsed_time
+            self.idle_workers.put(worker)
+
+        return elapsed_time
+
+    def utilization(self) -> float:
+        """ Busy time of the workers, out of the time they exist. """
+        with self.lock:
+            return self.busy_seconds / max(self.workers_count * (time.time() - self.start_time), 0.001)
+
+    def wait(self):
+        """ Wait for the jobs in their completion order, and call their callbacks in this thread.
+        A timed out or failed job (Blender exited with an error, or the service answered that the job failed) is reported,
+        its buildings get no OBJ8 file and the others go on. Any other error kills the workers before it is raised. """
+        i_jobs = len(self.dc_jobs)
+        try:
+            for i_done, future in enumerate(concurrent.futures.as_completed(self.dc_jobs), start=1):
+                manifest_file = self.dc_jobs[future]
+                try:
+                    elapsed_time = future.result()
+                except subprocess.TimeoutExpired:
+                    self.timed_out += 1
+                    print(f'\nTIMEOUT Blender execution for {manifest_file!r}, killed after {self.timeout} sec.')
+                    for callback in self.dc_callbacks.pop(manifest_file, []):
+                        callback(False)
+                    continue
+                except CalledProcessError as cpe:
+                    self.failed += 1
+                    print(f'\nFAIL Blender execution for {manifest_file!r}\n{cpe}')
+                    for callback in self.dc_callbacks.pop(manifest_file, []):
+                        callback(False)
+                    continue
+                finally:
+                    # The job manifest is not needed anymore, whatever the job outcome
+                    if os.path.isfile(manifest_file):
+                        os.remove(manifest_file)
+
+                for callback in self.dc_callbacks.pop(manifest_file, []):
+                    callback(True)
+
+                s_workers = f', workers busy: {self.busy}/{self.workers_count}, utilization: {self.utilization():.0%}' if self.workers_count > 1 else ''
+                print(f"file: [{i_done}/{i_jobs}]: Processed in: {elapsed_time:.6f} sec{s_workers}")
+        except Exception:
+            # OSError from Popen or a log file, a malformed answer of the service...: no Blender process or thread is left behind
+            self.close(in_b_kill=True)
+            raise
+
+        if self.workers_count > 1 or self.timed_out > 0 or self.failed > 0:
+            print(f'>> Blender workers: {self.workers_count}, utilization: {self.utilization():.0%}, '
+                  f'timed out jobs: {self.timed_out}, failed jobs: {self.failed}.<<')
+        self.dc_jobs.clear()
+
+    def close(self, in_b_kill: bool = False):
+        if in_b_kill:
+            for worker in self.workers:
+                worker.kill()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        for worker in self.workers:
+            worker.close()
+
+
+def remove_building_obj8(in_dc_config: dict, in_obj_file: str):
+    """ Remove the OBJ8 file of the building file "in_obj_file", staged and persisted. """
+    staged_obj8_file = os.path.splitext(in_obj_file)[0] + "_obj8.obj"
+    for obj8_file in {staged_obj8_file, persisted_path(in_dc_config, staged_obj8_file)}:
+        if os.path.isfile(obj8_file):
+            os.remove(obj8_file)
+
+
+def finish_blender_job(in_dc_config: dict, in_split_line_list: list, in_obj8_file: str, in_store_key: str, in_b_exported: bool):
+    """ After the Blender job of a building ("file|position|way_id" manifest line): persist its OBJ8 file, record its
+    fingerprint and add it to the OBJ8 store. A killed job leaves no OBJ8 file behind, the DSF would place a partial object.
+    The OBJ8 file is removed before the job is submitted, so a job that exits without writing it is a failed job too. """
+    staged_obj8_file = os.path.splitext(in_split_line_list[0])[0] + "_obj8.obj"
+    if not in_b_exported:
+        remove_building_obj8(in_dc_config, in_split_line_list[0])
+        return
+
+    if (in_dc_config.get("blend_export_xplane_obj8") is not False
+            and not os.path.isfile(staged_obj8_file) and not os.path.isfile(in_obj8_file)):
+        print(f'\nFAIL Blender did not export {in_obj8_file!r}')
+        return
+
+    persist_staged_file(in_dc_config, staged_obj8_file)
+    store_way_fingerprint(in_dc_config, in_split_line_list[2], in_obj8_file, in_split_line_list[1])
+    if in_store_key != "" and os.path.isfile(in_obj8_file):
+        copy_file_atomic(in_obj8_file, obj8_store_path(in_dc_config, in_store_key))
+        G_OBJ8_STORE_FILES[in_split_line_list[2].strip()] = obj8_store_path(in_dc_config, in_store_key)
+
+
+def call_blender_v1(in_dc_config: dict, conn, in_b_next_round: bool = False):
+    """ Export the buildings of the "obj_files" manifest to OBJ8 with Blender. "in_b_next_round": another Blender round
+    of the same run ("archetype_instancing" orphans), the log file and the OBJ8 store statistics go on. """
     # # Calculate Vertex Normal Using Blender + create OBJ8 file ###
     # /mnt/virtual/tools/blender-3.6.10-linux-x64/blender
     # ~/programming/git/osm_to_xplane/blender/empty.blend
@@ -1488,8 +4086,7 @@ def call_blender_v1(in_dc_config: dict, conn):
     # s_default_where_const = "and ( k like 'build%' or k = 'amenity' )"
     global CONF_OUTPUT_OBJ_FILES
     global CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME
-
-    current_directory = os.getcwd()
+    global G_OBJ8_STORE_HITS
 
     blender_bin = in_dc_config.get(CONFIG_BLENDER_BIN)  # "/mnt/virtual/tools/blender-3.6.10-linux-x64/blender"
     if os.path.isfile(blender_bin):
@@ -1498,34 +4095,37 @@ def call_blender_v1(in_dc_config: dict, conn):
         print(f"[Error] {blender_bin} does not exist or is not a regular file.")
         sys.exit(1)
 
-    blend_file = f'{current_directory}/blender/empty.blend'
-    custom_py_script = f'{current_directory}/blender/run_blender_script.py'
-
-    blend_flags = " --background "
-    py_flags = f"--python {custom_py_script} "
-
     i_processed = 0
+    # "obj8_store_folder": single building files are looked up in the store before Blender, and stored after it
+    b_obj8_store = in_dc_config.get(CONFIG_OBJ8_STORE_FOLDER, "") != "" and in_dc_config.get("blend_export_xplane_obj8") is not False
+    config_hash = config_fingerprint(in_dc_config) if b_obj8_store else ""
+    if not in_b_next_round:
+        G_OBJ8_STORE_FILES.clear()
+        G_OBJ8_STORE_HITS = 0
     try:
         # logfile_name = f'osm_to_obj_blend_{in_dc_config.get(CONFIG_OSM_BBOX, '').replace(',', '_')}.log'
         logfile_name = in_dc_config.get(CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME)
         # Reset log file
-        with open(file=logfile_name, mode='w', encoding='utf8'):
+        with open(file=logfile_name, mode='a' if in_b_next_round else 'w', encoding='utf8'):
             pass
 
+        blender_pool = BlenderPool(in_dc_config, int(in_dc_config.get(CONFIG_BLENDER_WORKERS, 1)))
+
+        # One Blender job per building file, or per batch file (fourth field) with all its buildings
+        dc_blender_jobs = {}  # job file => manifest lines (file|coordination|way id) to finish once it is exported
+        dc_job_ways = {}  # job file => way ids of all its buildings, for the job manifest
         # with open(file=G_OUTPUT_OBJ_FILES_NAME, mode='r', encoding='utf8') as file:
         with open(file=in_dc_config.get(CONF_OUTPUT_OBJ_FILES), mode='r', encoding='utf8') as file:
-            while True:
-                line = file.readline()
-                if line == '':
-                    break
-
+            for line in file:
                 # Split each line information (file|coordination|way id)
                 split_line_list = line.split("|")
                 obj_file = split_line_list[0]  # Extract the file name
                 working_way_id = split_line_list[2].strip()  # Extract the way_id  v1.1 added way_id to blender
+                job_file = split_line_list[3].strip() if len(split_line_list) > 3 else obj_file
+                dc_job_ways.setdefault(job_file, []).append(working_way_id)
 
                 # Check resume rules: if file exists and larger than 500 bytes then skip.
-                obj8_file_name = os.path.splitext(obj_file)[0] + "_obj8.obj"
+                obj8_file_name = persisted_path(in_dc_config, os.path.splitext(obj_file)[0] + "_obj8.obj")
                 if check_skip_and_resume_settings(in_dc_config=in_dc_config, in_resume_lvl_needed=10,
                                                   in_output_file=obj_file
                         , in_output_file_obj8=obj8_file_name
@@ -1533,37 +4133,41 @@ def call_blender_v1(in_dc_config: dict, conn):
                                                   ):
                     continue
 
-                # store way_id in dictionary
-                in_dc_config["way_id"] = working_way_id  # v1.1 added way_id to dictionary, to use with Blender
-
-                # v1.1 remove the query definition to resolve "blender" fail due to the "( or )" chars.
-                if in_dc_config.get(CONFIG_QUERY_META_TEXT, None) is not None:
-                    del (in_dc_config[CONFIG_QUERY_META_TEXT])
-
-                dc_copy = copy.deepcopy(in_dc_config)
-                dc_copy[CONFIG_OBJ_FILTER] = None
-                dc_copy[CONFIG_HELIPAD_FILTER] = None
-
-                py_env_flags = f'-- "{dc_copy}" "{obj_file}" '
-
-                # os_command = f'GVFS_DISABLE_FUSE=1 "{blender_bin}" "{blend_file}" {blend_flags} {py_flags} {py_env_flags}'
-                os_command = f'"{blender_bin}" "{blend_file}" {blend_flags} {py_flags} {py_env_flags}'
-                i_processed += 1
-                print(f"file: [{i_processed}/{G_PREPARED_FILES_TO_PROCESS}]: Blender: {obj_file}")
-                print(f'{in_dc_config.get("way_meta")=}')  # debug
+                dc_blender_jobs.setdefault(job_file, []).append(split_line_list)
+
+        # The way metadata and texture set of every building, the config goes once to "{obj_files}_blender_config.json"
+        dc_job_entries = read_blender_job_entries(in_dc_config)
+        for job_file, ls_split_lines in dc_blender_jobs.items():
+            ls_entries = [dc_job_entries.get(way_id, {K_WAY_ID: way_id}) for way_id in dc_job_ways[job_file]]
+
+            store_key = ""
+            if b_obj8_store and len(ls_split_lines[0]) <= 3:
+                split_line_list = ls_split_lines[0]
+                working_way_id = split_line_list[2].strip()
+                obj8_file_name = persisted_path(in_dc_config, os.path.splitext(job_file)[0] + "_obj8.obj")
+                store_key = obj8_store_key(config_hash, job_file, ls_entries[0])
+                stored_obj8_file = obj8_store_path(in_dc_config, store_key)
+                if os.path.isfile(stored_obj8_file):
+                    copy_file_atomic(stored_obj8_file, obj8_file_name)
+                    store_way_fingerprint(in_dc_config, working_way_id, obj8_file_name, split_line_list[1])
+                    G_OBJ8_STORE_FILES[working_way_id] = stored_obj8_file
+                    G_OBJ8_STORE_HITS += 1
+                    print(f"file: {job_file}: found in the OBJ8 store: {stored_obj8_file}")
+                    continue
 
-                try:
-                    v1_start_time = time.time()
+            # The Blender command line: "{blender_bin}" "{blend_file}" --background --python "{script}" -- "{run config}" "{job manifest}"
+            i_processed += 1
+            print(f"file: [{i_processed}/{G_PREPARED_FILES_TO_PROCESS}]: Blender: {job_file}")
 
-                    subprocess.check_call(os_command, shell=True)
-                    v1_end_time = time.time()
-                    v1_elapsed_time = v1_end_time - v1_start_time
-                    print(
-                        f"file: [{i_processed}/{G_PREPARED_FILES_TO_PROCESS}]: Processed in: {v1_elapsed_time:.6f} sec")
-                except CalledProcessError as cpe:
-                    print(f'\nFAIL Blender execution for {obj_file!r}\n{cpe}')
-                    sys.exit(1)
+            for split_line_list in ls_split_lines:
+                remove_building_obj8(in_dc_config, split_line_list[0])  # never fingerprint nor store the OBJ8 of a previous run
+            blender_pool.submit(job_file, ls_entries, [
+                functools.partial(finish_blender_job, in_dc_config, split_line_list,
+                                  persisted_path(in_dc_config, os.path.splitext(split_line_list[0])[0] + "_obj8.obj"), store_key)
+                for split_line_list in ls_split_lines])
 
+        blender_pool.wait()
+        blender_pool.close()
     except OSError as ose:
         print(ose)
 
@@ -1597,8 +4201,6 @@ def call_blender_v2(in_dc_config: dict, conn=object()):
     # --background
     # --python /home/xplane/programming/git/osm_to_xplane/blender-addon/run_ImportAndFlipNormals.py -- "/home/xplane/programming/git/osm_to_xplane/out/xx_690633916_cube.obj"
 
-    current_directory = os.getcwd()
-
     blender_bin = in_dc_config.get(CONFIG_BLENDER_BIN)  # "/mnt/virtual/tools/blender-3.6.10-linux-x64/blender"
     if os.path.isfile(blender_bin):
         print(f"{blender_bin} exists.")
@@ -1606,52 +4208,35 @@ def call_blender_v2(in_dc_config: dict, conn=object()):
         print(f"[Error] {blender_bin} does not exist or is not a regular file.")
         sys.exit(1)
 
-    blend_file = f'{current_directory}/blender/empty.blend'
-    custom_py_script = f'{current_directory}/blender/run_blender_script.py'
-
-    blend_flags = " --background "
-    py_flags = f"--python {custom_py_script} "
-
     i_processed = 0
     try:
         # Reset log file
         with open(file='osm_to_obj_blend.log', mode='w', encoding='utf8'):
             pass
 
+        # The jobs update the obj8_data table and find the similar meshes in their order, one worker only
+        blender_pool = BlenderPool(in_dc_config, 1)
+
         # fetch obj osm information from obj8_data table
         stmt = 'select way_id, lat, lon, file_name_osm from obj8_data'
         rows = exec_query_stmt(conn, stmt)
+        dc_job_entries = read_blender_job_entries(in_dc_config)
 
         # loop over all rows
         for row in rows:
             way_id = row[K_WAY_ID]
             obj_file = row[K_FILE_NAME_OSM]
 
-            in_dc_config[K_WAY_ID] = way_id
-
-            dc_copy = copy.deepcopy(in_dc_config)
-            dc_copy[CONFIG_OBJ_FILTER] = ''
-            dc_copy[CONFIG_HELIPAD_FILTER] = ''
-
-            py_env_flags = f'-- "{dc_copy}" "{obj_file}" '
-
-            os_command = f'"{blender_bin}" "{blend_file}" {blend_flags} {py_flags} {py_env_flags}'
             i_processed += 1
             print(f"file: [{i_processed}/{G_PREPARED_FILES_TO_PROCESS}]: Blender: {obj_file}")
 
-            try:
-                v2_start_time = time.time()
-                subprocess.check_output(os_command, shell=True)
-                v2_end_time = time.time()
-                v2_elapsed_time = v2_end_time - v2_start_time
-                print(
-                    "file: [{}/{}]: Processed in: {:.6f} sec".format(i_processed, G_PREPARED_FILES_TO_PROCESS,
-                                                                     v2_elapsed_time))
-
-            except CalledProcessError as cpe:
-                print(f"\nFAIL Blender execution for {obj_file!r}\n{cpe}")
-                sys.exit(1)
+            remove_building_obj8(in_dc_config, obj_file)
+            blender_pool.submit(obj_file, [dc_job_entries.get(str(way_id), {K_WAY_ID: way_id})], [functools.partial(
+                finish_blender_job, in_dc_config, [obj_file, f'{row[K_LON]} {row[K_LAT]} 0.00', str(way_id)],
+                persisted_path(in_dc_config, os.path.splitext(obj_file)[0] + "_obj8.obj"), "")])
 
+        blender_pool.wait()
+        blender_pool.close()
     except OSError as ose:
         print(ose)
 
@@ -1659,6 +4244,57 @@ def call_blender_v2(in_dc_config: dict, conn=object()):
     return i_processed
 
 
+def convert_dsf_text_and_copy_to_scenery(in_dc_config: dict, output_folder: str, output_dsf_text: str):
+    """ Convert the DSF text file with DSFTool (located in "output_folder"), and copy the DSF to the custom scenery folder. """
+    current_folder = os.getcwd()
+
+    output_dsf_file = f'{output_dsf_text}.dsf'
+    # Execute DSF2Text on the copied "dsf_obj8.txt" file
+    # The output_folder is where we place the "dsf2txt.txt" file to convert to DSF
+    if platform.system().lower() == 'windows':
+        # For Windows OS, we will construct absolute paths
+        dsf_tool_bin = '{}'.format(os.path.join(current_folder, output_folder, 'DSFTool.exe'))
+        source_dsf_file = os.path.join(current_folder, output_dsf_text)
+        os_command = 'type {} | {} -text2dsf - {}.dsf'.format(source_dsf_file, dsf_tool_bin,
+                                                              os.path.join(current_folder, output_dsf_text))
+
+    else:
+        dsf_tool_bin = os.path.join(output_folder, 'DSFTool')
+        os_command = f'cat {output_dsf_text} | {dsf_tool_bin} -text2dsf - {output_dsf_file}'
+
+    print(f"DSF2Text:\n{os_command}")
+
+    try:
+        result = subprocess.check_output(os_command, shell=True)
+        print(f"\nDSFTool Result:\n{result}")
+
+        if os.path.isfile(output_dsf_file):
+            try:
+                shutil.copy(output_dsf_file, in_dc_config.get(CONFIG_ROOT_SCENERY_FOLDER_TO_COPY_OBJ8_FILES))
+                print(
+                    f'Copied dsf file: {output_dsf_file!r} to {in_dc_config.get(CONFIG_ROOT_SCENERY_FOLDER_TO_COPY_OBJ8_FILES)!r}')
+            except FileNotFoundError:
+                print(f"Error: Source file {output_dsf_file!r} not found.")
+            except PermissionError:
+                print(f"Error: Permission denied when trying to copy {output_dsf_file!r}.")
+            except Exception as e:
+                print(f"An unexpected error occurred: {e}")
+
+    except subprocess.CalledProcessError as sub_process_err:
+        print(sub_process_err)
+        print(f'''
+[Warning] Failed to execute: DSFTool.
+
+Check if it is located in the same folder as the {output_dsf_text!r} file.
+You can manually convert the {os.path.basename(output_dsf_text)!r} to DSF using the DSFTool:
+Linux:
+> cat {os.path.basename(output_dsf_text)} | DSFTool -text2dsf - output.dsf
+Windows:
+> type {os.path.basename(output_dsf_text)} | .\\DSFTool.exe -text2dsf - output.dsf
+    
+    ''')
+
+
 def create_dsf_text_file_with_all_the_osm_objects_and_copy_to_destination_lib_v1(in_dc_config: dict):
     """ Create the DSF file to use with WED """
     global CONF_OUTPUT_OBJ_FILES
@@ -1702,6 +4338,7 @@ def create_dsf_text_file_with_all_the_osm_objects_and_copy_to_destination_lib_v1
 
         # Loop over obj_files.txt
         indx_file_counter = 0
+        dc_object_def_index = {}  # OBJ8 file name => OBJECT_DEF index, "archetype_instancing" places the same file many times
         ls_object_position_list = []
         # ls_source_obj_files_to_read = [G_OUTPUT_OBJ_FILES_NAME, G_OUTPUT_OBJ_RESUME_FILES_NAME]
         ls_source_obj_files_to_read = [in_dc_config[CONF_OUTPUT_OBJ_FILES],
@@ -1717,18 +4354,28 @@ def create_dsf_text_file_with_all_the_osm_objects_and_copy_to_destination_lib_v1
 
                     if source_file_enum == 0:
                         file_name = os.path.basename(s_source_osm_file_to_copy)  # extract only file name
-                        if file_name.endswith(".obj"):
-                            insert_position = -4
-                            s_target_file_name = f'{file_name[:insert_position]}_obj8{file_name[insert_position:]}'
+                        if file_name.endswith((".obj", ".mesh")):  # "{}_osm.obj" or the binary "{}_osm.mesh"
+                            s_target_file_name = f'{os.path.splitext(file_name)[0]}_obj8.obj'
                     else:
                         # final name ia already stored in resume file
                         s_target_file_name = os.path.basename(s_source_osm_file_to_copy)
 
+                    # "obj8_store_folder": the building references its stored object, named by its content address
+                    s_stored_obj8_file = G_OBJ8_STORE_FILES.get(list_data[2].strip()) if source_file_enum == 0 and len(list_data) > 2 else None
+                    if s_stored_obj8_file is not None:
+                        s_target_file_name = os.path.basename(s_stored_obj8_file)
+
+                    # Already copied and defined, only place it again
+                    if s_target_file_name in dc_object_def_index:
+                        ls_object_position_list.append(f'OBJECT {dc_object_def_index[s_target_file_name]} {list_data[1]}\n')
+                        continue
+
                     # Get the scenery sub-folder to where to copy the obj8 files
                     lib_relative_path = in_dc_config.get(CONFIG_LIB_RELATIVE_PATH, 'objects')
                     s_path = os.path.join(in_dc_config.get(CONFIG_ROOT_SCENERY_FOLDER_TO_COPY_OBJ8_FILES, ''),
                                           lib_relative_path)
-                    s_source_obj8_file = os.path.join(in_dc_config.get(CONFIG_WORK_FOLDER), s_target_file_name)
+                    # the OBJ8 file is next to its WaveFront file, in the work folder or in its shard folder ("work_folder_sharded")
+                    s_source_obj8_file = s_stored_obj8_file or os.path.join(persisted_path(in_dc_config, os.path.dirname(s_source_osm_file_to_copy)) or in_dc_config.get(CONFIG_WORK_FOLDER), s_target_file_name)
 
                     # Check existence of target folders and files
                     if not os.path.isdir(s_path):
@@ -1764,6 +4411,7 @@ def create_dsf_text_file_with_all_the_osm_objects_and_copy_to_destination_lib_v1
                     with open(output_dsf_text, 'a', encoding='utf8') as dsf_text:
                         dsf_text.write(s_object_def + "\n")
 
+                    dc_object_def_index[s_target_file_name] = indx_file_counter
                     indx_file_counter += 1
 
         # After the second LOOP we write to the position into the DSF.txt file
@@ -1774,51 +4422,7 @@ def create_dsf_text_file_with_all_the_osm_objects_and_copy_to_destination_lib_v1
 
             print("\n<---\n")
 
-            output_dsf_file = f'{output_dsf_text}.dsf'
-            # Execute DSF2Text on the copied "dsf_obj8.txt" file
-            # The output_folder is where we place the "dsf2txt.txt" file to convert to DSF
-            if platform.system().lower() == 'windows':
-                # For Windows OS, we will construct absolute paths
-                dsf_tool_bin = '{}'.format(os.path.join(current_folder, output_folder, 'DSFTool.exe'))
-                source_dsf_file = os.path.join(current_folder, output_dsf_text)
-                os_command = 'type {} | {} -text2dsf - {}.dsf'.format(source_dsf_file, dsf_tool_bin,
-                                                                      os.path.join(current_folder, output_dsf_text))
-
-            else:
-                dsf_tool_bin = os.path.join(output_folder, 'DSFTool')
-                os_command = f'cat {output_dsf_text} | {dsf_tool_bin} -text2dsf - {output_dsf_file}'
-
-            print(f"DSF2Text:\n{os_command}")
-
-            try:
-                result = subprocess.check_output(os_command, shell=True)
-                print(f"\nDSFTool Result:\n{result}")
-
-                if os.path.isfile(output_dsf_file):
-                    try:
-                        shutil.copy(output_dsf_file, in_dc_config.get(CONFIG_ROOT_SCENERY_FOLDER_TO_COPY_OBJ8_FILES))
-                        print(
-                            f'Copied dsf file: {output_dsf_file!r} to {in_dc_config.get(CONFIG_ROOT_SCENERY_FOLDER_TO_COPY_OBJ8_FILES)!r}')
-                    except FileNotFoundError:
-                        print(f"Error: Source file {output_dsf_file!r} not found.")
-                    except PermissionError:
-                        print(f"Error: Permission denied when trying to copy {output_dsf_file!r}.")
-                    except Exception as e:
-                        print(f"An unexpected error occurred: {e}")
-
-            except subprocess.CalledProcessError as sub_process_err:
-                print(sub_process_err)
-                print(f'''
-[Warning] Failed to execute: DSFTool.
-
-Check if it is located in the same folder as the {output_dsf_text!r} file.
-You can manually convert the {DEFAULT_DSF_TEXT_OUTPUT_FILE_NAME!r} to DSF using the DSFTool:
-Linux:
-> cat {DEFAULT_DSF_TEXT_OUTPUT_FILE_NAME} | DSFTool -text2dsf - output.dsf
-Windows:
-> type {DEFAULT_DSF_TEXT_OUTPUT_FILE_NAME} | .\\DSFTool.exe -text2dsf - output.dsf
-    
-    ''')
+            convert_dsf_text_and_copy_to_scenery(in_dc_config, output_folder, output_dsf_text)
 
     except Exception as e:
         print(f"Fail to write to {output_dsf_text!r} file.\n{e}")
@@ -1884,7 +4488,7 @@ def create_dsf_text_file_with_all_the_osm_objects_and_copy_to_destination_lib_v2
                 s_target_file_name = row[K_FILE_NAME_OBJ8]
                 s_path = os.path.join(in_dc_config.get(CONFIG_ROOT_SCENERY_FOLDER_TO_COPY_OBJ8_FILES),
                                       lib_relative_path)
-                s_source_obj8_file = os.path.join(in_dc_config.get(CONFIG_WORK_FOLDER), s_target_file_name)
+                s_source_obj8_file = os.path.join(persisted_path(in_dc_config, os.path.dirname(row[K_FILE_NAME_OSM])) or in_dc_config.get(CONFIG_WORK_FOLDER), s_target_file_name)
                 if os.path.isdir(s_path) and os.path.isfile(f'"{s_source_obj8_file}"'):
                     print(
                         f'{indx}: Destination library or source OBJ8 file are invalid.\npath: {s_path!r}\nobj8 file: {s_source_obj8_file!r}. Skipping OBJ8 copy task.')
@@ -1932,7 +4536,7 @@ def create_dsf_text_file_with_all_the_osm_objects_and_copy_to_destination_lib_v2
                     s_path = os.path.join(in_dc_config.get(CONFIG_ROOT_SCENERY_FOLDER_TO_COPY_OBJ8_FILES),
                                           lib_relative_path)
 
-                    s_source_obj8_file = os.path.join(in_dc_config.get(CONFIG_WORK_FOLDER), s_target_file_name)
+                    s_source_obj8_file = os.path.join(persisted_path(in_dc_config, os.path.dirname(s_source_osm_file_to_copy)) or in_dc_config.get(CONFIG_WORK_FOLDER), s_target_file_name)
                     if os.path.isdir(s_path) and os.path.isfile(f'"{s_source_obj8_file}"'):
                         print(
                             f'{instance_files}: Destination library or source OBJ8 file are invalid.\npath: {s_path!r}\nobj8 file: {s_source_obj8_file!r}. Skipping OBJ8 copy task.')
@@ -2096,10 +4700,15 @@ def main(db, in_dc_config: dict):
     resume_obj_file = os.path.join(in_dc_config.get(CONFIG_LOG_FOLDER), CONF_OUTPUT_OBJ_RESUME_FILES_NAME)
     generate_obj_file_log = os.path.join(in_dc_config.get(CONFIG_LOG_FOLDER), CONF_OUTPUT_OBJ_FILES)
     osm_to_obj_blend_log = os.path.join(in_dc_config.get(CONFIG_LOG_FOLDER), CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME)
+    quarantine_log = os.path.join(in_dc_config.get(CONFIG_LOG_FOLDER), CONF_OUTPUT_QUARANTINE_FILE)
+    bbox_postfix = in_dc_config.get(CONFIG_OSM_BBOX, "").replace(",", "_")
 
     in_dc_config[CONF_OUTPUT_OBJ_FILES] = f'{generate_obj_file_log}_{in_dc_config.get(CONFIG_OSM_BBOX, '').replace(',', '_')}.txt'
     in_dc_config[CONF_OUTPUT_OBJ_RESUME_FILES_NAME] = f'{resume_obj_file}_{in_dc_config.get(CONFIG_OSM_BBOX, '').replace(',', '_')}.txt'
     in_dc_config[CONF_OUTPUT_OSM_TO_OBJ_BLEND_LOG_FILENAME] = f'{osm_to_obj_blend_log}_{in_dc_config.get(CONFIG_OSM_BBOX, '').replace(',', '_')}.txt'
+    in_dc_config[CONF_OUTPUT_QUARANTINE_FILE] = f'{quarantine_log}_{bbox_postfix}.txt'
+    in_dc_config[CONF_OUTPUT_WAY_INDEX_FILE] = os.path.join(in_dc_config.get(CONFIG_LOG_FOLDER), f'{CONF_OUTPUT_WAY_INDEX_FILE}_{bbox_postfix}.txt')
+    in_dc_config[CONF_OUTPUT_BLENDER_JOBS] = os.path.join(in_dc_config.get(CONFIG_LOG_FOLDER), f'{CONF_OUTPUT_BLENDER_JOBS}_{bbox_postfix}.jsonl')
 
     # v25.08.1
     dir_path = os.path.dirname(os.path.realpath(__file__))
@@ -2113,6 +4722,21 @@ def main(db, in_dc_config: dict):
     # v25.08.1 Store the work path folder for later use
     dc_config[CONFIG_WORK_FOLDER] = out_path
 
+    # "staging_folder": the intermediate files of this run (building files and their manifests) go to a RAM backed
+    # folder, only the OBJ8 files are persisted to the work folder.
+    in_dc_config[CONFIG_STAGING_WORK_FOLDER] = ""
+    if in_dc_config.get(CONFIG_STAGING_FOLDER, "") != "":
+        staging_path = os.path.join(in_dc_config.get(CONFIG_STAGING_FOLDER), f'osm_to_xplane_{bbox_postfix}')
+        try:
+            os.makedirs(staging_path, exist_ok=True)
+        except OSError as ose:
+            print(f'Failed to create the staging folder {staging_path!r}.\n{ose}')
+            sys.exit(1)
+
+        in_dc_config[CONFIG_STAGING_WORK_FOLDER] = staging_path
+        for manifest_key in (CONF_OUTPUT_OBJ_FILES, CONF_OUTPUT_OBJ_RESUME_FILES_NAME, CONF_OUTPUT_BLENDER_JOBS):
+            in_dc_config[manifest_key] = os.path.join(staging_path, os.path.basename(in_dc_config[manifest_key]))
+
     # Step 1 - Fetch data. Decide if to use DEBUG and ad-hoc "way_id" list, or to use overpass/pre-defined osm file
     bbox_coordinates = in_dc_config.get(CONFIG_OSM_BBOX, '')
     overpass_json_file_name = in_dc_config.get(CONFIG_OSM_JSON_FILE, '')
@@ -2137,6 +4761,7 @@ def main(db, in_dc_config: dict):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # "wavefront_workers" processes in the pyinstaller executable
     print(f'{os.path.basename(__file__)} - v{G_MAJOR_VER}.{G_MINOR_VER}.{G_FIX_VER}\nWritten by Sa\'ar\n')
     start_time = time.time()
     # https://www.geeksforgeeks.org/command-line-arguments-in-python/